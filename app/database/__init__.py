@@ -1,4 +1,4 @@
 from .base import Base
-from .database import get_db, engine
+from .database import get_db, engine, get_async_db, async_engine, ASYNC_DB_ENABLED, replicas, async_replicas
 
-__all__ = ["Base", "get_db", "engine"]
+__all__ = ["Base", "get_db", "engine", "get_async_db", "async_engine", "ASYNC_DB_ENABLED", "replicas", "async_replicas"]
@@ -2,8 +2,13 @@
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-import os, time
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.requests import HTTPConnection
+import os
 from database.base import Base
+from database.instrumentation import SQL_TRACE_ENABLED, install_sql_trace
+from database.pool import MonitoredQueuePool, MonitoredAsyncAdaptedQueuePool, pool_options, install_pool_liveness
+from database.replica import RoutingSession, ReplicaSet, read_bind_for, replica_hosts, replica_urls
 
 DB_USER = os.getenv("OCEAN_USER")
 DB_PASSWORD = os.getenv("OCEAN_DB_USER_PASSWORD")
@@ -11,35 +16,80 @@ DB_HOST = os.getenv("OCEAN_DB_HOST")
 DB_PORT = os.getenv("OCEAN_DB_PORT")
 DB_NAME = os.getenv("OCEAN_DB")
 
-SQLALCHEMY_DATABASE_URL = f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# 테스트에서는 OCEAN_DATABASE_URL=sqlite:///... 로 교체 (tests/conftest.py)
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    "OCEAN_DATABASE_URL",
+    f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
+)
 
-engine = None
-for _ in range(5):
-    try:
-        # 커넥션 풀 관련 옵션 추가
-        engine = create_engine(
-            SQLALCHEMY_DATABASE_URL,
-            pool_pre_ping=True,    # 연결 사용할 때마다 ping으로 유휴 연결 체크
-            pool_recycle=3600,     # 1시간마다 커넥션을 재생성 (타임아웃 방지)
-            pool_size=10,          # 기본 커넥션 수
-            max_overflow=20,       # 부족할 때 추가로 생성할 커넥션 수
-        )
-        engine.connect()
-        print("DB 연결 성공")
-        break
-    except Exception as e:
-        print("DB 연결 실패:", e)
-        time.sleep(2)
-
-if engine is None:
-    print("DB 최종 연결 실패. 서버를 종료합니다.")
-    exit(1)
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-def get_db():
+# 비동기 모드 (OCEAN_DB_ASYNC=1이면 async 라우터 사용)
+# 테스트에서는 OCEAN_ASYNC_DATABASE_URL=sqlite+aiosqlite:///... 로 교체 가능
+ASYNC_DB_ENABLED = os.getenv("OCEAN_DB_ASYNC", "0") == "1"
+ASYNC_DATABASE_URL = os.getenv(
+    "OCEAN_ASYNC_DATABASE_URL",
+    f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
+)
+
+# 엔진 생성은 연결하지 않음. 연결 확인/스키마 생성은 앱 시작 후 백그라운드에서 (database/lifecycle.py)
+# 커넥션 풀 옵션은 환경변수로 (database/pool.py: 크기, 타임아웃, recycle, 유휴 ping 기준)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **pool_options(MonitoredQueuePool))
+
+install_pool_liveness(engine)
+if SQL_TRACE_ENABLED:
+    install_sql_trace(engine)
+
+# 읽기 복제본 (없으면 모든 요청이 프라이머리)
+# OCEAN_DB_REPLICA_HOSTS=host[:port],... (계정/DB 이름은 프라이머리와 동일)
+# 또는 OCEAN_DB_REPLICA_URLS=url,... (로컬 테스트: sqlite:///replica.db)
+REPLICA_HOSTS = [host if ":" in host else f"{host}:{DB_PORT}" for host in replica_hosts()]
+
+def _replica_set(urls, create, poolclass) -> ReplicaSet:
+    engines, names = [], []
+    for url in urls:
+        replica = create(url, **pool_options(poolclass))
+        sync_replica = getattr(replica, "sync_engine", replica)
+        install_pool_liveness(sync_replica)
+        if SQL_TRACE_ENABLED:
+            install_sql_trace(sync_replica)
+        engines.append(sync_replica)
+        names.append(f"{replica.url.host}:{replica.url.port}" if replica.url.host else str(replica.url.database))
+    return ReplicaSet(engines, names)
+
+replicas = _replica_set(
+    replica_urls("OCEAN_DB_REPLICA_URLS", REPLICA_HOSTS, f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{{host}}/{DB_NAME}"),
+    create_engine, MonitoredQueuePool,
+)
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=RoutingSession)
+
+def get_db(connection: HTTPConnection = None):
+    # GET/HEAD 요청은 (최근 쓰기가 없으면) 복제본에서 읽음
     db = SessionLocal()
+    db.read_bind = read_bind_for(connection, replicas)
     try:
         yield db
     finally:
         db.close()
+
+# 비동기 엔진은 활성화된 경우에만 생성 (드라이버 미설치 환경 고려)
+async_engine = None
+AsyncSessionLocal = None
+async_replicas = ReplicaSet([], [])
+if ASYNC_DB_ENABLED:
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(MonitoredAsyncAdaptedQueuePool))
+    install_pool_liveness(async_engine.sync_engine)
+    if SQL_TRACE_ENABLED:
+        install_sql_trace(async_engine.sync_engine)
+    async_replicas = _replica_set(
+        replica_urls("OCEAN_ASYNC_DB_REPLICA_URLS", REPLICA_HOSTS, f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{{host}}/{DB_NAME}"),
+        create_async_engine, MonitoredAsyncAdaptedQueuePool,
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession,
+        sync_session_class=RoutingSession,
+    )
+
+async def get_async_db(connection: HTTPConnection = None):
+    async with AsyncSessionLocal() as db:
+        db.sync_session.read_bind = read_bind_for(connection, async_replicas)
+        yield db
@@ -0,0 +1,18 @@
+# app/database/init_db.py
+# 테이블 생성 (배포 시 한 번: `python -m database.init_db`, app 디렉터리에서 실행)
+
+from database.base import Base
+
+
+def create_schema(engine):
+    # 모든 모델을 Base.metadata에 등록한 뒤 없는 테이블만 생성
+    import models  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+
+
+if __name__ == "__main__":
+    from database.database import engine
+
+    create_schema(engine)
+    print("테이블 생성 완료")
@@ -0,0 +1,108 @@
+from contextvars import ContextVar
+from sqlalchemy import event
+from typing import Optional
+import logging
+import os
+import threading
+import time
+
+# ---------------------------------------------------------------------
+# SQL 계측 (OCEAN_SQL_TRACE=1)
+# - 요청 단위 SQLTrace에 문장 수 / DB 시간 / 커넥션 풀 대기 시간(database/pool.py)을 누적
+# - OCEAN_SLOW_QUERY_MS 이상 걸린 문장은 느린 쿼리 로그로 기록 (파라미터는 남기지 않음)
+# - 꺼져 있으면 리스너를 등록하지 않으므로 비용 없음
+# HTTP 쪽 (헤더, /metrics)은 utils/trace_utils.py
+# ---------------------------------------------------------------------
+
+SQL_TRACE_ENABLED = os.getenv("OCEAN_SQL_TRACE", "0") == "1"
+SLOW_QUERY_MS = float(os.getenv("OCEAN_SLOW_QUERY_MS", "200"))
+
+slow_query_log = logging.getLogger("ocean.sql.slow")
+
+
+class SQLTrace:
+    __slots__ = ("label", "statements", "db_seconds", "pool_wait_seconds")
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+
+
+class SQLStats:
+    """
+    프로세스 전체 누적값 (요청 밖에서 실행된 문장 포함)
+    스레드풀의 여러 스레드에서 동시에 갱신되므로 잠금 안에서 더함 (+= 는 원자적이지 않음)
+    """
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.slow_queries = 0
+        self._lock = threading.Lock()
+
+    def count_statement(self):
+        with self._lock:
+            self.statements += 1
+
+    def add_time(self, seconds: float, slow: bool):
+        with self._lock:
+            self.db_seconds += seconds
+            if slow:
+                self.slow_queries += 1
+
+
+sql_stats = SQLStats()
+
+# 요청 단위 추적 객체. 스레드풀(run_in_threadpool)과 run_sync에도 컨텍스트가 복사되어 전달됩니다.
+_current_trace: ContextVar[Optional[SQLTrace]] = ContextVar("sql_trace", default=None)
+
+
+def current_trace() -> Optional[SQLTrace]:
+    return _current_trace.get()
+
+
+def start_trace(label: str = ""):
+    """(trace, reset 토큰). 끝나면 end_trace(token)을 호출합니다."""
+    trace = SQLTrace(label)
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token):
+    _current_trace.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # 실패한 문장도 개수에는 포함 (시간은 성공한 문장만)
+    sql_stats.count_statement()
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.statements += 1
+    if context is not None:
+        context._ocean_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_ocean_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    slow = elapsed * 1000 >= SLOW_QUERY_MS
+    sql_stats.add_time(elapsed, slow)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.db_seconds += elapsed
+    if slow:
+        slow_query_log.warning(
+            "slow query %.1fms [%s] %s",
+            elapsed * 1000, trace.label if trace is not None else "-", " ".join(statement.split())[:1000],
+        )
+
+
+def install_sql_trace(engine):
+    """동기 엔진 (async 엔진은 engine.sync_engine)에 리스너를 붙입니다."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
@@ -0,0 +1,76 @@
+from sqlalchemy import text
+from sqlalchemy.util import greenlet_spawn
+import asyncio
+import os
+import random
+import time
+
+# ---------------------------------------------------------------------
+# DB 초기화 (앱 시작 후 백그라운드)
+# - import 시점에는 엔진만 만들고 연결하지 않음 → 워커가 바로 요청을 받을 수 있음
+# - SELECT 1이 성공할 때까지 지수 백오프(+지터)로 재시도. 실패해도 프로세스를 종료하지 않음
+# - 연결되면 (OCEAN_DB_CREATE_ALL=1일 때만) 스키마 생성 후 준비 완료 → /readyz가 200
+# 운영에서는 OCEAN_DB_CREATE_ALL=0 으로 두고 배포 시 `python -m database.init_db`로 한 번만 실행
+# ---------------------------------------------------------------------
+
+CONNECT_INITIAL_BACKOFF = float(os.getenv("OCEAN_DB_CONNECT_INITIAL_BACKOFF", "0.5"))
+CONNECT_MAX_BACKOFF = float(os.getenv("OCEAN_DB_CONNECT_MAX_BACKOFF", "30"))
+CREATE_ALL_ON_START = os.getenv("OCEAN_DB_CREATE_ALL", "1") == "1"
+
+
+class DatabaseState:
+    def __init__(self):
+        self.ready = False
+        self.attempts = 0
+        self.last_error = None
+        self.ready_seconds = None  # 초기화 시작부터 준비 완료까지
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "ready_seconds": self.ready_seconds,
+        }
+
+
+db_state = DatabaseState()
+
+
+def _ping(engine):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+async def wait_for_database(engine, async_engine=None,
+                            initial_backoff: float = CONNECT_INITIAL_BACKOFF,
+                            max_backoff: float = CONNECT_MAX_BACKOFF):
+    """프라이머리(와 async 엔진)에 연결될 때까지 재시도합니다. 이벤트 루프는 막지 않습니다."""
+    backoff = initial_backoff
+    while True:
+        db_state.attempts += 1
+        try:
+            await asyncio.to_thread(_ping, engine)
+            if async_engine is not None:
+                await greenlet_spawn(_ping, async_engine.sync_engine)
+            print("DB 연결 성공")
+            db_state.last_error = None
+            return
+        except Exception as e:
+            db_state.last_error = type(e).__name__
+            print(f"DB 연결 실패 ({db_state.attempts}회, {backoff:.1f}초 후 재시도):", e)
+        # 여러 워커가 같은 간격으로 몰리지 않도록 지터
+        await asyncio.sleep(backoff * random.uniform(0.5, 1.0))
+        backoff = min(backoff * 2, max_backoff)
+
+
+async def initialize_database(engine, async_engine=None, create_all: bool = CREATE_ALL_ON_START):
+    """연결 확인 → (선택) 스키마 생성 → 준비 완료. main.py의 lifespan에서 태스크로 띄웁니다."""
+    started = time.perf_counter()
+    await wait_for_database(engine, async_engine)
+    if create_all:
+        from database.init_db import create_schema
+
+        await asyncio.to_thread(create_schema, engine)
+    db_state.ready_seconds = round(time.perf_counter() - started, 3)
+    db_state.ready = True
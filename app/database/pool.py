@@ -0,0 +1,190 @@
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.util import greenlet_spawn
+from sqlalchemy.util import queue as sqla_queue
+import asyncio
+import contextlib
+import os
+import time
+
+from database.instrumentation import current_trace
+
+# ---------------------------------------------------------------------
+# 커넥션 풀 설정 / 지표 / 유휴 관리
+# - 설정은 환경변수 (OCEAN_DB_POOL_*)
+# - 생존 확인: 매 체크아웃마다 SELECT 1 대신, N초 이상 쉬었던 커넥션만 ping
+# - 유휴 축소: 오래 쓰이지 않은 커넥션을 닫아 min_idle까지 줄임 (LIFO라 덜 쓰이는 커넥션이 밑에 쌓임)
+# ---------------------------------------------------------------------
+
+POOL_SIZE = int(os.getenv("OCEAN_DB_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("OCEAN_DB_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT = float(os.getenv("OCEAN_DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("OCEAN_DB_POOL_RECYCLE", "3600"))
+# 0: 매 체크아웃마다 ping (pool_pre_ping), 음수: ping 안 함
+PING_IDLE_SECONDS = float(os.getenv("OCEAN_DB_PING_IDLE_SECONDS", "30"))
+# 0이면 축소하지 않음
+POOL_IDLE_SECONDS = float(os.getenv("OCEAN_DB_POOL_IDLE_SECONDS", "300"))
+POOL_MIN_IDLE = int(os.getenv("OCEAN_DB_POOL_MIN_IDLE", "2"))
+
+_IDLE_SINCE = "ocean_idle_since"
+
+
+def pool_options(poolclass) -> dict:
+    """create_engine / create_async_engine에 넘길 풀 옵션"""
+    return {
+        "poolclass": poolclass,
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": PING_IDLE_SECONDS == 0,
+        "pool_use_lifo": True,
+    }
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_seconds = 0.0
+        self.timeouts = 0
+        self.pings = 0
+        self.ping_failures = 0
+        self.shrunk = 0
+
+
+class _MonitoredPoolMixin:
+    """체크아웃 대기 시간/타임아웃을 집계하고 유휴 커넥션 축소를 지원하는 QueuePool"""
+
+    @property
+    def stats(self) -> PoolStats:
+        stats = self.__dict__.get("_ocean_stats")
+        if stats is None:
+            stats = self._ocean_stats = PoolStats()
+        return stats
+
+    def connect(self):
+        # 큐 대기 + (필요 시) 새 연결 + 생존 확인까지, 사용할 수 있는 커넥션을 얻는 데 걸린 시간
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stats.checkouts += 1
+            self.stats.checkout_seconds += elapsed
+            trace = current_trace()
+            if trace is not None:
+                trace.pool_wait_seconds += elapsed
+
+    def recreate(self):
+        # dispose() 후에도 누적 지표 유지
+        pool = super().recreate()
+        pool._ocean_stats = self.stats
+        return pool
+
+    def shrink_idle(self, idle_seconds: float = POOL_IDLE_SECONDS, min_idle: int = POOL_MIN_IDLE) -> int:
+        """idle_seconds 이상 쓰이지 않은 유휴 커넥션을 min_idle개만 남기고 닫습니다."""
+        if idle_seconds <= 0:
+            return 0
+        # QueuePool에는 유휴 커넥션 일부만 닫는 공개 API가 없음 (dispose()/recreate()는 min_idle까지 모두 닫음)
+        # → 유휴 큐에서 꺼내 고르고 되돌리는 동안 큐 잠금을 잡아, 그 사이 체크아웃이 빈 큐를 보고
+        #   새 연결을 만들거나 반납이 자리를 차지하지 않도록 함.
+        #   (async 풀의 큐는 잠금이 없지만 이벤트 루프에서 await 없이 실행되어 끼어들 수 없음)
+        queue = self._pool
+        with getattr(queue, "mutex", None) or contextlib.nullcontext():
+            idle = []
+            while True:
+                try:
+                    idle.append(queue.get(False))  # LIFO: 최근에 반납된 것부터
+                except sqla_queue.Empty:
+                    break
+            now = time.monotonic()
+            keep, expired = [], []
+            for record in idle:
+                if len(keep) < min_idle or now - record.info.get(_IDLE_SINCE, now) < idle_seconds:
+                    keep.append(record)
+                else:
+                    expired.append(record)
+            for record in reversed(keep):
+                queue.put(record, False)
+        # 닫기(I/O)는 잠금 밖에서. 닫은 뒤에 overflow를 줄여 DB 연결 수가 한도를 넘지 않도록
+        for record in expired:
+            try:
+                record.close()
+            finally:
+                self._dec_overflow()
+        self.stats.shrunk += len(expired)
+        return len(expired)
+
+
+class MonitoredQueuePool(_MonitoredPoolMixin, QueuePool):
+    pass
+
+
+class MonitoredAsyncAdaptedQueuePool(_MonitoredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def install_pool_liveness(engine, ping_idle_seconds: float = PING_IDLE_SECONDS):
+    """
+    반납 시각을 기록하고, ping_idle_seconds 이상 쉬었던 커넥션만 체크아웃 시 ping 합니다.
+    ping에 실패하면 DisconnectionError로 풀이 새 커넥션을 다시 얻습니다.
+    (async 엔진은 engine.sync_engine을 넘김)
+    """
+    dialect = engine.dialect
+
+    @event.listens_for(engine, "checkin")
+    def _mark_idle(dbapi_connection, connection_record):
+        connection_record.info[_IDLE_SINCE] = time.monotonic()
+
+    if ping_idle_seconds <= 0:
+        return  # 0이면 pool_pre_ping이 처리, 음수면 ping 안 함
+
+    @event.listens_for(engine, "checkout")
+    def _ping_if_idle(dbapi_connection, connection_record, connection_proxy):
+        idle_since = connection_record.info.pop(_IDLE_SINCE, None)
+        if idle_since is None or time.monotonic() - idle_since < ping_idle_seconds:
+            return
+        stats = engine.pool.stats
+        stats.pings += 1
+        try:
+            alive = dialect.do_ping(dbapi_connection)
+        except Exception:
+            alive = False
+        if not alive:
+            stats.ping_failures += 1
+            raise exc.DisconnectionError("유휴 커넥션 ping 실패")
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    stats = pool.stats
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "checkouts": stats.checkouts,
+        "checkout_seconds": stats.checkout_seconds,
+        "timeouts": stats.timeouts,
+        "pings": stats.pings,
+        "ping_failures": stats.ping_failures,
+        "shrunk": stats.shrunk,
+    }
+
+
+async def pool_maintenance(engine, async_engine=None, interval: float = 60):
+    """유휴 커넥션 축소 루프. main.py의 lifespan에서 태스크로 띄웁니다."""
+    if POOL_IDLE_SECONDS <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            # 커넥션 close는 블로킹 I/O → 동기 풀은 스레드에서, async 풀은 greenlet 안에서
+            await asyncio.to_thread(engine.pool.shrink_idle)
+            if async_engine is not None:
+                await greenlet_spawn(async_engine.sync_engine.pool.shrink_idle)
+        except Exception as e:
+            print("커넥션 풀 정리 실패:", e)
@@ -0,0 +1,157 @@
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.util import greenlet_spawn
+from starlette.requests import HTTPConnection
+from typing import List, Optional
+import asyncio
+import itertools
+import os
+import threading
+import time
+
+# ---------------------------------------------------------------------
+# 읽기 전용 복제본 라우팅
+# - GET/HEAD 요청의 세션은 건강한 복제본 하나로 읽기 (요청 안에서는 같은 복제본)
+# - 쓰기(DML/flush)와 그 외 요청, WebSocket은 항상 프라이머리
+# - 쓰기 요청이 성공하면 짧은 유효기간의 표식(쿠키 + 헤더)을 내려주고,
+#   표식이 살아 있는 동안의 GET은 프라이머리에서 읽음 (read-your-writes)
+# - 복제본은 주기적으로 SELECT 1로 확인하고, 연결 오류가 나면 즉시 제외 → 모두 빠지면 프라이머리
+# ---------------------------------------------------------------------
+
+RYW_SECONDS = float(os.getenv("OCEAN_DB_RYW_SECONDS", "5"))
+REPLICA_CHECK_SECONDS = float(os.getenv("OCEAN_DB_REPLICA_CHECK_SECONDS", "5"))
+
+RYW_COOKIE = "ocean_ryw"
+RYW_HEADER = "X-Read-Your-Writes"
+
+_READ_METHODS = ("GET", "HEAD")
+
+
+class RoutingSession(Session):
+    """read_bind가 지정되면 조회는 그 엔진으로, DML과 flush는 프라이머리(bind)로 보냅니다."""
+
+    read_bind = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.read_bind is not None and not self._flushing and not getattr(clause, "is_dml", False):
+            return self.read_bind
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+class ReplicaSet:
+    """복제본 엔진 목록과 상태. (async 복제본은 AsyncEngine.sync_engine을 보관)"""
+
+    def __init__(self, engines: List, names: List[str]):
+        self.engines = engines
+        self.names = names
+        # 첫 확인(replica_health_check) 전까지는 제외 → 그동안은 프라이머리에서 읽음
+        self.healthy = {name: False for name in names}
+        self._cycle = itertools.cycle(range(len(engines))) if engines else None
+        self._lock = threading.Lock()
+        for engine, name in zip(engines, names):
+            event.listen(engine, "handle_error", self._on_error(name))
+
+    def __bool__(self):
+        return bool(self.engines)
+
+    def pick(self):
+        """건강한 복제본을 돌아가며 반환. 없으면 None (프라이머리 사용)"""
+        with self._lock:
+            for _ in range(len(self.engines)):
+                index = next(self._cycle)
+                if self.healthy[self.names[index]]:
+                    return self.engines[index]
+        return None
+
+    def check(self):
+        """모든 복제본에 SELECT 1. (동기 엔진은 스레드에서, async는 greenlet 안에서 호출)"""
+        for engine, name in zip(self.engines, self.names):
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+                up = True
+            except Exception as e:
+                up = False
+                if self.healthy[name]:
+                    print(f"DB 복제본 제외 ({name}):", e)
+            if up and not self.healthy[name]:
+                print(f"DB 복제본 사용 ({name})")
+            self.healthy[name] = up
+
+    def _on_error(self, name: str):
+        def mark_down(context):
+            # 연결이 끊긴 경우만 (SQL 오류는 복제본 문제가 아님)
+            if context.is_disconnect or context.connection is None:
+                self.healthy[name] = False
+        return mark_down
+
+
+def replica_urls(env_name: str, hosts: List[str], url_template: str) -> List[str]:
+    """env_name(쉼표 구분 전체 URL)이 있으면 그대로, 없으면 OCEAN_DB_REPLICA_HOSTS로 URL 구성"""
+    urls = os.getenv(env_name)
+    if urls:
+        return [url.strip() for url in urls.split(",") if url.strip()]
+    return [url_template.format(host=host) for host in hosts]
+
+
+def replica_hosts() -> List[str]:
+    return [host.strip() for host in os.getenv("OCEAN_DB_REPLICA_HOSTS", "").split(",") if host.strip()]
+
+
+def recently_wrote(connection: HTTPConnection) -> bool:
+    marker = connection.cookies.get(RYW_COOKIE) or connection.headers.get(RYW_HEADER)
+    try:
+        return marker is not None and float(marker) > time.time()
+    except ValueError:
+        return False
+
+
+def read_bind_for(connection: Optional[HTTPConnection], replicas: ReplicaSet):
+    """이 요청의 조회를 보낼 복제본 엔진. 프라이머리를 써야 하면 None"""
+    if not replicas or connection is None or connection.scope["type"] != "http":
+        return None
+    if connection.scope["method"] not in _READ_METHODS or recently_wrote(connection):
+        return None
+    return replicas.pick()
+
+
+class ReadYourWritesMiddleware:
+    """쓰기 요청이 성공하면 RYW_SECONDS 동안 프라이머리에서 읽도록 표식을 내려줍니다. (순수 ASGI)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in _READ_METHODS + ("OPTIONS",):
+            return await self.app(scope, receive, send)
+
+        async def send_with_marker(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = f"{time.time() + RYW_SECONDS:.3f}"
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", (
+                    f"{RYW_COOKIE}={until}; Max-Age={int(RYW_SECONDS) or 1}; Path=/; HttpOnly; SameSite=Lax"
+                ).encode()))
+                headers.append((RYW_HEADER.lower().encode(), until.encode()))
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_marker)
+
+
+async def check_replicas(replicas: ReplicaSet, async_replicas: Optional[ReplicaSet] = None):
+    if replicas:
+        await asyncio.to_thread(replicas.check)
+    if async_replicas:
+        await greenlet_spawn(async_replicas.check)
+
+
+async def replica_health_check(replicas: ReplicaSet, async_replicas: Optional[ReplicaSet] = None,
+                               interval: float = REPLICA_CHECK_SECONDS):
+    """복제본 상태 확인 루프. main.py의 lifespan에서 태스크로 띄웁니다. (바로 첫 확인)"""
+    while True:
+        try:
+            await check_replicas(replicas, async_replicas)
+        except Exception as e:
+            print("DB 복제본 확인 실패:", e)
+        await asyncio.sleep(interval)
@@ -2,28 +2,88 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
 
-# 데이터베이스 엔진과 Base를 로드합니다.
-from database.database import engine, Base
+# 데이터베이스 엔진을 로드합니다. (연결과 테이블 생성은 lifespan에서 백그라운드로)
+import asyncio
+from contextlib import asynccontextmanager
+
+from database.database import engine, ASYNC_DB_ENABLED, async_engine, SessionLocal, replicas, async_replicas
+from database.lifecycle import db_state, initialize_database
+from database.pool import pool_maintenance
+from sqlalchemy.util import greenlet_spawn
+from database.replica import RYW_HEADER, ReadYourWritesMiddleware, replica_health_check
 
 # 라우터들을 가져옵니다.
 from route.auth import auth_router
-from route.token import router as token_router
-from route.thread import threads_router
-from route.message import router as message_router
+from route.token import router as token_router, async_router as async_token_router, jwks_router
+from route.thread import threads_router, async_threads_router
+from route.message import router as message_router, async_router as async_message_router, manager as ws_manager, chat_writer
 from route.model import model_router
-from route.user import user_router
-# 데이터베이스 테이블 생성
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI()
-
-# 라우트 등록
-app.include_router(user_router)
-app.include_router(auth_router)
-app.include_router(token_router)
-app.include_router(threads_router)
-app.include_router(message_router)
+from route.image import router as image_router, async_router as async_image_router
+from route.user import user_router, async_user_router
+from route.search import router as search_router, async_router as async_search_router
+from utils.hash_utils import password_hasher
+from utils.image_utils import thumbnailer
+from utils.serialize_utils import FAST_JSON_ENABLED
+from utils.revocation_utils import refresh_token_sweeper
+from utils.purge_utils import thread_purger
+from utils.trace_utils import SQL_TRACE_ENABLED, SQL_STATEMENTS_HEADER, SQLTraceMiddleware, route_metrics
+
+async def _start_after_db_ready():
+    # DB 연결 확인(지수 백오프) → 스키마 생성 → 만료/폐기 리프레시 토큰 정리 + 폐기 목록 워밍
+    # 삭제 요청된 스레드/탈퇴 회원 정리도 함께 (재시작 시 남은 작업부터 이어서)
+    await initialize_database(engine, async_engine)
+    await asyncio.gather(refresh_token_sweeper(SessionLocal), thread_purger(SessionLocal))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # DB를 기다리지 않고 바로 요청을 받음 (준비 여부는 /readyz)
+    tasks = [
+        asyncio.create_task(_start_after_db_ready()),
+        # 한가할 때 오래 쉬고 있는 커넥션을 닫아 풀 축소
+        asyncio.create_task(pool_maintenance(engine, async_engine)),
+    ]
+    if replicas or async_replicas:
+        # 첫 확인이 끝나기 전까지 복제본은 제외 상태 → 프라이머리에서 읽음
+        tasks.append(asyncio.create_task(replica_health_check(replicas, async_replicas)))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        password_hasher.shutdown()
+        thumbnailer.shutdown()
+        # 큐에 남은 chat 이벤트를 저장(ack 포함)한 뒤 소켓 종료
+        await chat_writer.close()
+        await ws_manager.close()
+        if async_engine is not None:
+            await async_engine.dispose()
+        for replica in async_replicas.engines:
+            await greenlet_spawn(replica.dispose)  # AsyncEngine.sync_engine
+
+# OCEAN_FAST_JSON=1이면 모든 응답을 orjson으로 직렬화
+app = FastAPI(default_response_class=ORJSONResponse if FAST_JSON_ENABLED else JSONResponse, lifespan=lifespan)
+
+# 라우트 등록 (OCEAN_DB_ASYNC=1이면 AsyncSession 기반 라우터 사용)
+if ASYNC_DB_ENABLED:
+    app.include_router(async_user_router)
+    app.include_router(auth_router)
+    app.include_router(async_token_router)
+    app.include_router(async_threads_router)
+    app.include_router(async_message_router)
+    app.include_router(async_image_router)
+    app.include_router(async_search_router)
+else:
+    app.include_router(user_router)
+    app.include_router(auth_router)
+    app.include_router(token_router)
+    app.include_router(threads_router)
+    app.include_router(message_router)
+    app.include_router(image_router)
+    app.include_router(search_router)
+app.include_router(jwks_router)
 app.include_router(model_router)
 
 # CORS 설정 (필요하다면 allow_origins를 도메인 목록으로 변경)
@@ -33,8 +93,40 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor", SQL_STATEMENTS_HEADER, "Server-Timing", RYW_HEADER],
 )
 
+# 읽기 복제본이 있으면 쓰기 성공 후 잠시 프라이머리에서 읽도록 표식 부여
+if replicas or async_replicas:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# OCEAN_SQL_TRACE=1이면 요청별 SQL 계측 (X-SQL-Statements / Server-Timing 헤더, /metrics의 라우트별 지표)
+# 엔진 리스너는 database.database에서 함께 켜집니다.
+if SQL_TRACE_ENABLED:
+    app.add_middleware(SQLTraceMiddleware)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    # 커넥션 풀 지표는 계측 설정과 무관하게 항상 노출
+    engines = {"sync": engine}
+    if async_engine is not None:
+        engines["async"] = async_engine.sync_engine
+    for prefix, replica_set in (("replica", replicas), ("async-replica", async_replicas)):
+        for name, replica in zip(replica_set.names, replica_set.engines):
+            engines[f"{prefix}:{name}"] = replica
+    return PlainTextResponse(route_metrics.render(engines, (("sync", replicas), ("async", async_replicas))), media_type="text/plain; version=0.0.4")
+
+@app.get("/healthz", include_in_schema=False)
+def healthz():
+    # 프로세스 생존 확인 (DB 상태와 무관)
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+def readyz():
+    # DB 연결(과 스키마 생성)이 끝나기 전에는 503 → 로드밸런서가 트래픽을 보내지 않음
+    status = db_state.status()
+    return JSONResponse(status, status_code=200 if db_state.ready else 503)
+
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
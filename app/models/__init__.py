@@ -1,4 +1,5 @@
 from .models import Users, RefreshToken, Thread, Message, Image
+from . import search_index  # noqa: F401  (SQLite FTS5 색인 생성 훅 등록)
 
 # 과거 코드에서 models.User를 사용해도 작동하도록 별칭 추가
 User = Users
@@ -1,6 +1,6 @@
 # app/models/models.py
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, DateTime, ForeignKey, Index, func, Enum, text, Boolean, UniqueConstraint
+from sqlalchemy import Integer, String, DateTime, ForeignKey, Index, func, Enum, text, Boolean, UniqueConstraint, and_
 from typing import List
 import datetime
 
@@ -18,28 +18,35 @@ class Users(Base):
         DateTime, default=func.now(), onupdate=func.now()
     )
 
+    # 사용자 삭제 시 토큰은 벌크 DELETE로 먼저 지우므로 컬렉션을 로딩하지 않음
     refresh_tokens: Mapped[List["RefreshToken"]] = relationship(
-        back_populates="users", cascade="all, delete"
+        back_populates="users", cascade="all, delete", passive_deletes=True
     )
     threads: Mapped[List["Thread"]] = relationship(
         back_populates="users", cascade="all, delete"
     )
     chat_theme: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=text("0"))
     dark_mode: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=text("0"))
+    # 액세스 토큰의 ver 클레임과 비교. 올리면 이미 발급된 액세스 토큰이 모두 무효화됨
+    token_version: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    # 탈퇴 시각. 스레드 정리가 끝나면 utils/purge_utils.py가 행을 삭제
+    deleted_at: Mapped[datetime.datetime | None] = mapped_column(DateTime, nullable=True)
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
     __table_args__ = (
         Index("idx_rt_user", "user_id"),
-        Index("idx_rt_revoked_expires", "revoked", "expires_at"),
-        Index("idx_refresh_token_id", "user_id"),
+        # 정리 작업용: 만료된 행 (폐기/회전된 행도 만료까지 보존 → 재사용 탐지)
+        Index("idx_rt_expires", "expires_at"),
+        # 재사용 탐지 시 패밀리 전체 폐기
+        Index("idx_rt_family", "family_id"),
         UniqueConstraint("token_hash", name="uq_refresh_tokens_token_hash"),
     )
 
     refresh_token_id: Mapped[int] = mapped_column(
         Integer, primary_key=True, autoincrement=True
     )
-    token_hash: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+    token_hash: Mapped[str] = mapped_column(String(64), nullable=False)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.user_id"), nullable=False)
     created_at: Mapped[datetime.datetime] = mapped_column(
         DateTime, server_default=func.now(), nullable=False
@@ -48,31 +55,66 @@ class RefreshToken(Base):
     last_used_at: Mapped[datetime.datetime | None] = mapped_column(DateTime, nullable=True)
     revoked: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=text("0"))
     replaced_by: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # 한 번의 로그인에서 회전으로 이어지는 토큰 묶음과 그 안에서의 순번
+    family_id: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    generation: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
 
     users: Mapped["Users"] = relationship(back_populates="refresh_tokens")
 
 class Thread(Base):
     __tablename__ = "threads"
-    __table_args__ = (Index("thread_user_id", "user_id"),)
+    __table_args__ = (
+        # 목록 키셋 페이지네이션 (WHERE user_id = ? AND thread_id < ? ORDER BY thread_id DESC)
+        Index("ix_threads_user_thread", "user_id", "thread_id"),
+        # 최근 활동 순 목록 (WHERE user_id = ? ORDER BY last_activity_at DESC, thread_id DESC)
+        Index("ix_threads_user_activity", "user_id", "last_activity_at", "thread_id"),
+        # 삭제 대기(숨김) 스레드 찾기 (utils/purge_utils.py)
+        Index("ix_threads_deleted_at", "deleted_at"),
+        # 제목 검색 (MySQL 전문 검색, 한국어는 ngram 파서). SQLite는 models/search_index.py의 FTS5
+        Index("ft_threads_title", "thread_title", mysql_prefix="FULLTEXT", mysql_with_parser="ngram").ddl_if(dialect="mysql"),
+    )
 
     thread_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     thread_title: Mapped[str] = mapped_column(String(100), nullable=False)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.user_id"), nullable=False)
     created_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=func.now())
+    # 삭제 요청 시각. 값이 있으면 어디에서도 보이지 않고, 백그라운드 정리 후 행이 삭제됨
+    deleted_at: Mapped[datetime.datetime | None] = mapped_column(DateTime, nullable=True)
+    # 목록 화면용 요약 (메시지 저장과 같은 트랜잭션에서 갱신, utils/thread_summary_utils.py)
+    last_message_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    last_message_preview: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    message_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default=text("0"))
+    # 항상 DB 시계(func.now(), 초 단위)로 기록 → 키셋 커서 비교 기준 (route/thread.py)
+    last_activity_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime, nullable=False, default=func.now(), server_default=func.now()
+    )
 
     users: Mapped["Users"] = relationship(back_populates="threads")
     messages: Mapped[List["Message"]] = relationship(
         back_populates="thread", cascade="all, delete, delete-orphan"
     )
 
+    @classmethod
+    def owned_by(cls, user_id: int):
+        """소유권 조건. 삭제 대기 중인 스레드는 제외합니다."""
+        return and_(cls.user_id == user_id, cls.deleted_at.is_(None))
+
 class Message(Base):
     __tablename__ = "messages"
-    __table_args__ = (Index("message_thread_id", "thread_id"),)
+    __table_args__ = (
+        # 목록 키셋 페이지네이션 (WHERE thread_id = ? AND message_id < ? ORDER BY message_id DESC)
+        Index("ix_messages_thread_message", "thread_id", "message_id"),
+        # 클라이언트 재전송 중복 방지 (NULL은 중복 허용)
+        UniqueConstraint("thread_id", "client_message_id", name="uq_messages_thread_client_message_id"),
+        # 본문 검색 (InnoDB가 INSERT/DELETE마다 색인을 갱신, 재구축 없음)
+        Index("ft_messages_content", "content", mysql_prefix="FULLTEXT", mysql_with_parser="ngram").ddl_if(dialect="mysql"),
+    )
 
     message_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     thread_id: Mapped[int] = mapped_column(Integer, ForeignKey("threads.thread_id"))
     sender_type: Mapped[str] = mapped_column(Enum("user", "assistant"), nullable=False)
     content: Mapped[str] = mapped_column(String(500), nullable=False)
+    client_message_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
     created_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=func.now())
 
     thread: Mapped["Thread"] = relationship(back_populates="messages")
@@ -82,12 +124,18 @@ class Message(Base):
 
 class Image(Base):
     __tablename__ = "images"
+    __table_args__ = (
+        # 같은 메시지에 같은 이미지는 한 행 (동시 업로드도 INSERT에서 걸러짐)
+        UniqueConstraint("message_id", "image_url", name="uq_images_message_url"),
+    )
 
     image_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     message_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("messages.message_id"), nullable=False
     )
     image_url: Mapped[str] = mapped_column(String(255), nullable=False)
+    # 썸네일 키 (Pillow가 없던 업로드는 NULL)
+    thumbnail_url: Mapped[str | None] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=func.now())
 
     message: Mapped["Message"] = relationship(back_populates="images")
@@ -0,0 +1,47 @@
+# app/models/search_index.py
+from sqlalchemy import event, text
+
+from database.base import Base
+
+# ---------------------------------------------------------------------
+# SQLite(개발/테스트) 전문 검색 색인
+# MySQL은 models.py의 FULLTEXT(ngram) 인덱스를 쓰고, SQLite에서는 대신 FTS5 가상 테이블을 만듭니다.
+# - external content: 본문은 원본 테이블에만 있고 FTS5에는 역색인만 저장
+# - trigram 토크나이저: 한국어처럼 띄어쓰기 단위가 아닌 부분 문자열 검색 (3글자 이상)
+# - 트리거로 INSERT/UPDATE/DELETE마다 증분 갱신 (일괄 INSERT, 정리 배치 DELETE 포함)
+# ---------------------------------------------------------------------
+
+# (FTS5 테이블, 원본 테이블, 원본 PK, 색인 컬럼)
+FTS_TABLES = (
+    ("message_fts", "messages", "message_id", "content"),
+    ("thread_fts", "threads", "thread_id", "thread_title"),
+)
+
+
+def _fts_ddl(fts: str, source: str, pk: str, col: str):
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({col}, content='{source}', content_rowid='{pk}', tokenize='trigram')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {fts}(rowid, {col}) VALUES (new.{pk}, new.{col}); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {col}) VALUES ('delete', old.{pk}, old.{col}); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {col} ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {col}) VALUES ('delete', old.{pk}, old.{col}); "
+        f"INSERT INTO {fts}(rowid, {col}) VALUES (new.{pk}, new.{col}); END",
+        # 이미 행이 있는 DB에 처음 만드는 경우 한 번 채움
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_sqlite_fts(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    for fts, source, pk, col in FTS_TABLES:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts}
+        ).first()
+        if exists:
+            continue
+        for statement in _fts_ddl(fts, source, pk, col):
+            connection.execute(text(statement))
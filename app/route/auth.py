@@ -2,56 +2,75 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 from database.database import get_db
 from schemas import UserCreate, UserResponse, Token, UserPreferenceUpdate
 from models import User
-from utils.hash_utils import get_password_hash, verify_password
+from utils.hash_utils import password_hasher
 from utils.token_utils import auth_handler, get_current_user
+from utils.cache_utils import token_cache
 
 auth_router = APIRouter(prefix="/auth", tags=["auth"])
 
 @auth_router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
+async def signup(user: UserCreate, db: Session = Depends(get_db)):
     """
     신규 회원 가입 엔드포인트.
     - 이메일 중복 검사를 수행하고
-    - 비밀번호를 해싱하여 저장합니다.
+    - 비밀번호를 해싱하여 저장합니다. (해싱은 프로세스 풀에서 수행)
     - phone_number, chat_theme, dark_mode는 선택적입니다.
     """
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await run_in_threadpool(_find_user_by_email, db, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="이미 등록된 이메일입니다.")
 
-    hashed_password = get_password_hash(user.password)
-    new_user = User(
-        username=user.username,
-        email=user.email,
-        password_hash=hashed_password,
-        chat_theme=user.chat_theme if user.chat_theme is not None else False,
-        dark_mode=user.dark_mode if user.dark_mode is not None else False,
-    )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+    hashed_password = await password_hasher.hash(user.password)
+    return await run_in_threadpool(_create_user, db, user, hashed_password)
 
 @auth_router.post("/login", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
     """
     로그인 엔드포인트.
     - form_data.username에는 이메일이 들어옵니다.
     - 비밀번호 검증 후 access/refresh 토큰을 발급합니다.
+    - 해시 설정이 바뀐 경우 같은 트랜잭션에서 비밀번호를 재해싱합니다.
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+    user = await run_in_threadpool(_find_user_by_email, db, form_data.username)
+    verified, new_hash = (False, None)
+    # 탈퇴 처리 중인 계정은 정리가 끝날 때까지 로그인 불가
+    if user and user.deleted_at is None:
+        verified, new_hash = await password_hasher.verify_and_update(form_data.password, user.password_hash)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="이메일 또는 비밀번호가 잘못되었습니다.",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = auth_handler.create_access_token(user.user_id)
+    return await run_in_threadpool(_issue_tokens, db, user, new_hash)
+
+### DB 작업 (스레드풀에서 실행) ###
+def _find_user_by_email(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+def _create_user(db: Session, user: UserCreate, hashed_password: str):
+    new_user = User(
+        username=user.username,
+        email=user.email,
+        password_hash=hashed_password,
+        chat_theme=user.chat_theme if user.chat_theme is not None else False,
+        dark_mode=user.dark_mode if user.dark_mode is not None else False,
+    )
+    db.add(new_user)
+    db.commit()
+    db.refresh(new_user)
+    return new_user
+
+def _issue_tokens(db: Session, user: User, new_hash: str | None = None):
+    if new_hash:
+        user.password_hash = new_hash
+    access_token = auth_handler.create_access_token(user.user_id, auth_handler.access_claims(user))
     refresh_token = auth_handler.create_refresh_token(user.user_id)
     auth_handler.save_token(db, user.user_id, refresh_token)
     db.commit()
@@ -72,5 +91,6 @@ def update_preference(
     if preference.dark_mode is not None:
         current_user.dark_mode = preference.dark_mode
     db.commit()
+    token_cache.invalidate_user(current_user.user_id)
     db.refresh(current_user)
     return current_user
@@ -0,0 +1,134 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+
+from database import get_db, get_async_db
+from models import Thread, Message, Image
+from utils import Principal, get_current_principal, get_current_principal_async
+from utils.cdn_utils import image_payload
+from utils.image_utils import receive_image, remove_quietly, thumbnailer
+from utils.storage_utils import image_storage
+from schemas import ImageUploadOut
+
+
+router = APIRouter(prefix="/threads", tags=["images"])
+# OCEAN_DB_ASYNC=1일 때 main.py에서 대신 등록되는 비동기 라우터
+async_router = APIRouter(prefix="/threads", tags=["images"])
+
+# ---------------------------------------------------------------------
+# REST: 메시지 이미지 업로드
+# 본문은 이미지 원본 바이트 그대로 (multipart 아님, chunked 전송 가능)
+#   PUT /threads/{thread_id}/messages/{message_id}/images   Content-Type: image/jpeg
+# - 저장 키는 내용 해시: threads/{thread_id}/{sha256}.{ext} → 같은 스레드의 같은 이미지는 한 번만 저장
+# - 새로 저장하면 201, 같은 메시지에 이미 붙어 있던 이미지면 200
+# ---------------------------------------------------------------------
+@router.put("/{thread_id}/messages/{message_id}/images",response_model=ImageUploadOut,status_code=201,operation_id="upload_image_v2",)
+async def upload_image(thread_id: int, message_id: int, request: Request, response: Response, user: Principal = Depends(get_current_principal), db: Session = Depends(get_db),):
+    # 동기 세션이므로 DB 작업은 스레드풀에서
+    return await _upload_image(request, response, user.user_id, thread_id, message_id,
+                               lambda fn, *args: run_in_threadpool(fn, db, *args))
+
+@async_router.put("/{thread_id}/messages/{message_id}/images",response_model=ImageUploadOut,status_code=201,operation_id="upload_image_v2",)
+async def upload_image_async(thread_id: int, message_id: int, request: Request, response: Response, user: Principal = Depends(get_current_principal_async), db: AsyncSession = Depends(get_async_db),):
+    return await _upload_image(request, response, user.user_id, thread_id, message_id, db.run_sync)
+
+async def _upload_image(request: Request, response: Response, user_id: int, thread_id: int, message_id: int, run):
+    # 본문을 받기 전에 권한과 처리 여유를 확인 (거절할 업로드를 끝까지 받지 않도록)
+    await run(_assert_message_owned, user_id, thread_id, message_id)
+    thumbnailer.check_capacity()
+
+    received = await receive_image(request)
+    thumb_path = None
+    try:
+        key = f"threads/{thread_id}/{received.sha256}.{received.ext}"
+        thumb_key = f"threads/{thread_id}/{received.sha256}_thumb.jpg"
+        # 원본은 썸네일 다음에 저장 → 원본이 있으면 썸네일 처리도 끝난 것
+        deduplicated = await run_in_threadpool(image_storage.exists, key)
+        if deduplicated:
+            thumbnail_key = thumb_key if await run_in_threadpool(image_storage.exists, thumb_key) else None
+        else:
+            thumb_path = await thumbnailer.make(received.path)
+            thumbnail_key = None
+            if thumb_path is not None:
+                await run_in_threadpool(image_storage.save_file, thumb_path, thumb_key, "image/jpeg")
+                thumbnail_key = thumb_key
+            await run_in_threadpool(image_storage.save_file, received.path, key, received.content_type)
+        try:
+            image, created = await run(_attach_image, user_id, thread_id, message_id, key, thumbnail_key)
+        except Exception:
+            # 이번 요청이 새로 저장한 객체는 참조하는 행이 없으면 지움 (스토리지에 고아 객체가 남지 않도록)
+            if not deduplicated and not await run(_image_referenced, thread_id, key):
+                await run_in_threadpool(image_storage.delete, key)
+                if thumbnail_key is not None:
+                    await run_in_threadpool(image_storage.delete, thumbnail_key)
+            raise
+    finally:
+        remove_quietly(received.path)
+        remove_quietly(thumb_path)
+
+    if not created:
+        response.status_code = 200
+    return {**image_payload(image), "sha256": received.sha256, "size": received.size, "deduplicated": deduplicated}
+
+def _assert_message_owned(db: Session, user_id: int, thread_id: int, message_id: int):
+    found = db.execute(
+        select(Message.message_id)
+        .join(Thread, Thread.thread_id == Message.thread_id)
+        .where(Message.message_id == message_id, Message.thread_id == thread_id, Thread.owned_by(user_id))
+    ).first()
+    # 업로드를 받는 동안 커넥션을 잡고 있지 않도록 바로 반납
+    db.rollback()
+    if not found:
+        raise HTTPException(status_code=404, detail="메시지를 찾을 수 없습니다.")
+
+def _attach_image(db: Session, user_id: int, thread_id: int, message_id: int, image_url: str, thumbnail_url: Optional[str]):
+    """
+    (이미지 행, 새로 추가했는지). 같은 메시지에 같은 이미지를 다시 올리면 기존 행
+    업로드를 받는 동안 메시지가 지워졌거나 스레드가 숨겨졌을 수 있으므로
+    INSERT ... SELECT로 소유권 확인과 저장을 한 문장에서 (0행이면 404)
+    """
+    columns = (Image.image_id, Image.image_url, Image.thumbnail_url)
+    owned_message = (
+        select(
+            Message.message_id,
+            literal(image_url, Image.image_url.type),
+            literal(thumbnail_url, Image.thumbnail_url.type),
+        )
+        .join(Thread, Thread.thread_id == Message.thread_id)
+        .where(Message.message_id == message_id, Message.thread_id == thread_id, Thread.owned_by(user_id))
+    )
+    try:
+        result = db.execute(
+            insert(Image).from_select(["message_id", "image_url", "thumbnail_url"], owned_message)
+        )
+        db.commit()
+    except IntegrityError:
+        # 재업로드/동시 업로드가 먼저 저장됨 (uq_images_message_url)
+        db.rollback()
+        existing = db.execute(
+            select(*columns)
+            .join(Message, Message.message_id == Image.message_id)
+            .join(Thread, Thread.thread_id == Message.thread_id)
+            .where(Image.message_id == message_id, Image.image_url == image_url, Thread.owned_by(user_id))
+        ).first()
+        if existing is None:
+            raise HTTPException(status_code=404, detail="메시지를 찾을 수 없습니다.")
+        return existing, False
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="메시지를 찾을 수 없습니다.")
+    return db.execute(select(*columns).where(Image.image_id == result.lastrowid)).first(), True
+
+def _image_referenced(db: Session, thread_id: int, image_url: str) -> bool:
+    # 저장 키는 스레드 단위이므로 그 스레드의 메시지만 봄 (ix_messages_thread_message → images.message_id)
+    found = db.execute(
+        select(Image.image_id)
+        .join(Message, Message.message_id == Image.message_id)
+        .where(Message.thread_id == thread_id, Image.image_url == image_url)
+        .limit(1)
+    ).first()
+    db.rollback()
+    return found is not None
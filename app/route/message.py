@@ -1,83 +1,403 @@
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Query
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Query, Response
+from sqlalchemy import and_, insert, literal, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
 from typing import List, Optional
 import json
+import uuid
 
-from database import get_db
-from models import Thread, Message, Users
-from utils import get_current_user, WSConnectionManager, authenticate_websocket, own_thread
-from schemas import MessageOut, MessageCreate
+from database import get_db, get_async_db
+from database.database import SessionLocal, AsyncSessionLocal
+from models import Thread, Message, Image
+from utils import Principal, get_current_principal, get_current_principal_async, WSConnectionManager, authenticate_websocket, recent_messages
+from utils.cdn_utils import image_payload
+from utils.cursor_utils import encode_cursor, decode_cursor, apply_cursor_headers
+from utils.serialize_utils import list_response, model_fields
+from utils.thread_summary_utils import record_new_messages
+from utils.write_behind_utils import WriteBehindClosed, WriteBehindQueue
+from schemas import MessageOut, MessageWithImagesOut, MessageCreate, MessageBulkCreate, MessageBulkResponse
 
 
 router = APIRouter(prefix="/threads", tags=["messages"])
+# OCEAN_DB_ASYNC=1일 때 main.py에서 대신 등록되는 비동기 라우터
+async_router = APIRouter(prefix="/threads", tags=["messages"])
+
+MESSAGE_OUT_FIELDS = model_fields(MessageOut)
+MESSAGE_PAGE_FIELDS = model_fields(MessageWithImagesOut)
+# 목록/단건 조회는 엔티티 대신 필요한 컬럼만 가져옵니다. (identity map/관계 로딩 없음)
+MESSAGE_OUT_COLUMNS = (
+    Message.message_id,
+    Message.thread_id,
+    Message.sender_type,
+    Message.content,
+    Message.client_message_id,
+    Message.created_at,
+)
 
 # ---------------------------------------------------------------------
 # REST: 목록 조회 (온디바이스 구조 - 서버는 저장/조회 전용)
 # ---------------------------------------------------------------------
-@router.get("/{thread_id}/messages",response_model=List[MessageOut],operation_id="list_messages_v2",)
-def list_messages(thread: Thread = Depends(own_thread), db: Session = Depends(get_db), limit: int = Query(50, ge=1, le=200), before_id: Optional[int] = None,):
-    q = db.query(Message).filter(Message.thread_id == thread.thread_id)
-    if before_id is not None:
-        q = q.filter(Message.message_id < before_id)
-    rows = q.order_by(Message.message_id.desc()).limit(limit).all()
-    return list(reversed(rows))  # 최신이 위로 쌓이지만 클라 편의를 위해 역순 반환
+# 소유권 확인은 별도 쿼리 없이 threads 조인으로 함께 처리합니다. (결과가 없으면 404)
+@router.get("/{thread_id}/messages",response_model=List[MessageWithImagesOut],operation_id="list_messages_v2",)
+def list_messages(thread_id: int, response: Response, user: Principal = Depends(get_current_principal), db: Session = Depends(get_db), limit: int = Query(50, ge=1, le=200), before_id: Optional[int] = None,
+                  cursor: Optional[str] = Query(None, description="X-Next-Cursor/X-Prev-Cursor 헤더로 받은 커서"),):
+    page, next_cursor, prev_cursor = _list_message_page(db, user.user_id, thread_id, limit, before_id, cursor)
+    apply_cursor_headers(response, next_cursor, prev_cursor)
+    return list_response(page, MESSAGE_PAGE_FIELDS, response)
+
+@async_router.get("/{thread_id}/messages",response_model=List[MessageWithImagesOut],operation_id="list_messages_v2",)
+async def list_messages_async(thread_id: int, response: Response, user: Principal = Depends(get_current_principal_async), db: AsyncSession = Depends(get_async_db), limit: int = Query(50, ge=1, le=200), before_id: Optional[int] = None,
+                              cursor: Optional[str] = Query(None, description="X-Next-Cursor/X-Prev-Cursor 헤더로 받은 커서"),):
+    page, next_cursor, prev_cursor = await db.run_sync(_list_message_page, user.user_id, thread_id, limit, before_id, cursor)
+    apply_cursor_headers(response, next_cursor, prev_cursor)
+    return list_response(page, MESSAGE_PAGE_FIELDS, response)
 
 @router.get("/{thread_id}/messages/{message_id}",response_model=MessageOut,operation_id="get_message_v2",)
-def get_message(thread: Thread = Depends(own_thread), message_id: int = 0, db: Session = Depends(get_db),):
-    row = (db.query(Message).filter(Message.thread_id == thread.thread_id, Message.message_id == message_id).first())
+def get_message(thread_id: int, message_id: int, user: Principal = Depends(get_current_principal), db: Session = Depends(get_db),):
+    return _get_message(db, user.user_id, thread_id, message_id)
+
+@async_router.get("/{thread_id}/messages/{message_id}",response_model=MessageOut,operation_id="get_message_v2",)
+async def get_message_async(thread_id: int, message_id: int, user: Principal = Depends(get_current_principal_async), db: AsyncSession = Depends(get_async_db),):
+    return await db.run_sync(_get_message, user.user_id, thread_id, message_id)
+
+@router.post("/{thread_id}/messages",response_model=MessageOut,operation_id="create_message_v2",)
+def create_message(thread_id: int, body: MessageCreate, user: Principal = Depends(get_current_principal), db: Session = Depends(get_db),):
+    return _create_message(db, user.user_id, thread_id, body)
+
+@async_router.post("/{thread_id}/messages",response_model=MessageOut,operation_id="create_message_v2",)
+async def create_message_async(thread_id: int, body: MessageCreate, user: Principal = Depends(get_current_principal_async), db: AsyncSession = Depends(get_async_db),):
+    return await db.run_sync(_create_message, user.user_id, thread_id, body)
+
+# ---------------------------------------------------------------------
+# REST: 오프라인 큐 일괄 업로드 (재접속 시 한 번에 동기화)
+# ---------------------------------------------------------------------
+@router.post("/messages/bulk",response_model=MessageBulkResponse,operation_id="bulk_create_messages_v2",)
+def bulk_create_messages(body: MessageBulkCreate, user: Principal = Depends(get_current_principal), db: Session = Depends(get_db),):
+    return _bulk_create_messages(db, user.user_id, body)
+
+@async_router.post("/messages/bulk",response_model=MessageBulkResponse,operation_id="bulk_create_messages_v2",)
+async def bulk_create_messages_async(body: MessageBulkCreate, user: Principal = Depends(get_current_principal_async), db: AsyncSession = Depends(get_async_db),):
+    return await db.run_sync(_bulk_create_messages, user.user_id, body)
+
+# ---------------------------------------------------------------------
+# DB 작업 (sync/async 공용 - async 라우터는 run_sync로 실행)
+# ---------------------------------------------------------------------
+def _owned_thread_messages(user_id: int, thread_id: int, *conditions):
+    # threads LEFT JOIN messages: 소유하지 않은 스레드면 0행, 빈 스레드면 메시지 컬럼이 NULL인 1행
+    return (
+        select(*MESSAGE_OUT_COLUMNS)
+        .select_from(Thread)
+        .outerjoin(Message, and_(Message.thread_id == Thread.thread_id, *conditions))
+        .where(Thread.thread_id == thread_id, Thread.owned_by(user_id))
+    )
+
+def _list_messages(db: Session, user_id: int, thread_id: int, limit: int, before_id: Optional[int], cursor: Optional[str] = None):
+    # 키셋 페이지네이션: (thread_id, message_id) 인덱스만 타고, 응답은 항상 오래된 순
+    # 소유권 확인까지 한 번의 쿼리. 반환: (rows, 더 오래된 페이지 커서, 더 최신 페이지 커서)
+    scope = f"m:{thread_id}"
+    boundary, direction = before_id, "before"
+    if cursor:
+        boundary, direction = decode_cursor(cursor, scope)
+
+    if direction == "after":
+        q = _owned_thread_messages(user_id, thread_id, Message.message_id > boundary)
+        rows = _owned_rows(db.execute(q.order_by(Message.message_id.asc()).limit(limit + 1)).all())
+        rows = rows[:limit]
+        next_cursor = encode_cursor(scope, rows[0].message_id, "before") if rows else None
+    else:
+        conditions = (Message.message_id < boundary,) if boundary is not None else ()
+        q = _owned_thread_messages(user_id, thread_id, *conditions)
+        # 최신 N개를 고른 뒤 정렬 뒤집기는 DB에서 (파이썬 reversed 제거)
+        page = q.order_by(Message.message_id.desc()).limit(limit + 1).subquery()
+        rows = _owned_rows(db.execute(select(*page.c).order_by(page.c.message_id.asc())).all())
+        has_older = len(rows) > limit
+        if has_older:
+            rows = rows[1:]
+        next_cursor = encode_cursor(scope, rows[0].message_id, "before") if has_older else None
+
+    # 최신 쪽 커서는 빈 페이지여도 유지 (새 메시지 폴링용)
+    if rows:
+        prev_cursor = encode_cursor(scope, rows[-1].message_id, "after")
+    else:
+        prev_cursor = cursor if direction == "after" else None
+    return rows, next_cursor, prev_cursor
+
+def _list_message_page(db: Session, user_id: int, thread_id: int, limit: int, before_id: Optional[int], cursor: Optional[str] = None):
+    rows, next_cursor, prev_cursor = _list_messages(db, user_id, thread_id, limit, before_id, cursor)
+    return _with_images(db, rows), next_cursor, prev_cursor
+
+def _with_images(db: Session, rows) -> List[dict]:
+    # 페이지의 이미지는 IN 한 번으로 (selectinload와 같은 쿼리, 메시지마다 message.images를 읽는 N+1 없음)
+    page = [{field: getattr(row, field) for field in MESSAGE_OUT_FIELDS} for row in rows]
+    if not page:
+        return page
+    by_message = {}
+    for item in page:
+        item["images"] = []
+        by_message[item["message_id"]] = item["images"]
+    images = db.execute(
+        select(Image.message_id, Image.image_id, Image.image_url, Image.thumbnail_url)
+        .where(Image.message_id.in_(by_message))
+        .order_by(Image.image_id)
+    )
+    for image in images:
+        by_message[image.message_id].append(image_payload(image))
+    return page
+
+def _owned_rows(rows):
+    if not rows:
+        raise HTTPException(status_code=404, detail="스레드를 찾을 수 없거나 권한이 없습니다.")
+    return [row for row in rows if row.message_id is not None]
+
+def _get_message(db: Session, user_id: int, thread_id: int, message_id: int):
+    row = db.execute(
+        select(*MESSAGE_OUT_COLUMNS)
+        .join(Thread, Thread.thread_id == Message.thread_id)
+        .where(Message.thread_id == thread_id, Message.message_id == message_id, Thread.owned_by(user_id))
+    ).first()
     if not row:
         raise HTTPException(status_code=404, detail="메시지를 찾을 수 없습니다.")
     return row
 
-@router.post("/{thread_id}/messages",response_model=MessageOut,operation_id="create_message_v2",)
-def create_message(body: MessageCreate, thread: Thread = Depends(own_thread), user: Users = Depends(get_current_user), db: Session = Depends(get_db),):
+def _create_message(db: Session, user_id: int, thread_id: int, body: MessageCreate):
     # 서버는 모델 호출을 하지 않음. 단순히 저장만.
-    row = Message(thread_id=thread.thread_id, user_id=user.user_id if body.role == "user" else thread.user_id, role=body.role,
-        content=body.content, client_message_id=getattr(body, "client_message_id", None), meta=getattr(body, "meta", None),)
-    db.add(row)
-    db.commit()
-    db.refresh(row)
-    return row
+    key = (user_id, thread_id, body.client_message_id)
+    if body.client_message_id:
+        # 짧은 간격의 재전송이면 DB 없이 기존 결과 반환
+        cached = recent_messages.get(key)
+        if cached is not None:
+            return cached
+
+    # INSERT ... SELECT FROM threads WHERE 소유자: 소유권 확인과 저장이 한 문장 (0행이면 404)
+    owned_thread = select(
+        Thread.thread_id,
+        literal(body.sender_type, Message.sender_type.type),
+        literal(body.content, Message.content.type),
+        literal(body.client_message_id, Message.client_message_id.type),
+    ).where(Thread.thread_id == thread_id, Thread.owned_by(user_id))
+    try:
+        result = db.execute(
+            insert(Message).from_select(["thread_id", "sender_type", "content", "client_message_id"], owned_thread)
+        )
+        if result.rowcount:
+            # 스레드 목록 요약도 같은 트랜잭션에서
+            record_new_messages(db, [(thread_id, result.lastrowid, body.content)])
+        db.commit()
+    except IntegrityError:
+        # 재전송/동시 재전송이 먼저 저장됨 (uq_messages_thread_client_message_id)
+        db.rollback()
+        existing = _owned_message_by_client_id(db, *key) if body.client_message_id else None
+        if existing is None:
+            raise
+        return _remember_message(user_id, existing)
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="스레드를 찾을 수 없거나 권한이 없습니다.")
+
+    row = db.execute(select(*MESSAGE_OUT_COLUMNS).where(Message.message_id == result.lastrowid)).first()
+    return _remember_message(user_id, row) if body.client_message_id else row
+
+def _owned_message_by_client_id(db: Session, user_id: int, thread_id: int, client_message_id: str):
+    return db.execute(
+        select(*MESSAGE_OUT_COLUMNS)
+        .join(Thread, Thread.thread_id == Message.thread_id)
+        .where(Message.thread_id == thread_id, Message.client_message_id == client_message_id, Thread.owned_by(user_id))
+    ).first()
+
+def _remember_message(user_id: int, row) -> dict:
+    # 캐시 키에 user_id를 포함해 다른 사용자의 스레드로 보낸 요청에는 재사용되지 않도록 함
+    snapshot = {field: getattr(row, field) for field in MESSAGE_OUT_FIELDS}
+    recent_messages.set((user_id, row.thread_id, row.client_message_id), snapshot)
+    return snapshot
+
+def _bulk_create_messages(db: Session, user_id: int, body: MessageBulkCreate):
+    items = body.items
+    thread_ids = {item.thread_id for item in items}
+
+    # 소유권 확인: 스레드 개수와 무관하게 한 번의 쿼리
+    owned = set(db.scalars(select(Thread.thread_id).where(Thread.owned_by(user_id), Thread.thread_id.in_(thread_ids))))
+    if owned != thread_ids:
+        raise HTTPException(status_code=404, detail="스레드를 찾을 수 없거나 권한이 없습니다.")
+
+    rows = [_message_row(item.thread_id, item) for item in items]
+    stored, created = _store_messages(db, rows)
+    return {
+        "created": created,
+        "duplicates": len(items) - created,
+        "messages": [_remember_message(user_id, stored[(row["thread_id"], row["client_message_id"])]) for row in rows],
+    }
+
+def _message_row(thread_id: int, body: MessageCreate) -> dict:
+    # client_message_id가 없는 항목은 서버에서 부여 (삽입 후 한 번에 다시 조회하기 위함)
+    return {
+        "thread_id": thread_id,
+        "sender_type": body.sender_type,
+        "content": body.content,
+        "client_message_id": body.client_message_id or uuid.uuid4().hex,
+    }
+
+def _store_messages(db: Session, rows: List[dict]):
+    """
+    이미 저장된 (thread_id, client_message_id)는 건너뛰고 나머지를 다중 행 INSERT 한 번으로 저장합니다.
+    스레드 목록 요약(utils/thread_summary_utils.py)도 같은 트랜잭션에서 갱신합니다.
+    반환: ({(thread_id, client_message_id): Message}, 새로 저장한 수)
+    """
+    keys = [(row["thread_id"], row["client_message_id"]) for row in rows]
+    for attempt in range(2):
+        seen = set(_messages_by_client_id(db, keys))
+        new_rows = []
+        for row, key in zip(rows, keys):
+            if key in seen:
+                continue
+            seen.add(key)
+            new_rows.append(row)
+        try:
+            if new_rows:
+                db.execute(insert(Message), new_rows)  # 다중 행 INSERT
+                # 다중 행 INSERT는 id를 돌려주지 않으므로 커밋 전에 같은 트랜잭션에서 조회
+                new_keys = {(row["thread_id"], row["client_message_id"]) for row in new_rows}
+                inserted = db.execute(
+                    select(Message.thread_id, Message.client_message_id, Message.message_id, Message.content).where(
+                        Message.thread_id.in_({thread_id for thread_id, _ in new_keys}),
+                        Message.client_message_id.in_({client_id for _, client_id in new_keys}),
+                    )
+                )
+                record_new_messages(db, [
+                    (thread_id, message_id, content) for thread_id, client_id, message_id, content in inserted
+                    if (thread_id, client_id) in new_keys
+                ])
+            db.commit()
+            break
+        except IntegrityError:
+            # 같은 항목을 동시에 재전송한 요청과 경합 → 중복 확인부터 다시
+            db.rollback()
+            if attempt:
+                raise HTTPException(status_code=409, detail="동시에 같은 메시지가 전송되었습니다. 다시 시도해주세요.")
+    return _messages_by_client_id(db, keys), len(new_rows)
+
+def _messages_by_client_id(db: Session, keys):
+    thread_ids = {thread_id for thread_id, _ in keys}
+    client_ids = {client_id for _, client_id in keys}
+    rows = db.scalars(
+        select(Message).where(Message.thread_id.in_(thread_ids), Message.client_message_id.in_(client_ids))
+    )
+    return {(row.thread_id, row.client_message_id): row for row in rows}
+
+def _persist_chat_batch(db: Session, items) -> list:
+    """
+    WebSocket chat 이벤트 배치 저장 (write-behind 큐에서 스레드풀로 호출).
+    items: [(user_id, thread_id, MessageCreate)] - 여러 사용자/스레드가 섞여 있음
+    반환: 항목별 메시지 스냅샷, 스레드가 삭제되었거나 권한이 없으면 HTTPException(404)
+    """
+    thread_ids = {thread_id for _, thread_id, _ in items}
+    owners = dict(db.execute(
+        select(Thread.thread_id, Thread.user_id).where(Thread.thread_id.in_(thread_ids), Thread.deleted_at.is_(None))
+    ).all())
+    rows = [_message_row(thread_id, body) for _, thread_id, body in items]
+    owned_rows = [row for (user_id, thread_id, _), row in zip(items, rows) if owners.get(thread_id) == user_id]
+    stored, _ = _store_messages(db, owned_rows) if owned_rows else ({}, 0)
+
+    results = []
+    for (user_id, thread_id, _), row in zip(items, rows):
+        if owners.get(thread_id) != user_id:
+            results.append(HTTPException(status_code=404, detail="스레드를 찾을 수 없거나 권한이 없습니다."))
+        else:
+            results.append(_remember_message(user_id, stored[(thread_id, row["client_message_id"])]))
+    return results
 
 # ---------------------------------------------------------------------
 # WebSocket: 실시간 이벤트 브로드캐스트 (chat/typing/read/system)
+# chat 이벤트는 브로드캐스트와 별개로 write-behind 큐로 저장하고, 저장되면 보낸 소켓에 ack
+#   {"type": "ack", "client_message_id": ..., "message_id": ..., "created_at": ...}
+# (배치 크기/주기: WS_PERSIST_BATCH_SIZE, WS_PERSIST_BATCH_MS)
 # ---------------------------------------------------------------------
 manager = WSConnectionManager()
+chat_writer = WriteBehindQueue(_persist_chat_batch, SessionLocal)
+# messages.content 컬럼 길이. MessageCreate는 더 긴 내용도 받으므로 큐에 넣기 전에 거절
+# (MySQL strict 모드에서 DataError → 배치를 항목별로 다시 저장하게 만듦)
+CHAT_CONTENT_MAX_LENGTH = Message.content.type.length
 
+# 인증은 짧은 세션에서 끝내고 바로 반납 (Depends(get_db)는 소켓이 닫힐 때까지 풀 커넥션을 잡음)
+# 접속 중에는 커넥션을 들고 있지 않고, chat 저장은 write-behind 큐가 배치마다 세션을 엽니다.
 @router.websocket("/ws/{thread_id}")
-async def ws_chat(websocket: WebSocket, thread_id: int, db: Session = Depends(get_db)):
+async def ws_chat(websocket: WebSocket, thread_id: int):
     # 클라이언트는 ws://.../threads/ws/{thread_id}?token=JWT 로 접속
-    user_id = await authenticate_websocket(websocket, db, thread_id)
+    with SessionLocal() as db:
+        user_id = await authenticate_websocket(websocket, db, thread_id)
+    await _ws_session(websocket, thread_id, user_id)
+
+@async_router.websocket("/ws/{thread_id}")
+async def ws_chat_async(websocket: WebSocket, thread_id: int):
+    async with AsyncSessionLocal() as db:
+        user_id = await authenticate_websocket(websocket, db, thread_id)
+    await _ws_session(websocket, thread_id, user_id)
+
+async def _ws_session(websocket: WebSocket, thread_id: int, user_id: int):
     await manager.connect(thread_id, websocket)
 
     # 참여 알림
     try:
-        await manager.broadcast(
-            thread_id,
-            json.dumps({"type": "system", "event": "joined", "user_id": user_id}),
-        )
+        await manager.broadcast(thread_id, {"type": "system", "event": "joined", "user_id": user_id})
 
         while True:
             raw = await websocket.receive_text()
             try:
                 data = json.loads(raw)
             except json.JSONDecodeError:
-                await websocket.send_text(json.dumps({"type": "error", "message": "invalid_json"}))
+                manager.send_to(thread_id, websocket, json.dumps({"type": "error", "message": "invalid_json"}))
                 continue
 
             evt_type = data.get("type")
             if evt_type not in {"chat", "typing", "read"}:
-                await websocket.send_text(json.dumps({"type": "error", "message": "unknown_type"}))
+                manager.send_to(thread_id, websocket, json.dumps({"type": "error", "message": "unknown_type"}))
+                continue
+
+            if evt_type == "chat" and not await _persist_chat(websocket, thread_id, user_id, data):
                 continue
 
-            # 그대로 브로드캐스트 (서버는 단순 중계)
-            await manager.broadcast(thread_id, json.dumps(data))
+            # 그대로 브로드캐스트 (서버는 단순 중계, 받은 JSON을 재직렬화하지 않음)
+            await manager.broadcast(thread_id, raw, kind=evt_type)
 
     except WebSocketDisconnect:
         pass
     finally:
         manager.disconnect(thread_id, websocket)
-        await manager.broadcast(
-            thread_id,
-            json.dumps({"type": "system", "event": "left", "user_id": user_id}),
-        )
+        await manager.broadcast(thread_id, {"type": "system", "event": "left", "user_id": user_id})
+
+async def _persist_chat(websocket: WebSocket, thread_id: int, user_id: int, data: dict) -> bool:
+    """chat 이벤트를 저장 큐에 넣습니다. 저장할 수 없는 이벤트면 오류를 보내고 False (브로드캐스트 안 함)"""
+    try:
+        body = MessageCreate.parse_obj(data)
+    except ValidationError:
+        manager.send_to(thread_id, websocket, json.dumps({"type": "error", "message": "invalid_chat"}))
+        return False
+    if len(body.content) > CHAT_CONTENT_MAX_LENGTH:
+        manager.send_to(thread_id, websocket, json.dumps(
+            {"type": "error", "message": "content_too_long", "client_message_id": body.client_message_id}
+        ))
+        return False
+    try:
+        # 큐가 가득 차면 이 소켓의 수신만 잠시 멈춤
+        future = await chat_writer.submit((user_id, thread_id, body))
+    except WriteBehindClosed:
+        manager.send_to(thread_id, websocket, json.dumps({"type": "error", "message": "unavailable"}))
+        return False
+    future.add_done_callback(lambda done: _ack_chat(websocket, thread_id, body.client_message_id, done))
+    return True
+
+def _ack_chat(websocket: WebSocket, thread_id: int, client_message_id: Optional[str], future):
+    if future.cancelled():
+        return
+    if future.exception() is not None:
+        manager.send_to(thread_id, websocket, json.dumps(
+            {"type": "error", "message": "persist_failed", "client_message_id": client_message_id}
+        ))
+        return
+    message = future.result()
+    manager.send_to(thread_id, websocket, json.dumps({
+        "type": "ack",
+        "client_message_id": client_message_id,
+        "message_id": message["message_id"],
+        "created_at": message["created_at"].isoformat(),
+    }), kind="ack")
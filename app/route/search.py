@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+import hashlib
+
+from database import get_db, get_async_db
+from utils import Principal, get_current_principal, get_current_principal_async
+from utils.cursor_utils import encode_rank_cursor, decode_rank_cursor, apply_cursor_headers
+from utils.search_utils import make_snippet, parse_query, ranked_search
+from utils.serialize_utils import list_response, model_fields
+from schemas import SearchHit
+
+
+router = APIRouter(prefix="/search", tags=["search"])
+# OCEAN_DB_ASYNC=1일 때 main.py에서 대신 등록되는 비동기 라우터
+async_router = APIRouter(prefix="/search", tags=["search"])
+
+SEARCH_HIT_FIELDS = model_fields(SearchHit)
+
+# ---------------------------------------------------------------------
+# REST: 자신의 메시지 본문 / 스레드 제목 검색 (관련도 순)
+#   GET /search?q=회의록 정리&type=message&limit=20
+# - 공백으로 나눈 모든 단어를 포함하는 결과만 (두 글자 이상)
+# - 다음 페이지는 X-Next-Cursor 헤더의 커서로 (같은 검색어에서만 유효)
+# ---------------------------------------------------------------------
+@router.get("", response_model=List[SearchHit])
+def search(response: Response, q: str = Query(..., min_length=1, max_length=200), kind: Literal["message", "thread"] = Query("message", alias="type"),
+           limit: int = Query(20, ge=1, le=50), cursor: Optional[str] = Query(None, description="X-Next-Cursor 헤더로 받은 커서"),
+           user: Principal = Depends(get_current_principal), db: Session = Depends(get_db),):
+    hits, next_cursor = _search(db, user.user_id, q, kind, limit, cursor)
+    apply_cursor_headers(response, next_cursor, None)
+    return list_response(hits, SEARCH_HIT_FIELDS, response)
+
+@async_router.get("", response_model=List[SearchHit])
+async def search_async(response: Response, q: str = Query(..., min_length=1, max_length=200), kind: Literal["message", "thread"] = Query("message", alias="type"),
+                       limit: int = Query(20, ge=1, le=50), cursor: Optional[str] = Query(None, description="X-Next-Cursor 헤더로 받은 커서"),
+                       user: Principal = Depends(get_current_principal_async), db: AsyncSession = Depends(get_async_db),):
+    hits, next_cursor = await db.run_sync(_search, user.user_id, q, kind, limit, cursor)
+    apply_cursor_headers(response, next_cursor, None)
+    return list_response(hits, SEARCH_HIT_FIELDS, response)
+
+
+### DB 작업 (sync/async 공용) ###
+def _search(db: Session, user_id: int, q: str, kind: str, limit: int, cursor: Optional[str]):
+    terms = parse_query(q)
+    # 커서는 사용자 + 검색 종류 + 검색어에 묶임
+    scope = f"q:{user_id}:{kind}:" + hashlib.sha256(" ".join(terms).lower().encode()).hexdigest()[:16]
+    after = decode_rank_cursor(cursor, scope) if cursor else None
+
+    rows, boundary = ranked_search(db, kind, user_id, terms, limit, after)
+    hits = []
+    for row in rows:
+        snippet, highlights = make_snippet(row.text, terms)
+        hits.append({
+            "type": kind,
+            "thread_id": row.thread_id,
+            "message_id": row.message_id,
+            "thread_title": row.thread_title,
+            "snippet": snippet,
+            "highlights": highlights,
+            "score": float(row.score),
+            "created_at": row.created_at,
+        })
+    next_cursor = encode_rank_cursor(scope, *boundary) if boundary else None
+    return hits, next_cursor
@@ -1,15 +1,29 @@
-from fastapi import APIRouter, Depends, FastAPI, Query, HTTPException
+from fastapi import APIRouter, Depends, FastAPI, Query, HTTPException, Response
+from sqlalchemy import String, and_, literal, or_, select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from models import Thread, Message, Users
-from database import get_db
-from utils import get_current_user
+from typing import List, Dict, Literal, Optional
+from models import Thread, Message
+from database import get_db, get_async_db
+from utils import Principal, get_current_principal, get_current_principal_async
+from utils.cursor_utils import encode_cursor, decode_cursor, encode_rank_cursor, decode_rank_cursor, apply_cursor_headers
+from utils.serialize_utils import list_response, model_fields
+from utils.purge_utils import hide_threads, request_purge, thread_deletion_status
 from schemas import ThreadCreate, ThreadUpdate, ThreadResponse, ThreadDetail
 import uuid
 
 
 threads_router = APIRouter(prefix="/threads", tags=["threads"])
+# OCEAN_DB_ASYNC=1일 때 main.py에서 대신 등록되는 비동기 라우터
+async_threads_router = APIRouter(prefix="/threads", tags=["threads"])
+
+THREAD_RESPONSE_FIELDS = model_fields(ThreadResponse)
+# 조회 전용 경로는 엔티티 대신 필요한 컬럼만 가져옵니다. (identity map/관계 로딩 없음)
+# 목록 화면 요약 컬럼 (메시지 저장 시 함께 갱신 → 스레드마다 메시지를 따로 조회하지 않음)
+THREAD_SUMMARY_COLUMNS = (Thread.last_message_id, Thread.last_message_preview, Thread.message_count, Thread.last_activity_at)
+THREAD_RESPONSE_COLUMNS = (Thread.thread_id, Thread.thread_title, Thread.created_at, *THREAD_SUMMARY_COLUMNS)
+THREAD_DETAIL_COLUMNS = (Thread.thread_id, Thread.thread_title, Thread.user_id, Thread.created_at, *THREAD_SUMMARY_COLUMNS)
 
 connected_clients = []
 
@@ -20,8 +34,85 @@ connected_clients = []
 
 ### 스레드 생성 ###
 @threads_router.post("/threads", response_model=ThreadDetail)
-def create_thread(body: ThreadCreate, db: Session = Depends(get_db), user: Users = Depends(get_current_user)):
-    threads = Thread(user_id=user.user_id, thread_title=body.thread_title)
+def create_thread(body: ThreadCreate, db: Session = Depends(get_db), user: Principal = Depends(get_current_principal)):
+    return _create_thread(db, user.user_id, body)
+
+@async_threads_router.post("/threads", response_model=ThreadDetail)
+async def create_thread_async(body: ThreadCreate, db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_principal_async)):
+    return await db.run_sync(_create_thread, user.user_id, body)
+
+### 스레드 리스트 및 페이지네이션 ###
+# sort=created(기본): 생성 순, sort=activity: 최근 메시지 순 (before_id/X-Prev-Cursor 없음)
+@threads_router.get("/threads", response_model=List[ThreadResponse])
+def list_threads(response: Response, db: Session=Depends(get_db), user: Principal = Depends(get_current_principal), limit: int = Query(20, ge=1, le=100), 
+                 before_id: Optional[int] = Query(None, description="스레드 ID보다 작은 스레드만 조회"),
+                 cursor: Optional[str] = Query(None, description="X-Next-Cursor/X-Prev-Cursor 헤더로 받은 커서"),
+                 sort: Literal["created", "activity"] = Query("created", description="created: 생성 순, activity: 최근 활동 순"),):
+    if sort == "activity":
+        rows, next_cursor, prev_cursor = _list_threads_by_activity(db, user.user_id, limit, cursor)
+    else:
+        rows, next_cursor, prev_cursor = _list_threads(db, user.user_id, limit, before_id, cursor)
+    apply_cursor_headers(response, next_cursor, prev_cursor)
+    return list_response(rows, THREAD_RESPONSE_FIELDS, response)
+
+@async_threads_router.get("/threads", response_model=List[ThreadResponse])
+async def list_threads_async(response: Response, db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_principal_async), limit: int = Query(20, ge=1, le=100),
+                             before_id: Optional[int] = Query(None, description="스레드 ID보다 작은 스레드만 조회"),
+                             cursor: Optional[str] = Query(None, description="X-Next-Cursor/X-Prev-Cursor 헤더로 받은 커서"),
+                             sort: Literal["created", "activity"] = Query("created", description="created: 생성 순, activity: 최근 활동 순"),):
+    if sort == "activity":
+        rows, next_cursor, prev_cursor = await db.run_sync(_list_threads_by_activity, user.user_id, limit, cursor)
+    else:
+        rows, next_cursor, prev_cursor = await db.run_sync(_list_threads, user.user_id, limit, before_id, cursor)
+    apply_cursor_headers(response, next_cursor, prev_cursor)
+    return list_response(rows, THREAD_RESPONSE_FIELDS, response)
+
+### 자신의 스레드 조회  ###
+@threads_router.get("/threads/{thread_id}", response_model=ThreadDetail)
+def get_thread(thread_id: int, db: Session = Depends(get_db), user: Principal = Depends(get_current_principal),):
+    return _get_thread(db, thread_id, user.user_id)
+
+@async_threads_router.get("/threads/{thread_id}", response_model=ThreadDetail)
+async def get_thread_async(thread_id: int, db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_principal_async),):
+    return await db.run_sync(_get_thread, thread_id, user.user_id)
+
+### 스레드 이름 수정 ###
+@threads_router.patch("/threads/{thread_id}", response_model=ThreadDetail)
+def update_thread(thread_id: int, body: ThreadUpdate, db: Session = Depends(get_db), user: Principal = Depends(get_current_principal),):
+    return _update_thread(db, thread_id, user.user_id, body)
+
+@async_threads_router.patch("/threads/{thread_id}", response_model=ThreadDetail)
+async def update_thread_async(thread_id: int, body: ThreadUpdate, db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_principal_async),):
+    return await db.run_sync(_update_thread, thread_id, user.user_id, body)
+
+### 스레드 삭제 ###
+# 바로 숨기고 202, 메시지/이미지는 백그라운드에서 나눠서 정리 (utils/purge_utils.py)
+@threads_router.delete("/threads/{thread_id}", status_code=202)
+def delete_thread(thread_id: int, db: Session = Depends(get_db), user: Principal = Depends(get_current_principal),):
+    return _delete_thread(db, thread_id, user.user_id)
+
+@async_threads_router.delete("/threads/{thread_id}", status_code=202)
+async def delete_thread_async(thread_id: int, db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_principal_async),):
+    return await db.run_sync(_delete_thread, thread_id, user.user_id)
+
+### 스레드 삭제 진행 상태 ###
+# 정리 중이면 {"status": "purging", ...}, 정리가 끝났거나 내 스레드가 아니면 404
+@threads_router.get("/threads/{thread_id}/deletion")
+def get_thread_deletion(thread_id: int, db: Session = Depends(get_db), user: Principal = Depends(get_current_principal),):
+    return _get_thread_deletion(db, thread_id, user.user_id)
+
+@async_threads_router.get("/threads/{thread_id}/deletion")
+async def get_thread_deletion_async(thread_id: int, db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_principal_async),):
+    return await db.run_sync(_get_thread_deletion, thread_id, user.user_id)
+
+
+#######################################################
+############# DB 작업 (sync/async 공용) ##############
+#######################################################
+# async 라우터는 AsyncSession.run_sync로 같은 함수를 실행합니다.
+
+def _create_thread(db: Session, user_id: int, body: ThreadCreate):
+    threads = Thread(user_id=user_id, thread_title=body.thread_title)
     try:
         db.add(threads)
         db.commit()
@@ -31,31 +122,74 @@ def create_thread(body: ThreadCreate, db: Session = Depends(get_db), user: Users
         db.rollback()
         raise HTTPException(status_code=500, detail="스레드 생성 중 오류가 발생했습니다.")
 
-### 스레드 리스트 및 페이지네이션 ###
-@threads_router.get("/threads", response_model=List[ThreadResponse])
-def list_threads(db: Session=Depends(get_db), user: Users = Depends(get_current_user), limit: int = Query(20, ge=1, le=100), 
-                 before_id: Optional[int] = Query(None, description="스레드 ID보다 작은 스레드만 조회"),):
-    
-    threads = db.query(Thread).filter(Thread.user_id == user.user_id)
-    if before_id is not None:
-        threads = threads.filter(Thread.thread_id < before_id)
+def _list_threads(db: Session, user_id: int, limit: int, before_id: Optional[int], cursor: Optional[str] = None):
+    # 키셋 페이지네이션: (user_id, thread_id) 인덱스, 응답은 항상 최신 순
+    # 반환: (rows, 더 오래된 페이지 커서, 더 최신 페이지 커서)
+    scope = f"t:{user_id}"
+    boundary, direction = before_id, "before"
+    if cursor:
+        boundary, direction = decode_cursor(cursor, scope)
 
-    rows = (
-        threads.order_by(Thread.thread_id.desc()).limit(limit).all())
-    return rows
+    threads = select(*THREAD_RESPONSE_COLUMNS).where(Thread.owned_by(user_id))
+    if direction == "after":
+        threads = threads.where(Thread.thread_id > boundary)
+        page = threads.order_by(Thread.thread_id.asc()).limit(limit + 1).subquery()
+        rows = db.execute(select(*page.c).order_by(page.c.thread_id.desc())).all()
+        if len(rows) > limit:
+            rows = rows[1:]
+        next_cursor = encode_cursor(scope, rows[-1].thread_id, "before") if rows else None
+    else:
+        if boundary is not None:
+            threads = threads.where(Thread.thread_id < boundary)
+        rows = db.execute(threads.order_by(Thread.thread_id.desc()).limit(limit + 1)).all()
+        has_older = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor(scope, rows[-1].thread_id, "before") if has_older else None
 
-### 자신의 스레드 조회  ###
-@threads_router.get("/threads/{thread_id}", response_model=ThreadDetail)
-def get_thread(thread_id: int, db: Session = Depends(get_db), user: Users = Depends(get_current_user),):
-    threads = db.query(Thread).filter(Thread.thread_id == thread_id, Thread.user_id == user.user_id).first()
+    # 최신 쪽 커서는 빈 페이지여도 유지 (새 스레드 확인용)
+    if rows:
+        prev_cursor = encode_cursor(scope, rows[0].thread_id, "after")
+    else:
+        prev_cursor = cursor if direction == "after" else None
+    return rows, next_cursor, prev_cursor
+
+def _activity_rank(value) -> str:
+    # last_activity_at은 DB 시계로 초 단위 저장 ('YYYY-MM-DD HH:MM:SS')
+    # 커서에는 같은 형식의 문자열을 담고 그대로 비교 (SQLite는 문자열 비교, MySQL은 DATETIME으로 변환)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(microsecond=0).isoformat(sep=" ")
+
+def _list_threads_by_activity(db: Session, user_id: int, limit: int, cursor: Optional[str] = None):
+    # 키셋 페이지네이션: (user_id, last_activity_at, thread_id) 인덱스, 최근 활동 순
+    # 순서가 계속 바뀌므로 더 최신 쪽 커서는 없음 (새로 고침은 첫 페이지부터)
+    scope = f"ta:{user_id}"
+    threads = select(*THREAD_RESPONSE_COLUMNS).where(Thread.owned_by(user_id))
+    if cursor:
+        rank, boundary = decode_rank_cursor(cursor, scope, cast=_activity_rank)
+        activity = literal(rank, String)
+        threads = threads.where(or_(
+            Thread.last_activity_at < activity,
+            and_(Thread.last_activity_at == activity, Thread.thread_id < boundary),
+        ))
+    rows = db.execute(
+        threads.order_by(Thread.last_activity_at.desc(), Thread.thread_id.desc()).limit(limit + 1)
+    ).all()
+    has_older = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_rank_cursor(scope, _activity_rank(rows[-1].last_activity_at), rows[-1].thread_id) if has_older else None
+    return rows, next_cursor, None
+
+def _get_thread(db: Session, thread_id: int, user_id: int):
+    threads = db.execute(
+        select(*THREAD_DETAIL_COLUMNS).where(Thread.thread_id == thread_id, Thread.owned_by(user_id))
+    ).first()
     if not threads:
         raise HTTPException(status_code=404, detail="스레드를 찾을 수 없습니다.")
     return threads
 
-### 스레드 이름 수정 ###
-@threads_router.patch("/threads/{thread_id}", response_model=ThreadDetail)
-def update_thread(thread_id: int, body: ThreadUpdate, db: Session = Depends(get_db), user: Users = Depends(get_current_user),):
-    threads = db.query(Thread).filter(Thread.thread_id == thread_id, Thread.user_id == user.user_id).first()
+def _update_thread(db: Session, thread_id: int, user_id: int, body: ThreadUpdate):
+    threads = db.query(Thread).filter(Thread.thread_id == thread_id, Thread.owned_by(user_id)).first()
     if not threads:
         raise HTTPException(status_code=404, detail="스레드를 찾을 수 없습니다.")
     
@@ -73,16 +207,23 @@ def update_thread(thread_id: int, body: ThreadUpdate, db: Session = Depends(get_
             db.rollback()
             raise HTTPException(status_code=500, detail="스레드 수정 중 오류가 발생했습니다.")
 
-### 스레드 삭제 ###
-@threads_router.delete("/threads/{thread_id}")
-def delete_thread(thread_id: int, db: Session = Depends(get_db), user: Users = Depends(get_current_user),):
-    threads = db.query(Thread).filter(Thread.thread_id == thread_id, Thread.user_id == user.user_id).first()
-    if not threads:
-        raise HTTPException(status_code=404, detail="스레드를 찾을 수 없습니다.")
+def _delete_thread(db: Session, thread_id: int, user_id: int):
     try:
-        db.delete(threads)
+        hidden = hide_threads(db, user_id, thread_id)
+        if not hidden:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="스레드를 찾을 수 없습니다.")
         db.commit()
-        return {"detail": "스레드가 삭제되었습니다."}
+    except HTTPException:
+        raise
     except:
         db.rollback()
         raise HTTPException(status_code=500, detail="스레드 삭제 중 오류가 발생했습니다.")
+    request_purge()
+    return {"detail": "스레드 삭제가 예약되었습니다.", "thread_id": thread_id}
+
+def _get_thread_deletion(db: Session, thread_id: int, user_id: int):
+    status = thread_deletion_status(db, user_id, thread_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="삭제 요청된 스레드를 찾을 수 없습니다.")
+    return status
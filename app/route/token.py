@@ -1,16 +1,65 @@
 from fastapi import APIRouter, Depends
+from datetime import datetime
 from sqlalchemy.orm import Session
-from database.database import get_db
-from utils.token_utils import auth_handler
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.database import get_db, get_async_db
+from utils.token_utils import auth_handler, get_current_user, get_current_user_async, invalidate_user_tokens
 from utils.hash_utils import _token_hash
-from models import RefreshToken
+from utils.revocation_utils import revoked_tokens
+from utils.keyring_utils import keyring
+from models import RefreshToken, Users
 
 router = APIRouter(prefix="/auth", tags=["auth"])
+# OCEAN_DB_ASYNC=1일 때 main.py에서 대신 등록되는 비동기 라우터
+async_router = APIRouter(prefix="/auth", tags=["auth"])
+# DB를 쓰지 않으므로 sync/async 모드 공통
+jwks_router = APIRouter(tags=["auth"])
+
+
+@jwks_router.get("/.well-known/jwks.json")
+def jwks():
+    """액세스 토큰 검증용 공개키 목록. (HS* 모드에서는 비어 있음)"""
+    return keyring.jwks()
 
 
 @router.post("/refresh")
 def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
     """리프레시 토큰을 사용해 새로운 엑세스/리프레시 토큰을 발급합니다."""
+    return _refresh_token(db, refresh_token)
+
+
+@async_router.post("/refresh")
+async def refresh_token_async(refresh_token: str, db: AsyncSession = Depends(get_async_db)):
+    """리프레시 토큰을 사용해 새로운 엑세스/리프레시 토큰을 발급합니다."""
+    return await db.run_sync(_refresh_token, refresh_token)
+
+
+@router.post("/logout")
+def logout(refresh_token: str, db: Session = Depends(get_db)):
+    """리프레시 토큰을 폐기하고 로그아웃 처리합니다."""
+    return _logout(db, refresh_token)
+
+
+@async_router.post("/logout")
+async def logout_async(refresh_token: str, db: AsyncSession = Depends(get_async_db)):
+    """리프레시 토큰을 폐기하고 로그아웃 처리합니다."""
+    return await db.run_sync(_logout, refresh_token)
+
+
+@router.post("/logout-all")
+def logout_all(user: Users = Depends(get_current_user), db: Session = Depends(get_db)):
+    """사용자의 모든 리프레시 토큰과 발급된 액세스 토큰을 폐기합니다. (모든 기기 로그아웃)"""
+    return _logout_all(db, user.user_id)
+
+
+@async_router.post("/logout-all")
+async def logout_all_async(user: Users = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    """사용자의 모든 리프레시 토큰과 발급된 액세스 토큰을 폐기합니다. (모든 기기 로그아웃)"""
+    return await db.run_sync(_logout_all, user.user_id)
+
+
+### DB 작업 (sync/async 공용) ###
+def _refresh_token(db: Session, refresh_token: str):
     payload = auth_handler.verify_refresh_token(db, refresh_token)
     user_id = int(payload["sub"])
     new_access, new_refresh = auth_handler.rotate_refresh_token(db, refresh_token, user_id)
@@ -22,12 +71,19 @@ def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
     }
 
 
-@router.post("/logout")
-def logout(refresh_token: str, db: Session = Depends(get_db)):
-    """리프레시 토큰을 폐기하고 로그아웃 처리합니다."""
+def _logout(db: Session, refresh_token: str):
     token_hash = _token_hash(refresh_token)
     token_record = db.query(RefreshToken).filter(RefreshToken.token_hash == token_hash).first()
     if token_record:
         token_record.revoked = True
+        token_record.last_used_at = datetime.utcnow()
         db.commit()
+        revoked_tokens.add(token_hash, token_record.expires_at)
     return {"detail": "로그아웃되었습니다."}
+
+
+def _logout_all(db: Session, user_id: int):
+    auth_handler.revoke_all_for_user(db, user_id)
+    db.commit()
+    invalidate_user_tokens(user_id)
+    return {"detail": "모든 기기에서 로그아웃되었습니다."}
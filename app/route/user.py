@@ -1,33 +1,72 @@
 # app/route/user.py
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import delete, func
 from sqlalchemy.orm import Session
-from database import get_db
-from models import Users
-from utils import get_current_user
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db
+from models import Users, RefreshToken
+from utils import get_current_user, get_current_user_async, token_cache
+from utils.token_utils import auth_handler, invalidate_user_tokens
+from utils.purge_utils import hide_threads, request_purge
 from schemas import UserResponse, UserPreferenceUpdate
 
 user_router = APIRouter(prefix="/users", tags=["users"])
+# OCEAN_DB_ASYNC=1일 때 main.py에서 대신 등록되는 비동기 라우터
+async_user_router = APIRouter(prefix="/users", tags=["users"])
 
 @user_router.get("/me", response_model=UserResponse)
 def read_user_me(user: Users = Depends(get_current_user)):
     return user
 
+@async_user_router.get("/me", response_model=UserResponse)
+async def read_user_me_async(user: Users = Depends(get_current_user_async)):
+    return user
+
 @user_router.patch("/me", response_model=UserResponse)
 def update_user_me(
     prefs: UserPreferenceUpdate,
     db: Session = Depends(get_db),
     user: Users = Depends(get_current_user),
 ):
+    return _update_user_me(db, user, prefs)
+
+@async_user_router.patch("/me", response_model=UserResponse)
+async def update_user_me_async(
+    prefs: UserPreferenceUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    user: Users = Depends(get_current_user_async),
+):
+    return await db.run_sync(_update_user_me, user, prefs)
+
+# 탈퇴: 즉시 로그인/토큰을 막고 202, 스레드와 사용자 행은 백그라운드에서 정리 (utils/purge_utils.py)
+@user_router.delete("/me", status_code=status.HTTP_202_ACCEPTED)
+def delete_user_me(db: Session = Depends(get_db), user: Users = Depends(get_current_user)):
+    return _delete_user_me(db, user)
+
+@async_user_router.delete("/me", status_code=status.HTTP_202_ACCEPTED)
+async def delete_user_me_async(db: AsyncSession = Depends(get_async_db), user: Users = Depends(get_current_user_async)):
+    return await db.run_sync(_delete_user_me, user)
+
+### DB 작업 (sync/async 공용) ###
+def _update_user_me(db: Session, user: Users, prefs: UserPreferenceUpdate):
     if prefs.chat_theme is not None:
         user.chat_theme = prefs.chat_theme
     if prefs.dark_mode is not None:
         user.dark_mode = prefs.dark_mode
     db.commit()
+    token_cache.invalidate_user(user.user_id)
     db.refresh(user)
     return user
 
-@user_router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user_me(db: Session = Depends(get_db), user: Users = Depends(get_current_user)):
-    db.delete(user)
+def _delete_user_me(db: Session, user: Users):
+    user_id = user.user_id
+    # 토큰은 한 번의 벌크 DELETE로 (ORM cascade로 하나씩 로딩/삭제하지 않음)
+    db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id))
+    threads = hide_threads(db, user_id)
+    user.deleted_at = func.now()
+    # 이미 발급된 액세스 토큰도 무효화
+    auth_handler.bump_token_version(db, user_id)
     db.commit()
-    return
+    invalidate_user_tokens(user_id)
+    request_purge()
+    return {"detail": "회원 탈퇴가 예약되었습니다.", "threads": threads}
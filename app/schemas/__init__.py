@@ -16,6 +16,13 @@ from .schemas import (
     MessageCreate,
     UserPreferenceUpdate,
     MessageOut,
+    ImageOut,
+    ImageUploadOut,
+    MessageWithImagesOut,
+    MessageBulkItem,
+    MessageBulkCreate,
+    MessageBulkResponse,
+    SearchHit,
 )
 
 __all__ = [
@@ -34,4 +41,11 @@ __all__ = [
     "MessageResponse",
     "MessageCreate",
     "MessageOut",
+    "ImageOut",
+    "ImageUploadOut",
+    "MessageWithImagesOut",
+    "MessageBulkItem",
+    "MessageBulkCreate",
+    "MessageBulkResponse",
+    "SearchHit",
 ]
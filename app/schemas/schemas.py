@@ -1,7 +1,7 @@
 # app/schemas/schemas.py
 
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import List, Literal, Optional
 import datetime
 
 # --- User ---
@@ -62,6 +62,10 @@ class ThreadResponse(BaseModel):
     thread_id: int = Field(..., description="스레드 ID")
     thread_title: str = Field(..., description="스레드 제목")
     created_at: datetime.datetime = Field(..., description="스레드 생성 시간")
+    last_message_id: Optional[int] = Field(None, description="마지막 메시지 ID")
+    last_message_preview: Optional[str] = Field(None, description="마지막 메시지 앞부분 (최대 100자)")
+    message_count: int = Field(0, description="메시지 수")
+    last_activity_at: datetime.datetime = Field(..., description="마지막 메시지 시간 (없으면 생성 시간)")
 
     class Config:
         orm_mode = True
@@ -71,6 +75,10 @@ class ThreadDetail(BaseModel):
     thread_title: str
     user_id: int
     created_at: datetime.datetime
+    last_message_id: Optional[int] = None
+    last_message_preview: Optional[str] = None
+    message_count: int = 0
+    last_activity_at: datetime.datetime
 
     class Config:
         orm_mode = True
@@ -88,7 +96,8 @@ class MessageResponse(BaseModel):
 
 class MessageCreate(BaseModel):
     content: str = Field(..., min_length=1, max_length=8000)
-    client_message_id: Optional[str] = None  # 멱등/중복 전송 방지용
+    sender_type: Literal["user", "assistant"] = "user"  # 온디바이스 모델 응답도 클라가 저장
+    client_message_id: Optional[str] = Field(None, max_length=64)  # 멱등/중복 전송 방지용
     stream: bool = False  # HTTP에서 스트리밍 대신 최종본만 받을지 선택
 
 class MessageOut(BaseModel):
@@ -96,7 +105,44 @@ class MessageOut(BaseModel):
     thread_id: int
     sender_type: str
     content: str
+    client_message_id: Optional[str] = None
     created_at: datetime.datetime
 
     class Config:
         orm_mode = True
+
+class ImageOut(BaseModel):
+    image_id: int
+    url: str = Field(..., description="CDN 서명 URL (만료 전까지 유효)")
+    thumbnail_url: Optional[str] = None
+
+class ImageUploadOut(ImageOut):
+    sha256: str
+    size: int
+    deduplicated: bool = Field(..., description="같은 스레드에 같은 이미지가 이미 있어 저장을 건너뜀")
+
+class MessageWithImagesOut(MessageOut):
+    images: List[ImageOut] = []
+
+# --- Message (오프라인 동기화 일괄 업로드) ---
+class MessageBulkItem(MessageCreate):
+    thread_id: int
+
+class MessageBulkCreate(BaseModel):
+    items: List[MessageBulkItem] = Field(..., min_items=1, max_items=500)
+
+class MessageBulkResponse(BaseModel):
+    created: int = Field(..., description="새로 저장된 메시지 수")
+    duplicates: int = Field(..., description="client_message_id 중복으로 건너뛴 수")
+    messages: List[MessageOut] = Field(..., description="요청 순서대로의 메시지 (중복은 기존 행)")
+
+# --- Search ---
+class SearchHit(BaseModel):
+    type: Literal["message", "thread"]
+    thread_id: int
+    message_id: Optional[int] = Field(None, description="type이 message일 때")
+    thread_title: str
+    snippet: str
+    highlights: List[List[int]] = Field(..., description="snippet 안의 일치 구간 [시작, 끝) 목록")
+    score: float
+    created_at: datetime.datetime
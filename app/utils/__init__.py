@@ -1,11 +1,33 @@
 from .hash_utils import(
     hash_password,
     verify_password,
-    _token_hash
+    _token_hash,
+    PasswordHasher,
+    password_hasher
+)
+from .cache_utils import(
+    TokenCache,
+    token_cache,
+    LRUCache,
+    recent_messages,
+    TTLCache,
+    token_versions
+)
+from .keyring_utils import(
+    KeyRing,
+    keyring
+)
+from .cdn_utils import(
+    CloudFrontSigner,
+    url_signer
 )
 from .token_utils import(
     AuthHandler,
-    get_current_user
+    get_current_user,
+    get_current_user_async,
+    Principal,
+    get_current_principal,
+    get_current_principal_async
 )
 
 from .message_utils import(
@@ -13,5 +35,6 @@ from .message_utils import(
     assert_thread_ownership,
     authenticate_websocket,
     WSConnectionManager,
-    own_thread
+    own_thread,
+    own_thread_async
 )
\ No newline at end of file
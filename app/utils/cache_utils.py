@@ -0,0 +1,221 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+import hashlib
+import os
+import threading
+import time
+
+# ---------------------------------------------------------------------
+# 검증된 액세스 토큰 캐시 (프로세스 내부)
+# ---------------------------------------------------------------------
+
+class TokenCache:
+    """
+    검증이 끝난 액세스 토큰과 사용자 스냅샷을 보관하는 LRU 캐시.
+    - 키: 토큰 해시 (원문 토큰은 저장하지 않음)
+    - 만료: 토큰 exp 또는 ttl 중 빠른 시점
+    - 사용자 단위 무효화 지원 (/users/me 수정/삭제 시)
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: int = 30):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        if self.max_size <= 0:
+            return None
+        key = self.key(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, user_id, snapshot = entry
+            if expires_at <= now:
+                self._remove(key, user_id)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return snapshot
+
+    def set(self, token: str, user_id: int, snapshot: Dict[str, Any], exp: Optional[int] = None):
+        if self.max_size <= 0:
+            return
+        key = self.key(token)
+        expires_at = time.time() + self.ttl_seconds
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._by_user.get(old[1], set()).discard(key)
+            self._entries[key] = (expires_at, user_id, snapshot)
+            self._by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                old_key, (_, old_user_id, _) = self._entries.popitem(last=False)
+                self._discard_user_key(old_user_id, old_key)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            for key in self._by_user.pop(user_id, set()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, key: str, user_id: int):
+        self._entries.pop(key, None)
+        self._discard_user_key(user_id, key)
+
+    def _discard_user_key(self, user_id: int, key: str):
+        keys = self._by_user.get(user_id)
+        if keys is None:
+            return
+        keys.discard(key)
+        if not keys:
+            self._by_user.pop(user_id, None)
+
+
+token_cache = TokenCache(
+    max_size=int(os.getenv("ACCESS_TOKEN_CACHE_SIZE", "10000")),
+    ttl_seconds=int(os.getenv("ACCESS_TOKEN_CACHE_TTL_SECONDS", "30")),
+)
+
+
+# ---------------------------------------------------------------------
+# 사용자별 토큰 버전 캐시 (get_current_principal)
+# ---------------------------------------------------------------------
+
+class TTLCache:
+    """
+    짧은 TTL을 가진 스레드 안전한 LRU.
+    다른 워커에서 바뀐 값은 최대 ttl_seconds 동안 이전 값이 보일 수 있습니다.
+    (같은 워커에서의 변경은 invalidate로 즉시 반영)
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: int = 10):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        if self.max_size <= 0:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Any, value: Any):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Any):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_prefix(self, prefix: Tuple) -> int:
+        """튜플 키 중 prefix로 시작하는 항목을 모두 지웁니다. (전체 순회, 드문 삭제 작업용)"""
+        size = len(prefix)
+        with self._lock:
+            keys = [key for key in self._entries if isinstance(key, tuple) and key[:size] == prefix]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# user_id -> Users.token_version
+token_versions = TTLCache(
+    max_size=int(os.getenv("TOKEN_VERSION_CACHE_SIZE", "10000")),
+    ttl_seconds=int(os.getenv("TOKEN_VERSION_CACHE_TTL_SECONDS", "10")),
+)
+
+
+# ---------------------------------------------------------------------
+# 범용 LRU (CDN 서명 등) + 최근 메시지 멱등 키
+# ---------------------------------------------------------------------
+
+class LRUCache:
+    """스레드 안전한 고정 크기 LRU. 만료 없이 오래된 항목부터 밀려납니다."""
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Any, value: Any):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# (user_id, thread_id, client_message_id) -> 저장된 메시지 스냅샷
+# 짧은 간격의 재전송은 DB 조회 없이 기존 결과를 돌려줍니다.
+# 소유권/삭제 확인 전에 쓰이므로 TTL을 짧게 두고, 스레드를 숨기면 그 스레드 항목을 지움 (purge_utils.hide_threads)
+recent_messages = TTLCache(
+    max_size=int(os.getenv("RECENT_MESSAGE_CACHE_SIZE", "4096")),
+    ttl_seconds=int(os.getenv("RECENT_MESSAGE_CACHE_TTL_SECONDS", "10")),
+)
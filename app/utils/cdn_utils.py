@@ -0,0 +1,110 @@
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
+from typing import Any
+from urllib.parse import urlsplit
+import base64
+import json
+import os
+import posixpath
+import threading
+import time
+
+from .cache_utils import LRUCache
+
+# ---------------------------------------------------------------------
+# CloudFront 서명 URL
+# - 개인키(/run/secrets/cf_private_key.pem)는 처음 서명할 때 한 번만 읽고 파싱
+# - 이미지마다 RSA 서명하지 않고, 디렉터리(threads/{thread_id}/) 단위 와일드카드 정책에 한 번 서명해
+#   같은 디렉터리의 모든 이미지 URL에 같은 Policy/Signature를 붙임
+# - 만료 시각은 CLOUDFRONT_URL_BUCKET_SECONDS 단위로 올림 → 같은 구간에는 워커와 무관하게 같은 URL
+#   (브라우저/CDN 캐시 재사용), 서명은 만료 CLOUDFRONT_URL_REFRESH_SECONDS 전까지 캐시
+# CLOUDFRONT_DOMAIN / CLOUDFRONT_KEY_PAIR_ID가 없으면 서명하지 않고 저장된 URL을 그대로 반환
+# ---------------------------------------------------------------------
+
+CLOUDFRONT_DOMAIN = os.getenv("CLOUDFRONT_DOMAIN", "")
+CLOUDFRONT_KEY_PAIR_ID = os.getenv("CLOUDFRONT_KEY_PAIR_ID", "")
+CLOUDFRONT_PRIVATE_KEY_PATH = os.getenv("CLOUDFRONT_PRIVATE_KEY_PATH", "/run/secrets/cf_private_key.pem")
+URL_TTL_SECONDS = int(os.getenv("CLOUDFRONT_URL_TTL_SECONDS", "3600"))
+URL_BUCKET_SECONDS = int(os.getenv("CLOUDFRONT_URL_BUCKET_SECONDS", "600"))
+URL_REFRESH_SECONDS = int(os.getenv("CLOUDFRONT_URL_REFRESH_SECONDS", "300"))
+
+
+def _cloudfront_b64(data: bytes) -> str:
+    # CloudFront URL-safe base64 (+ → -, = → _, / → ~)
+    return base64.b64encode(data).decode().replace("+", "-").replace("=", "_").replace("/", "~")
+
+
+class CloudFrontSigner:
+    def __init__(self, domain: str, key_pair_id: str, private_key_path: str,
+                 ttl_seconds: int = URL_TTL_SECONDS, bucket_seconds: int = URL_BUCKET_SECONDS,
+                 refresh_seconds: int = URL_REFRESH_SECONDS, cache_size: int = 10000):
+        self.base_url = domain.rstrip("/")
+        if self.base_url and "://" not in self.base_url:
+            self.base_url = f"https://{self.base_url}"
+        self.host = urlsplit(self.base_url).netloc
+        self.key_pair_id = key_pair_id
+        self.private_key_path = private_key_path
+        self.ttl_seconds = ttl_seconds
+        self.bucket_seconds = max(bucket_seconds, 1)
+        self.refresh_seconds = refresh_seconds
+        self.enabled = bool(self.base_url and key_pair_id)
+        # 와일드카드 리소스 -> (교체 시각, 쿼리 문자열)
+        self._signatures = LRUCache(cache_size)
+        self._private_key: Any = None
+        self._lock = threading.Lock()
+        self.signed = 0
+
+    def _key(self):
+        if self._private_key is None:
+            with self._lock:
+                if self._private_key is None:
+                    with open(self.private_key_path, "rb") as f:
+                        self._private_key = load_pem_private_key(f.read(), password=None)
+        return self._private_key
+
+    def url_for(self, image_url: str) -> str:
+        """저장된 이미지 URL(또는 CDN 기준 경로)을 서명된 URL로 바꿉니다."""
+        if "://" not in image_url:
+            if not self.base_url:
+                return image_url
+            image_url = f"{self.base_url}/{image_url.lstrip('/')}"
+        if not self.enabled:
+            return image_url
+        parts = urlsplit(image_url)
+        if parts.netloc != self.host:
+            return image_url  # CDN 밖의 URL은 그대로
+        resource = f"{parts.scheme}://{parts.netloc}{posixpath.dirname(parts.path).rstrip('/')}/*"
+        return f"{image_url}{'&' if parts.query else '?'}{self._query_for(resource)}"
+
+    def _query_for(self, resource: str) -> str:
+        now = time.time()
+        cached = self._signatures.get(resource)
+        if cached is not None and now < cached[0]:
+            return cached[1]
+        expires = (int(now + self.ttl_seconds) // self.bucket_seconds + 1) * self.bucket_seconds
+        query = self._sign(resource, expires)
+        self._signatures.set(resource, (expires - self.refresh_seconds, query))
+        return query
+
+    def _sign(self, resource: str, expires: int) -> str:
+        policy = json.dumps(
+            {"Statement": [{"Resource": resource, "Condition": {"DateLessThan": {"AWS:EpochTime": expires}}}]},
+            separators=(",", ":"),
+        ).encode()
+        # CloudFront 키 그룹의 RSA 키는 SHA1 서명
+        signature = self._key().sign(policy, padding.PKCS1v15(), hashes.SHA1())
+        self.signed += 1
+        return f"Policy={_cloudfront_b64(policy)}&Signature={_cloudfront_b64(signature)}&Key-Pair-Id={self.key_pair_id}"
+
+
+url_signer = CloudFrontSigner(CLOUDFRONT_DOMAIN, CLOUDFRONT_KEY_PAIR_ID, CLOUDFRONT_PRIVATE_KEY_PATH)
+
+
+def image_payload(image) -> dict:
+    """ImageOut 형태 (같은 디렉터리(스레드)의 이미지는 캐시된 서명 하나를 공유)"""
+    return {
+        "image_id": image.image_id,
+        "url": url_signer.url_for(image.image_url),
+        "thumbnail_url": url_signer.url_for(image.thumbnail_url) if image.thumbnail_url else None,
+    }
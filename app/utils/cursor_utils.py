@@ -0,0 +1,67 @@
+from fastapi import HTTPException, Response
+from typing import Any, Callable, Optional, Tuple
+import base64
+import hashlib
+import hmac
+import json
+import os
+
+# ---------------------------------------------------------------------
+# 키셋 페이지네이션 커서 (불투명 + 서명)
+# - 커서는 scope(예: 스레드)에 묶여 있어 다른 목록에 재사용할 수 없습니다.
+# - direction: "before"(더 오래된 쪽) | "after"(더 최신 쪽)
+# ---------------------------------------------------------------------
+
+CURSOR_SECRET_KEY = os.getenv("CURSOR_SECRET_KEY") or os.getenv("TOKEN_SECRET_KEY", "")
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def _sign(body: str) -> str:
+    return _b64encode(hmac.new(CURSOR_SECRET_KEY.encode(), body.encode(), hashlib.sha256).digest()[:16])
+
+def encode_cursor(scope: str, boundary_id: int, direction: str) -> str:
+    body = _b64encode(json.dumps({"s": scope, "id": boundary_id, "d": direction}, separators=(",", ":")).encode())
+    return f"{body}.{_sign(body)}"
+
+def decode_cursor(cursor: str, scope: str) -> Tuple[int, str]:
+    try:
+        body, signature = cursor.split(".", 1)
+        if not hmac.compare_digest(signature, _sign(body)):
+            raise ValueError("bad signature")
+        payload = json.loads(_b64decode(body))
+        if payload["s"] != scope or payload["d"] not in ("before", "after"):
+            raise ValueError("bad scope")
+        return int(payload["id"]), payload["d"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="유효하지 않은 커서입니다.")
+
+def apply_cursor_headers(response: Response, next_cursor: Optional[str], prev_cursor: Optional[str]):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if prev_cursor:
+        response.headers[PREV_CURSOR_HEADER] = prev_cursor
+
+# 관련도/활동 시각 순 목록용: (정렬 키, id) 경계. 같은 키 안에서는 id 내림차순
+# rank는 JSON으로 저장할 수 있는 값(점수, ISO 시각 문자열 등), 읽을 때 cast로 변환
+def encode_rank_cursor(scope: str, rank: Any, boundary_id: int) -> str:
+    body = _b64encode(json.dumps({"s": scope, "r": rank, "id": boundary_id}, separators=(",", ":")).encode())
+    return f"{body}.{_sign(body)}"
+
+def decode_rank_cursor(cursor: str, scope: str, cast: Callable[[Any], Any] = float) -> Tuple[Any, int]:
+    try:
+        body, signature = cursor.split(".", 1)
+        if not hmac.compare_digest(signature, _sign(body)):
+            raise ValueError("bad signature")
+        payload = json.loads(_b64decode(body))
+        if payload["s"] != scope:
+            raise ValueError("bad scope")
+        return cast(payload["r"]), int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="유효하지 않은 커서입니다.")
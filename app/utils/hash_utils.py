@@ -1,11 +1,21 @@
 from passlib.context import CryptContext
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
 import os
 import hmac
 import hashlib
+import threading
 from typing import Optional
 
 # 패스워드 해싱에 사용할 컨텍스트
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# (BCRYPT_ROUNDS를 올리면 기존 해시는 로그인 시 needs_update로 재해싱됩니다)
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=int(os.getenv("BCRYPT_ROUNDS", "12")),
+)
 
 # .env의 토큰 페퍼를 읽어옴
 TOKEN_PEPPER = os.getenv("TOKEN_PEPPER", "")
@@ -35,3 +45,79 @@ def _token_hash(token: str) -> str:
     HMAC을 이용해 토큰을 해싱합니다.
     """
     return hmac.new(TOKEN_PEPPER.encode(), token.encode(), hashlib.sha256).hexdigest()
+
+# ---------------------------------------------------------------------
+# 비동기 해싱 서비스 (bcrypt를 프로세스 풀에서 실행)
+# ---------------------------------------------------------------------
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    # 워커 프로세스에서 실행됩니다. (pickle 가능하도록 모듈 수준 함수)
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+class PasswordHasher:
+    """
+    bcrypt 해싱/검증을 이벤트 루프와 스레드풀 밖(프로세스 풀)에서 수행합니다.
+    - 대기 중인 작업이 max_pending 이상이면 503으로 즉시 거절합니다.
+    - enabled=False면 기존처럼 스레드풀에서 실행합니다. (비교/롤백용)
+    """
+
+    def __init__(self, workers: int, max_pending: int, enabled: bool = True):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.enabled = enabled
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # uvicorn 워커마다 첫 요청 시점에 풀을 만듭니다.
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="요청이 많아 잠시 후 다시 시도해주세요.",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        try:
+            if not self.enabled:
+                return await run_in_threadpool(fn, *args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        """
+        비밀번호를 검증하고, 해시 설정(cost 등)이 바뀌었으면 새 해시를 함께 반환합니다.
+        """
+        return await self._run(_verify_and_update, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"pending": self._pending, "rejected": self.rejected}
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=int(os.getenv("HASH_POOL_WORKERS", str(os.cpu_count() or 1))),
+    max_pending=int(os.getenv("HASH_POOL_MAX_PENDING", "64")),
+    enabled=os.getenv("HASH_POOL_ENABLED", "1") == "1",
+)
@@ -0,0 +1,200 @@
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Tuple
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+
+# ---------------------------------------------------------------------
+# 이미지 업로드 처리
+# - 요청 본문을 청크 단위로 받아 임시 파일에 쓰면서 SHA-256을 누적 (파일 전체를 메모리에 올리지 않음)
+#   파일 쓰기와 해시 갱신은 IMAGE_UPLOAD_BUFFER_BYTES 단위로 모아 스레드풀에서
+# - 형식은 첫 바이트(매직 넘버)로 판별 (jpg/png/gif/webp), 크기 제한은 IMAGE_MAX_BYTES
+# - 썸네일 생성(Pillow)은 프로세스 풀에서 (이벤트 루프/스레드풀의 GIL 경합 없음)
+# ---------------------------------------------------------------------
+
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(20 * 1024 * 1024)))
+IMAGE_UPLOAD_BUFFER_BYTES = int(os.getenv("IMAGE_UPLOAD_BUFFER_BYTES", str(1024 * 1024)))
+IMAGE_UPLOAD_TMP_DIR = os.getenv("IMAGE_UPLOAD_TMP_DIR") or tempfile.gettempdir()
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", "320"))
+
+_IMAGE_TYPES = (
+    (b"\xff\xd8\xff", "jpg", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png", "image/png"),
+    (b"GIF87a", "gif", "image/gif"),
+    (b"GIF89a", "gif", "image/gif"),
+)
+
+
+def sniff_image_type(head: bytes) -> Optional[Tuple[str, str]]:
+    """(확장자, Content-Type). 지원하지 않는 형식이면 None"""
+    for magic, ext, content_type in _IMAGE_TYPES:
+        if head.startswith(magic):
+            return ext, content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp", "image/webp"
+    return None
+
+
+@dataclass
+class ReceivedImage:
+    path: str  # 임시 파일 (처리 후 호출한 쪽에서 정리)
+    sha256: str
+    size: int
+    ext: str
+    content_type: str
+
+
+def _write_chunk(f, digest, data: bytearray):
+    # hashlib은 큰 버퍼에서 GIL을 놓으므로 스레드풀에서 병렬로 진행됩니다.
+    digest.update(data)
+    f.write(data)
+
+
+def remove_quietly(path: Optional[str]):
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+async def receive_image(request: Request, max_bytes: int = IMAGE_MAX_BYTES) -> ReceivedImage:
+    """요청 본문(이미지 원본 바이트)을 임시 파일로 스트리밍하며 해시를 계산합니다."""
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > max_bytes:
+        raise HTTPException(status_code=413, detail="이미지 크기가 너무 큽니다.")
+
+    fd, path = tempfile.mkstemp(suffix=".upload", dir=IMAGE_UPLOAD_TMP_DIR)
+    f = os.fdopen(fd, "wb")
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    size = 0
+    image_type = None
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail="이미지 크기가 너무 큽니다.")
+            buffer += chunk
+            if image_type is None and len(buffer) >= 12:
+                image_type = _require_image_type(buffer)
+            if len(buffer) >= IMAGE_UPLOAD_BUFFER_BYTES:
+                await run_in_threadpool(_write_chunk, f, digest, buffer)
+                buffer = bytearray()
+        if image_type is None:
+            image_type = _require_image_type(buffer)
+        if buffer:
+            await run_in_threadpool(_write_chunk, f, digest, buffer)
+        await run_in_threadpool(f.close)
+    except BaseException:
+        f.close()
+        remove_quietly(path)
+        raise
+    return ReceivedImage(path, digest.hexdigest(), size, *image_type)
+
+
+def _require_image_type(head: bytes) -> Tuple[str, str]:
+    if not head:
+        raise HTTPException(status_code=400, detail="이미지 데이터가 비어 있습니다.")
+    image_type = sniff_image_type(bytes(head[:12]))
+    if image_type is None:
+        raise HTTPException(status_code=415, detail="지원하지 않는 이미지 형식입니다. (jpg, png, gif, webp)")
+    return image_type
+
+# ---------------------------------------------------------------------
+# 썸네일 (프로세스 풀)
+# ---------------------------------------------------------------------
+
+def _make_thumbnail(src_path: str, dst_path: str, size: int):
+    # 워커 프로세스에서 실행됩니다. (pickle 가능하도록 모듈 수준 함수)
+    from PIL import Image, ImageOps  # 선택 의존성
+
+    with Image.open(src_path) as im:
+        im.draft("RGB", (size, size))  # JPEG는 디코딩 단계에서 축소 (메모리/CPU 절약)
+        thumb = ImageOps.exif_transpose(im)
+        thumb.thumbnail((size, size))
+        thumb.convert("RGB").save(dst_path, "JPEG", quality=80, optimize=True)
+
+
+class ThumbnailService:
+    """
+    썸네일을 프로세스 풀에서 만듭니다. (구조는 utils/hash_utils.py의 PasswordHasher와 같음)
+    - 대기 중인 작업이 max_pending 이상이면 503으로 즉시 거절합니다.
+    - Pillow가 없으면 썸네일 없이 원본만 저장합니다.
+    """
+
+    def __init__(self, workers: int, max_pending: int, size: int = THUMBNAIL_SIZE):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.size = size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+        self.unavailable = False
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def check_capacity(self):
+        """본문을 받기 전에 미리 확인 (거절할 요청의 업로드를 받지 않도록)"""
+        if self._pending >= self.max_pending:
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="이미지 처리 요청이 많아 잠시 후 다시 시도해주세요.",
+                headers={"Retry-After": "1"},
+            )
+
+    async def make(self, src_path: str) -> Optional[str]:
+        """썸네일 임시 파일 경로. Pillow가 없으면 None, 읽을 수 없는 이미지면 415"""
+        if self.unavailable:
+            return None
+        self.check_capacity()
+        fd, dst_path = tempfile.mkstemp(suffix=".thumb.jpg", dir=IMAGE_UPLOAD_TMP_DIR)
+        os.close(fd)
+        with self._lock:
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._get_executor(), _make_thumbnail, src_path, dst_path, self.size)
+            return dst_path
+        except ImportError:
+            remove_quietly(dst_path)
+            self.unavailable = True
+            print("Pillow가 설치되어 있지 않아 썸네일을 만들지 않습니다.")
+            return None
+        except Exception as e:
+            remove_quietly(dst_path)
+            # 디코딩 실패(손상/위장 파일, 압축 폭탄)만 415, 풀 장애 등은 그대로
+            if isinstance(e, (OSError, ValueError, SyntaxError)) or type(e).__module__.startswith("PIL"):
+                raise HTTPException(status_code=415, detail="이미지를 읽을 수 없습니다.")
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"pending": self._pending, "rejected": self.rejected}
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+thumbnailer = ThumbnailService(
+    workers=int(os.getenv("THUMBNAIL_POOL_WORKERS", str(min(2, os.cpu_count() or 1)))),
+    max_pending=int(os.getenv("THUMBNAIL_POOL_MAX_PENDING", "32")),
+)
@@ -0,0 +1,133 @@
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+from jwt.algorithms import ECAlgorithm, OKPAlgorithm, RSAAlgorithm
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import threading
+import time
+
+# ---------------------------------------------------------------------
+# JWT 서명 키링 (kid / JWKS)
+# - HS*: 기존처럼 TOKEN_SECRET_KEY 하나로 서명/검증 (JWKS 미공개)
+# - RS256 / ES256 / EdDSA: TOKEN_KEYS_DIR의 {kid}.pem 파일들
+#     * TOKEN_ACTIVE_KID 키로 서명 (개인키 필요)
+#     * 디렉터리의 모든 키로 검증 → 교체 기간 동안 이전 키와 새 키가 함께 유효
+#     * 다른 서비스는 공개키(JWKS)만으로 검증 가능
+# PEM은 로딩 시 한 번만 파싱하고 키 객체를 캐시합니다.
+# ---------------------------------------------------------------------
+
+def _algorithm_for(key: Any) -> str:
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return "RS256"
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        # ES256은 P-256 전용 (다른 곡선 키를 ES256으로 내보내면 검증하는 쪽에서 실패)
+        if not isinstance(key.curve, ec.SECP256R1):
+            raise ValueError(f"ES256은 P-256 키만 사용할 수 있습니다: {key.curve.name}")
+        return "ES256"
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return "EdDSA"
+    raise ValueError(f"지원하지 않는 키 형식입니다: {type(key).__name__}")
+
+_JWK_EXPORTERS = {"RS256": RSAAlgorithm, "ES256": ECAlgorithm, "EdDSA": OKPAlgorithm}
+
+
+class KeyRing:
+    def __init__(self, algorithm: str, secret_key: Optional[str] = None,
+                 keys_dir: Optional[str] = None, active_kid: Optional[str] = None,
+                 reload_interval: float = 30.0):
+        self.algorithm = algorithm
+        self.secret_key = secret_key
+        self.keys_dir = keys_dir
+        self.active_kid = active_kid
+        self.reload_interval = reload_interval
+        self.symmetric = algorithm.startswith("HS")
+        # kid -> (알고리즘, 검증용 키 객체)
+        self._verify_keys: Dict[str, Tuple[str, Any]] = {}
+        self._signing_key: Any = None
+        self._lock = threading.RLock()
+        self._loaded_at = 0.0
+        if not self.symmetric:
+            self.reload()
+
+    def reload(self):
+        """키 디렉터리를 다시 읽습니다. (새 kid 추가/이전 kid 제거 반영)"""
+        # 동시에 여러 요청이 다시 읽어도 늦게 끝난 예전 목록이 새 목록을 덮어쓰지 않도록 직렬화
+        with self._lock:
+            started = time.monotonic()
+            verify_keys: Dict[str, Tuple[str, Any]] = {}
+            signing_key = None
+            for name in sorted(os.listdir(self.keys_dir)):
+                if not name.endswith(".pem"):
+                    continue
+                kid = name[:-4]
+                with open(os.path.join(self.keys_dir, name), "rb") as f:
+                    pem = f.read()
+                if b"PRIVATE KEY" in pem:
+                    private_key = load_pem_private_key(pem, password=None)
+                    public_key = private_key.public_key()
+                    if kid == self.active_kid:
+                        signing_key = private_key
+                else:
+                    public_key = load_pem_public_key(pem)
+                verify_keys[kid] = (_algorithm_for(public_key), public_key)
+
+            if signing_key is None and self._signing_key is None:
+                raise RuntimeError(f"서명용 개인키({self.active_kid}.pem)를 찾을 수 없습니다.")
+            self._verify_keys = verify_keys
+            if signing_key is not None:
+                self._signing_key = signing_key
+            self._loaded_at = started  # 디렉터리를 읽기 시작한 시각
+
+    def signing(self) -> Tuple[Any, str, Dict[str, str]]:
+        """(키, 알고리즘, 헤더)"""
+        if self.symmetric:
+            return self.secret_key, self.algorithm, {}
+        return self._signing_key, _algorithm_for(self._signing_key), {"kid": self.active_kid}
+
+    def verification(self, kid: Optional[str]) -> Optional[Tuple[Any, str]]:
+        """(키, 알고리즘). 모르는 kid면 디렉터리를 다시 읽어 한 번 더 확인합니다."""
+        if self.symmetric:
+            return self.secret_key, self.algorithm
+        if kid is None:
+            return None
+        entry = self._verify_keys.get(kid)
+        if entry is None:
+            entry = self._reload_for(kid)
+        if entry is None:
+            return None
+        algorithm, key = entry
+        return key, algorithm
+
+    def _reload_for(self, kid: str) -> Optional[Tuple[str, Any]]:
+        # 다른 인스턴스가 먼저 새 키로 서명한 경우 (reload_interval로 남용 방지)
+        missed_at = time.monotonic()
+        with self._lock:
+            entry = self._verify_keys.get(kid)
+            # 기다리는 동안 다른 요청이 이미 다시 읽었으면 (그 목록에 없으면 없는 kid) 그대로 사용
+            if entry is not None or self._loaded_at >= missed_at:
+                return entry
+            if missed_at - self._loaded_at <= self.reload_interval:
+                return None
+            try:
+                self.reload()
+            except (OSError, ValueError) as e:
+                # 디렉터리를 못 읽거나 교체 중인 키 파일이 깨진 경우: 기존 키 유지, 이 토큰은 401
+                self._loaded_at = time.monotonic()
+                print("서명 키 다시 읽기 실패:", e)
+            return self._verify_keys.get(kid)
+
+    def jwks(self) -> Dict[str, List[dict]]:
+        keys = []
+        for kid, (algorithm, public_key) in self._verify_keys.items():
+            jwk = _JWK_EXPORTERS[algorithm].to_jwk(public_key, as_dict=True)
+            jwk.update({"kid": kid, "alg": algorithm, "use": "sig"})
+            keys.append(jwk)
+        return {"keys": keys}
+
+
+keyring = KeyRing(
+    algorithm=os.getenv("TOKEN_ALGORITHM", "HS256"),
+    secret_key=os.getenv("TOKEN_SECRET_KEY"),
+    keys_dir=os.getenv("TOKEN_KEYS_DIR", "/run/secrets/jwt"),
+    active_kid=os.getenv("TOKEN_ACTIVE_KID"),
+)
@@ -1,13 +1,21 @@
 
 from fastapi import Depends, HTTPException, WebSocket
+from sqlalchemy import Row, select
 from sqlalchemy.orm import Session
-from typing import Optional, Dict, List, Set
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import Optional, Dict, List, Set, Deque, Tuple, Union
+from collections import deque
+import asyncio
+import json
 import os
 
-from database import get_db
-from models import Thread, Users
-from utils import AuthHandler, get_current_user  
+from database import get_db, get_async_db
+from models import Thread
+from utils import Principal, get_current_principal, get_current_principal_async
+from .token_utils import _principal_from_token, _verify_principal
 from schemas import MessageOut, MessageCreate
+from .pubsub_utils import PubSubBackend, create_pubsub_backend
 
 # ---------------------------------------------------------------------
 # 공용 유틸 (온디바이스 구조 기준)
@@ -20,12 +28,12 @@ def messages_to_prompt(messages: List[Dict[str, str]]) -> str:
     lines.append("assistant:")
     return "\n".join(lines)
 
-def assert_thread_ownership(db: Session, thread_id: int, user_id: int) -> Thread:
-    thread = (
-        db.query(Thread)
-        .filter(Thread.thread_id == thread_id, Thread.user_id == user_id)
-        .first()
-    )
+def assert_thread_ownership(db: Session, thread_id: int, user_id: int) -> Row:
+    # Thread 엔티티를 만들지 않고 키 컬럼만 조회합니다. (thread.thread_id / thread.user_id 사용 가능)
+    thread = db.execute(
+        select(Thread.thread_id, Thread.user_id)
+        .where(Thread.thread_id == thread_id, Thread.owned_by(user_id))
+    ).first()
     if not thread:
         raise HTTPException(status_code=404, detail="스레드를 찾을 수 없거나 권한이 없습니다.")
     return thread
@@ -33,23 +41,122 @@ def assert_thread_ownership(db: Session, thread_id: int, user_id: int) -> Thread
 def own_thread(
     thread_id: int,
     db: Session = Depends(get_db),
-    user: Users = Depends(get_current_user),
-) -> Thread:
+    user: Principal = Depends(get_current_principal),
+) -> Row:
     return assert_thread_ownership(db, thread_id, user.user_id)
 
+async def own_thread_async(
+    thread_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_principal_async),
+) -> Row:
+    return await db.run_sync(assert_thread_ownership, thread_id, user.user_id)
+
 # ---------------------------------------------------------------------
 # WebSocket helpers
 # ---------------------------------------------------------------------
 
+class OutboundConnection:
+    """
+    소켓별 송신 큐와 전용 writer 태스크.
+    느린 클라이언트가 있어도 다른 소켓으로의 전달이나 송신자의 수신 루프가 멈추지 않습니다.
+    큐가 가득 차면 policy에 따라 처리합니다.
+    - drop_oldest: 가장 오래된 프레임을 버림
+    - coalesce: 대기 중인 typing 프레임을 먼저 버림 (없으면 drop_oldest)
+    - disconnect: 느린 소켓을 끊음 (1013)
+    """
+
+    def __init__(self, websocket: WebSocket, maxsize: int, policy: str, on_error):
+        self.websocket = websocket
+        self.maxsize = maxsize
+        self.policy = policy
+        self.queue: Deque[Tuple[Optional[str], str]] = deque()
+        self.dropped = 0
+        self._on_error = on_error
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._writer())
+
+    def offer(self, message: str, kind: Optional[str] = None) -> bool:
+        """프레임을 큐에 넣습니다. 느린 소켓으로 판정되어 끊어야 하면 False."""
+        if len(self.queue) >= self.maxsize:
+            if self.policy == "disconnect":
+                return False
+            self.dropped += 1
+            if self.policy == "coalesce" and self._drop_queued_typing():
+                pass
+            else:
+                self.queue.popleft()
+        self.queue.append((kind, message))
+        self._wakeup.set()
+        return True
+
+    def _drop_queued_typing(self) -> bool:
+        for i, (kind, _) in enumerate(self.queue):
+            if kind == "typing":
+                del self.queue[i]
+                return True
+        return False
+
+    async def _writer(self):
+        try:
+            while True:
+                while not self.queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                _, message = self.queue.popleft()
+                await self.websocket.send_text(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # 송신 실패 소켓 정리
+            self._on_error(self.websocket)
+
+    async def close(self, code: Optional[int] = None):
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+        if code is not None:
+            try:
+                await self.websocket.close(code=code)
+            except Exception:
+                pass
+
+
 class WSConnectionManager:
-    def __init__(self):
+    """
+    방별 로컬 소켓을 관리합니다.
+    다른 워커/노드와의 전파는 pub/sub 백엔드가 담당하고, 이 객체는 자기 소켓에만 전달합니다.
+    """
+
+    def __init__(self, backend: Optional[PubSubBackend] = None):
         self.rooms: Dict[int, Set[WebSocket]] = {}
+        self.outbound: Dict[WebSocket, OutboundConnection] = {}
+        self.backend = backend or create_pubsub_backend()
+        self.queue_size = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+        self.policy = os.getenv("WS_SLOW_CONSUMER_POLICY", "drop_oldest")
+        self.slow_disconnects = 0
+        self.publish_failures = 0  # pub/sub 장애로 다른 워커에 전파하지 못한 브로드캐스트 수
+        self._dropped_closed = 0  # 이미 끊긴 소켓에서 버려진 프레임 수
+        self._closing: Set[asyncio.Task] = set()  # 진행 중인 소켓 종료 (GC 방지 + 실패 로그)
+        self._started = False
+
+    async def _ensure_started(self):
+        if not self._started:
+            self._started = True
+            await self.backend.start(self.send_local)
 
     async def connect(self, thread_id: int, websocket: WebSocket):
         await websocket.accept()
-        self.rooms.setdefault(thread_id, set()).add(websocket)
+        await self._ensure_started()
+        conns = self.rooms.setdefault(thread_id, set())
+        if not conns:
+            self.backend.subscribe(thread_id)
+        conns.add(websocket)
+        self.outbound[websocket] = OutboundConnection(
+            websocket, self.queue_size, self.policy,
+            on_error=lambda ws: self.disconnect(thread_id, ws),
+        )
 
-    def disconnect(self, thread_id: int, websocket: WebSocket):
+    def disconnect(self, thread_id: int, websocket: WebSocket, code: Optional[int] = None):
         conns = self.rooms.get(thread_id)
         if not conns:
             return
@@ -57,26 +164,91 @@ class WSConnectionManager:
             conns.remove(websocket)
         if not conns:
             self.rooms.pop(thread_id, None)
+            self.backend.unsubscribe(thread_id)
+        out = self.outbound.pop(websocket, None)
+        if out is not None:
+            self._dropped_closed += out.dropped
+            task = asyncio.get_running_loop().create_task(out.close(code))
+            self._closing.add(task)
+            task.add_done_callback(self._close_done)
+
+    def _close_done(self, task: asyncio.Task):
+        self._closing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print("WebSocket 종료 실패:", task.exception())
+
+    async def broadcast(self, thread_id: int, message: Union[str, dict], kind: Optional[str] = None):
+        # 직렬화는 브로드캐스트당 한 번만
+        if not isinstance(message, str):
+            kind = kind or message.get("type")
+            message = json.dumps(message)
+        await self.send_local(thread_id, message, kind)
+        try:
+            await self.backend.publish(thread_id, message, kind)
+        except Exception as e:
+            # Redis/브로커 장애: 이 워커의 소켓에는 이미 전달했으므로 세션은 유지 (다른 워커로만 전파 실패)
+            self.publish_failures += 1
+            print("pub/sub 발행 실패:", e)
 
-    async def broadcast(self, thread_id: int, message: str):
+    async def send_local(self, thread_id: int, message: str, kind: Optional[str] = None):
+        # 큐에 넣기만 하므로 느린 소켓이 있어도 기다리지 않습니다.
         for ws in list(self.rooms.get(thread_id, [])):
-            try:
-                await ws.send_text(message)
-            except Exception:
-                # 실패 소켓 정리
-                self.disconnect(thread_id, ws)
+            self.send_to(thread_id, ws, message, kind)
+
+    def send_to(self, thread_id: int, websocket: WebSocket, message: str, kind: Optional[str] = None):
+        out = self.outbound.get(websocket)
+        if out is None:
+            return
+        if not out.offer(message, kind):
+            self.slow_disconnects += 1
+            self.disconnect(thread_id, websocket, code=1013)
+
+    def stats(self) -> dict:
+        depths = [len(out.queue) for out in self.outbound.values()]
+        return {
+            "connections": len(self.outbound),
+            "rooms": len(self.rooms),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "dropped_frames": self._dropped_closed + sum(out.dropped for out in self.outbound.values()),
+            "slow_disconnects": self.slow_disconnects,
+            "publish_failures": self.publish_failures,
+        }
+
+    async def close(self):
+        for out in list(self.outbound.values()):
+            await out.close(code=1001)
+        self.outbound.clear()
+        self.rooms.clear()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+        if self._started:
+            await self.backend.close()
 
-async def authenticate_websocket(websocket: WebSocket, db: Session, thread_id: int) -> int:
+async def authenticate_websocket(websocket: WebSocket, db: Session | AsyncSession, thread_id: int) -> int:
     token = websocket.query_params.get("token")
     if not token:
         await websocket.close(code=1008)
         raise HTTPException(status_code=401, detail="토큰이 필요합니다.")
 
     try:
-        user_id = AuthHandler().decode_token(token)["user_id"]
+        principal = _principal_from_token(token)
     except Exception:
         await websocket.close(code=1008)
         raise HTTPException(status_code=401, detail="유효하지 않은 토큰입니다.")
 
-    assert_thread_ownership(db, thread_id, user_id)
-    return user_id
+    try:
+        if isinstance(db, AsyncSession):
+            await db.run_sync(_authorize_websocket, principal, thread_id)
+        else:
+            # 동기 드라이버 호출로 이벤트 루프를 막지 않도록
+            await run_in_threadpool(_authorize_websocket, db, principal, thread_id)
+    except HTTPException:
+        await websocket.close(code=1008)
+        raise
+    return principal.user_id
+
+def _authorize_websocket(db: Session, principal: Principal, thread_id: int):
+    # 무효화된(로그아웃-올 이전) 토큰으로 재접속하지 못하도록 버전도 확인
+    _verify_principal(db, principal)
+    assert_thread_ownership(db, thread_id, principal.user_id)
@@ -0,0 +1,360 @@
+import asyncio
+import fcntl
+import json
+import os
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+# ---------------------------------------------------------------------
+# WebSocket 방(room) 브로드캐스트용 pub/sub 백엔드
+# - 각 프로세스는 자기 소켓에만 전달하고, 다른 워커/노드로의 전파는 백엔드가 담당
+# - WS_PUBSUB_BACKEND = memory(기본) | local | redis (redis 패키지는 requirements-optional.txt)
+# ---------------------------------------------------------------------
+
+Deliver = Callable[[int, str, Optional[str]], Awaitable[None]]
+
+# 로컬 브로커가 워커 연결마다 쌓아 두는 최대 프레임 수 / drain 제한 시간
+BROKER_QUEUE_SIZE = int(os.getenv("WS_PUBSUB_BROKER_QUEUE_SIZE", "10000"))
+BROKER_DRAIN_TIMEOUT = float(os.getenv("WS_PUBSUB_BROKER_DRAIN_TIMEOUT", "5"))
+# Redis 재연결 백오프 (초)
+REDIS_RECONNECT_DELAY = float(os.getenv("WS_PUBSUB_RECONNECT_DELAY", "0.5"))
+REDIS_MAX_RECONNECT_DELAY = float(os.getenv("WS_PUBSUB_MAX_RECONNECT_DELAY", "30"))
+
+
+class PubSubBackend:
+    """
+    방 구독/발행 인터페이스.
+    subscribe/unsubscribe는 이벤트 루프를 막지 않도록 동기 호출로 두고
+    실제 네트워크 작업은 백엔드 내부 태스크가 처리합니다.
+    """
+
+    async def start(self, deliver: Deliver):
+        self._deliver = deliver
+
+    def subscribe(self, room: int):
+        pass
+
+    def unsubscribe(self, room: int):
+        pass
+
+    async def publish(self, room: int, message: str, kind: Optional[str] = None):
+        pass
+
+    async def close(self):
+        pass
+
+
+class InMemoryBackend(PubSubBackend):
+    """단일 프로세스 (기존 동작). 로컬 전달만 하므로 발행할 것이 없습니다."""
+
+
+class LocalBrokerBackend(PubSubBackend):
+    """
+    같은 호스트의 uvicorn 워커끼리 Unix 소켓 브로커로 이벤트를 공유합니다.
+    - 브로커는 lock 파일을 먼저 잡은 워커가 띄우고, 죽으면 다른 워커가 이어받습니다.
+    - 프레임: 줄 단위 JSON {"op": "sub"|"unsub"|"pub", "room": int, "data": str, "kind": str}
+    """
+
+    def __init__(self, path: str, reconnect_delay: float = 0.5):
+        self.path = path
+        self.reconnect_delay = reconnect_delay
+        self._rooms: Set[int] = set()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._lock_fd: Optional[int] = None
+        self._closed = False
+
+    async def start(self, deliver: Deliver):
+        await super().start(deliver)
+        self._task = asyncio.create_task(self._run())
+
+    def subscribe(self, room: int):
+        self._rooms.add(room)
+        self._send({"op": "sub", "room": room})
+
+    def unsubscribe(self, room: int):
+        self._rooms.discard(room)
+        self._send({"op": "unsub", "room": room})
+
+    async def publish(self, room: int, message: str, kind: Optional[str] = None):
+        if self._send({"op": "pub", "room": room, "data": message, "kind": kind}):
+            await self._writer.drain()
+
+    async def close(self):
+        self._closed = True
+        if self._task:
+            self._task.cancel()
+        if self._writer:
+            self._writer.close()
+        if self._server:
+            self._server.close()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _send(self, frame: dict) -> bool:
+        if self._writer is None or self._writer.is_closing():
+            return False
+        self._writer.write(json.dumps(frame).encode() + b"\n")
+        return True
+
+    async def _run(self):
+        while not self._closed:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                await self._try_become_broker()
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            self._writer = writer
+            for room in self._rooms:
+                self._send({"op": "sub", "room": room})
+            try:
+                async for line in reader:
+                    frame = json.loads(line)
+                    await self._deliver(frame["room"], frame["data"], frame.get("kind"))
+            except (ConnectionError, ValueError):
+                pass
+            except Exception as e:
+                print("pub/sub 브로커 수신 실패 (재접속):", e)
+            finally:
+                self._writer = None
+                writer.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _try_become_broker(self):
+        if self._server is not None:
+            return
+        fd = os.open(self.path + ".lock", os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)  # 다른 워커가 브로커를 띄우는 중
+            return
+        self._lock_fd = fd
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # 이전 브로커가 남긴 소켓 파일
+        self._server = await asyncio.start_unix_server(_BrokerConnection.serve, path=self.path)
+
+
+class _BrokerConnection:
+    """
+    브로커 측 연결. 같은 방을 구독한 다른 연결에만 프레임을 전달합니다.
+    연결마다 제한된 송신 큐와 전용 송신 태스크를 둡니다. 큐가 가득 차거나 drain이
+    BROKER_DRAIN_TIMEOUT 안에 끝나지 않는 느린 워커는 끊습니다. (브로커 메모리가 무한히 늘지 않도록)
+    끊긴 워커는 재접속해 다시 구독하며, 그 사이의 프레임만 놓칩니다.
+    """
+
+    subscribers: Dict[int, Set["_BrokerConnection"]] = {}
+    dropped_peers = 0
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.rooms: Set[int] = set()
+        self.queue: asyncio.Queue = asyncio.Queue(BROKER_QUEUE_SIZE)
+
+    @classmethod
+    async def serve(cls, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        conn = cls(writer)
+        sender = asyncio.create_task(conn._send_loop())
+        try:
+            async for line in reader:
+                frame = json.loads(line)
+                room = frame["room"]
+                op = frame["op"]
+                if op == "sub":
+                    conn.rooms.add(room)
+                    cls.subscribers.setdefault(room, set()).add(conn)
+                elif op == "unsub":
+                    conn.rooms.discard(room)
+                    cls.subscribers.get(room, set()).discard(conn)
+                elif op == "pub":
+                    for peer in list(cls.subscribers.get(room, ())):
+                        if peer is not conn:
+                            peer.relay(line)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            sender.cancel()
+            for room in conn.rooms:
+                peers = cls.subscribers.get(room)
+                if peers is not None:
+                    peers.discard(conn)
+                    if not peers:
+                        cls.subscribers.pop(room, None)
+            writer.close()
+
+    def relay(self, line: bytes):
+        if self.writer.is_closing():
+            return
+        try:
+            self.queue.put_nowait(line)
+        except asyncio.QueueFull:
+            self._drop("송신 큐 초과")
+
+    async def _send_loop(self):
+        while True:
+            self.writer.write(await self.queue.get())
+            # 쌓인 프레임은 한 번에 쓰고 drain 한 번
+            while not self.queue.empty():
+                self.writer.write(self.queue.get_nowait())
+            try:
+                await asyncio.wait_for(self.writer.drain(), BROKER_DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                self._drop("drain 시간 초과")
+                return
+            except ConnectionError:
+                return
+
+    def _drop(self, reason: str):
+        if self.writer.is_closing():
+            return
+        _BrokerConnection.dropped_peers += 1
+        print(f"pub/sub 브로커: 느린 워커 연결 끊음 ({reason})")
+        # close()는 쌓인 송신 버퍼를 다 보낼 때까지 기다리므로 abort. 수신 루프(serve)가 끝나며 구독 정리
+        self.writer.transport.abort()
+        # 대기 중인 프레임은 버림
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+
+class RedisBackend(PubSubBackend):
+    """
+    Redis 호환 서버의 pub/sub으로 노드 간 이벤트를 공유합니다.
+    자기 프로세스가 보낸 메시지는 origin으로 걸러냅니다. (로컬은 이미 전달됨)
+    - 연결이 끊기면 지수 백오프로 재연결하고 구독 중인 방을 모두 다시 구독
+    - 깨진 메시지는 로그만 남기고 건너뜀
+    - subscribe/unsubscribe 명령은 태스크로 추적하고, 실패하면 재연결로 구독 상태를 복구
+    """
+
+    def __init__(self, url: str, channel_prefix: str = "ws:room:",
+                 reconnect_delay: float = REDIS_RECONNECT_DELAY, max_reconnect_delay: float = REDIS_MAX_RECONNECT_DELAY):
+        self.url = url
+        self.channel_prefix = channel_prefix
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.origin = uuid.uuid4().hex
+        self._redis = None
+        self._pubsub = None
+        self._rooms: Set[int] = set()
+        self._commands: Set[asyncio.Task] = set()
+        self._stale = False
+        self._task: Optional[asyncio.Task] = None
+        self.reconnects = 0
+        self.command_failures = 0
+        self.bad_messages = 0
+
+    async def start(self, deliver: Deliver):
+        await super().start(deliver)
+        self._redis = self._connect()
+        self._task = asyncio.create_task(self._listen())
+
+    def _connect(self):
+        import redis.asyncio as redis  # 선택 의존성
+
+        return redis.from_url(self.url)
+
+    def subscribe(self, room: int):
+        self._rooms.add(room)
+        if self._pubsub is not None:
+            self._command(self._pubsub.subscribe(self._channel(room)))
+
+    def unsubscribe(self, room: int):
+        self._rooms.discard(room)
+        if self._pubsub is not None:
+            self._command(self._pubsub.unsubscribe(self._channel(room)))
+
+    async def publish(self, room: int, message: str, kind: Optional[str] = None):
+        await self._redis.publish(self._channel(room), json.dumps({"o": self.origin, "d": message, "k": kind}))
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+        for task in list(self._commands):
+            task.cancel()
+        await self._close_pubsub()
+        if self._redis is not None:
+            await self._redis.close()
+
+    def _channel(self, room: int) -> str:
+        return f"{self.channel_prefix}{room}"
+
+    def _command(self, coro):
+        # 참조를 잡아 두어 완료 전에 GC되지 않게 하고, 실패는 로그 + 재연결 표시
+        task = asyncio.get_running_loop().create_task(coro)
+        self._commands.add(task)
+        task.add_done_callback(self._command_done)
+
+    def _command_done(self, task: asyncio.Task):
+        self._commands.discard(task)
+        if task.cancelled() or task.exception() is None:
+            return
+        self.command_failures += 1
+        self._stale = True
+        print("Redis 구독 변경 실패 (재연결 후 다시 구독):", task.exception())
+
+    async def _close_pubsub(self):
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is not None:
+            try:
+                await pubsub.close()
+            except Exception:
+                pass
+
+    async def _listen(self):
+        delay = self.reconnect_delay
+        while True:
+            try:
+                if self._pubsub is None:
+                    self._stale = False
+                    self._pubsub = self._redis.pubsub()
+                    if self._rooms:
+                        await self._pubsub.subscribe(*(self._channel(room) for room in self._rooms))
+                if self._stale:
+                    raise ConnectionError("구독 변경 실패")
+                if not self._pubsub.subscribed:
+                    await asyncio.sleep(0.1)
+                    continue
+                msg = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                delay = self.reconnect_delay
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.reconnects += 1
+                print(f"Redis pub/sub 연결 오류 ({delay:.1f}초 후 재연결):", e)
+                await self._close_pubsub()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+            if msg and msg["type"] == "message":
+                await self._dispatch(msg)
+
+    async def _dispatch(self, msg: dict):
+        try:
+            envelope = json.loads(msg["data"])
+            if envelope["o"] == self.origin:
+                return
+            channel = msg["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            room = int(channel[len(self.channel_prefix):])
+            data, kind = envelope["d"], envelope.get("k")
+        except (ValueError, KeyError, TypeError) as e:
+            self.bad_messages += 1
+            print("Redis pub/sub 메시지 무시 (형식 오류):", e)
+            return
+        try:
+            await self._deliver(room, data, kind)
+        except Exception as e:
+            print("Redis pub/sub 전달 실패:", e)
+
+
+def create_pubsub_backend() -> PubSubBackend:
+    kind = os.getenv("WS_PUBSUB_BACKEND", "memory")
+    if kind == "local":
+        return LocalBrokerBackend(os.getenv("WS_PUBSUB_SOCKET", "/tmp/ocean-ws.sock"))
+    if kind == "redis":
+        return RedisBackend(os.getenv("WS_PUBSUB_REDIS_URL", "redis://localhost:6379/0"))
+    return InMemoryBackend()
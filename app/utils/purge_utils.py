@@ -0,0 +1,198 @@
+from sqlalchemy import delete, exists, func, select, update
+from sqlalchemy.orm import Session
+from datetime import timedelta
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+import asyncio
+import os
+
+from models import Users, RefreshToken, Thread, Message, Image
+from .storage_utils import image_storage
+from .cache_utils import recent_messages, token_versions
+
+# ---------------------------------------------------------------------
+# 스레드 / 회원 삭제 (숨김 → 백그라운드 정리)
+# - 요청은 threads.deleted_at만 채우고 바로 202 (그 순간부터 모든 조회/쓰기에서 제외)
+# - 정리 루프가 메시지/이미지를 PURGE_BATCH_SIZE씩 집합 DELETE로 지움 (배치마다 짧은 트랜잭션)
+#   ORM cascade처럼 행을 메모리에 올리거나 한 건씩 DELETE 하지 않음
+# - 진행 상태는 DB 자체(deleted_at이 있는 스레드 = 정리 대기) → 재시작해도 이어서 진행
+# - 탈퇴한 회원(users.deleted_at)은 스레드가 모두 정리된 뒤 삭제
+# ---------------------------------------------------------------------
+
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "1000"))
+PURGE_INTERVAL_SECONDS = int(os.getenv("PURGE_INTERVAL_SECONDS", "60"))
+# 배치 사이에 쉬어 복제 지연/잠금 경합을 줄임
+PURGE_PAUSE_SECONDS = float(os.getenv("PURGE_PAUSE_SECONDS", "0.05"))
+
+
+class PurgeProgress:
+    """이 워커의 누적 정리량 (스레드별 남은 양은 thread_deletion_status로 DB에서 확인)"""
+
+    def __init__(self):
+        self.threads = 0
+        self.messages = 0
+        self.images = 0
+        self.users = 0
+        self.current_thread_id: Optional[int] = None
+
+    def stats(self) -> dict:
+        return {
+            "threads": self.threads,
+            "messages": self.messages,
+            "images": self.images,
+            "users": self.users,
+            "current_thread_id": self.current_thread_id,
+        }
+
+
+purge_progress = PurgeProgress()
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_wakeup: Optional[asyncio.Event] = None
+
+
+def request_purge():
+    """삭제 요청 커밋 후 호출. 다음 주기를 기다리지 않고 정리를 시작합니다. (어느 스레드에서든 호출 가능)"""
+    if _loop is not None and _wakeup is not None:
+        _loop.call_soon_threadsafe(_wakeup.set)
+
+
+def hide_threads(db: Session, user_id: int, thread_id: Optional[int] = None) -> int:
+    """사용자의 스레드(또는 그중 하나)를 숨깁니다. 숨긴 개수를 반환하고 커밋은 호출한 쪽에서."""
+    stmt = update(Thread).where(Thread.owned_by(user_id)).values(deleted_at=func.now())
+    if thread_id is not None:
+        stmt = stmt.where(Thread.thread_id == thread_id)
+    hidden = db.execute(stmt.execution_options(synchronize_session=False)).rowcount
+    # 숨긴 스레드로의 재전송이 캐시된 스냅샷(200) 대신 404를 받도록 (다른 워커는 TTL 안에 만료)
+    recent_messages.invalidate_prefix((user_id,) if thread_id is None else (user_id, thread_id))
+    return hidden
+
+
+def thread_deletion_status(db: Session, user_id: int, thread_id: int) -> Optional[dict]:
+    """
+    숨긴 스레드의 정리 상태. 다른 사용자의 스레드, 삭제 요청이 없던 스레드, 없는 스레드면 None (404)
+    정리가 끝나면 행이 지워져 소유자를 알 수 없으므로 역시 None → 클라이언트는 404를 정리 완료로 봄
+    """
+    row = db.execute(
+        select(Thread.deleted_at).where(Thread.thread_id == thread_id, Thread.user_id == user_id)
+    ).first()
+    if row is None or row.deleted_at is None:
+        return None
+    remaining = db.scalar(select(func.count()).select_from(Message).where(Message.thread_id == thread_id))
+    return {"thread_id": thread_id, "status": "purging", "remaining_messages": remaining, "requested_at": row.deleted_at}
+
+
+def next_hidden_thread(db: Session) -> Optional[int]:
+    return db.scalar(
+        select(Thread.thread_id).where(Thread.deleted_at.is_not(None)).order_by(Thread.deleted_at, Thread.thread_id).limit(1)
+    )
+
+
+def purge_thread_batch(db: Session, thread_id: int, batch_size: int = PURGE_BATCH_SIZE) -> bool:
+    """
+    스레드의 메시지 batch_size개와 그 이미지를 지웁니다. 남은 메시지가 없으면 스레드 행을 지우고 True.
+    (SKIP LOCKED: 여러 워커가 같은 스레드를 정리해도 서로 다른 배치를 가져감)
+    """
+    ids = db.scalars(
+        select(Message.message_id)
+        .where(Message.thread_id == thread_id)
+        .order_by(Message.message_id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not ids:
+        # 빈 결과는 남은 메시지를 모두 다른 워커가 잠근 경우일 수도 있음.
+        # SKIP LOCKED 없이 잠가서 다시 확인 (그 워커가 커밋할 때까지 기다림). 남아 있으면 아직 지우지 않음
+        remaining = db.scalar(
+            select(Message.message_id).where(Message.thread_id == thread_id).limit(1).with_for_update()
+        )
+        if remaining is not None:
+            db.rollback()
+            return False
+        db.execute(
+            delete(Thread).where(Thread.thread_id == thread_id, Thread.deleted_at.is_not(None))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        purge_progress.threads += 1
+        return True
+
+    keys = set()
+    for image_url, thumbnail_url in db.execute(
+        select(Image.image_url, Image.thumbnail_url).where(Image.message_id.in_(ids))
+    ):
+        keys.add(image_url)
+        if thumbnail_url:
+            keys.add(thumbnail_url)
+    images = db.execute(
+        delete(Image).where(Image.message_id.in_(ids)).execution_options(synchronize_session=False)
+    ).rowcount
+    db.execute(delete(Message).where(Message.message_id.in_(ids)).execution_options(synchronize_session=False))
+    db.commit()
+    purge_progress.messages += len(ids)
+    purge_progress.images += images
+    _delete_objects(keys)
+    return False
+
+
+def _delete_objects(keys):
+    # 저장 키가 스레드 단위라 다른 스레드와 공유되지 않음. 실패해도 DB 정리는 계속 (고아 객체만 남음)
+    for key in keys:
+        try:
+            image_storage.delete(key)
+        except Exception as e:
+            print("이미지 객체 삭제 실패:", key, e)
+
+
+def purge_deleted_users(db: Session, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """
+    스레드가 모두 정리된 탈퇴 회원을 삭제합니다.
+    탈퇴 후 token_versions TTL이 지난 행만 지웁니다. 그때까지 다른 워커의 캐시가 모두 만료되어
+    캐시된 토큰도 DB에서 deleted_at을 보고 401이 됨 (지워진 행을 스냅샷으로 붙여 수정하는 일 없음)
+    """
+    cutoff = db.scalar(select(func.now())) - timedelta(seconds=token_versions.ttl_seconds)
+    ids: List[int] = db.scalars(
+        select(Users.user_id)
+        .where(Users.deleted_at <= cutoff, ~exists().where(Thread.user_id == Users.user_id))
+        .limit(batch_size)
+    ).all()
+    if ids:
+        db.execute(delete(RefreshToken).where(RefreshToken.user_id.in_(ids)).execution_options(synchronize_session=False))
+        db.execute(delete(Users).where(Users.user_id.in_(ids)).execution_options(synchronize_session=False))
+    db.commit()
+    purge_progress.users += len(ids)
+    return len(ids)
+
+
+async def thread_purger(session_factory, interval: int = PURGE_INTERVAL_SECONDS):
+    """정리 루프. main.py의 lifespan에서 DB 초기화가 끝난 뒤 실행됩니다. (시작하자마자 남은 작업부터)"""
+    global _loop, _wakeup
+    _loop = asyncio.get_running_loop()
+    _wakeup = asyncio.Event()
+
+    def run(fn, *args):
+        db = session_factory()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+
+    while True:
+        _wakeup.clear()
+        try:
+            while True:
+                thread_id = await run_in_threadpool(run, next_hidden_thread)
+                if thread_id is None:
+                    break
+                purge_progress.current_thread_id = thread_id
+                while not await run_in_threadpool(run, purge_thread_batch, thread_id):
+                    await asyncio.sleep(PURGE_PAUSE_SECONDS)
+            purge_progress.current_thread_id = None
+            await run_in_threadpool(run, purge_deleted_users)
+        except Exception as e:
+            purge_progress.current_thread_id = None
+            print("삭제 정리 실패:", e)
+        try:
+            await asyncio.wait_for(_wakeup.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,140 @@
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, Optional, Tuple
+import asyncio
+import os
+import random
+import threading
+import time
+
+from models import RefreshToken
+
+# ---------------------------------------------------------------------
+# 리프레시 토큰 폐기 목록 (프로세스 내부) + 만료된 행 정리
+# ---------------------------------------------------------------------
+
+class RevokedTokenSet:
+    """
+    폐기된 리프레시 토큰 해시를 16바이트 다이제스트로 압축해 보관합니다.
+    - 포함되어 있으면 DB 조회 없이 즉시 거절
+    - 회전된 토큰이면 family_id도 함께 보관 (재사용 시 패밀리 폐기)
+    - 없으면 DB로 확인 (다른 워커에서 폐기된 토큰일 수 있음)
+    정확한 집합이므로 정상 토큰을 잘못 거절하는 일(false positive)은 없습니다.
+    """
+
+    def __init__(self, max_size: int = 100000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, Tuple[float, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    @staticmethod
+    def _digest(token_hash: str) -> bytes:
+        return bytes.fromhex(token_hash)[:16]
+
+    def add(self, token_hash: str, expires_at: Optional[datetime] = None, family_id: Optional[str] = None):
+        if self.max_size <= 0:
+            return
+        expires_ts = _utc_timestamp(expires_at) if expires_at else time.time() + 86400
+        with self._lock:
+            self._entries[self._digest(token_hash)] = (expires_ts, family_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def lookup(self, token_hash: str) -> Optional[Tuple[float, Optional[str]]]:
+        """(만료 시각, 회전된 토큰의 family_id)를 반환합니다. 없으면 None."""
+        with self._lock:
+            entry = self._entries.get(self._digest(token_hash))
+            if entry is not None:
+                self.hits += 1
+            return entry
+
+    def contains(self, token_hash: str) -> bool:
+        return self.lookup(token_hash) is not None
+
+    def prune(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (expires_ts, _) in self._entries.items() if expires_ts <= now]
+            for key in expired:
+                del self._entries[key]
+            return len(expired)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits}
+
+
+def _utc_timestamp(value: datetime) -> float:
+    # DB의 expires_at은 naive UTC
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+
+revoked_tokens = RevokedTokenSet(max_size=int(os.getenv("REVOKED_TOKEN_CACHE_SIZE", "100000")))
+
+SWEEP_INTERVAL_SECONDS = int(os.getenv("REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS", "300"))
+SWEEP_BATCH_SIZE = int(os.getenv("REFRESH_TOKEN_SWEEP_BATCH_SIZE", "500"))
+
+
+def load_revoked_tokens(db: Session, limit: int) -> int:
+    """아직 만료되지 않은 폐기 토큰을 메모리 집합으로 불러옵니다. (워커 시작 시)"""
+    now = datetime.utcnow()
+    rows = db.execute(
+        select(RefreshToken.token_hash, RefreshToken.expires_at, RefreshToken.family_id, RefreshToken.replaced_by)
+        .where(RefreshToken.revoked == True, RefreshToken.expires_at > now)
+        .order_by(RefreshToken.expires_at.desc())
+        .limit(limit)
+    ).all()
+    for token_hash, expires_at, family_id, replaced_by in rows:
+        revoked_tokens.add(token_hash, expires_at, family_id if replaced_by else None)
+    return len(rows)
+
+
+def sweep_refresh_tokens_batch(db: Session, batch_size: int = SWEEP_BATCH_SIZE) -> int:
+    """
+    만료된 행을 batch_size만큼 삭제합니다.
+    폐기/회전된 행도 만료 전까지는 지우지 않습니다. 토큰 자체는 만료 전까지 유효한 서명이므로
+    행이 남아 있어야 재사용(회전된 토큰 재전송) 시 패밀리 전체를 폐기할 수 있습니다.
+    PK로 골라 짧은 트랜잭션에서 지우므로 긴 잠금이 생기지 않습니다.
+    (SKIP LOCKED: 여러 워커가 동시에 돌아도 같은 행을 두고 기다리지 않음)
+    """
+    ids = db.scalars(
+        select(RefreshToken.refresh_token_id)
+        .where(RefreshToken.expires_at <= datetime.utcnow())
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if ids:
+        db.execute(delete(RefreshToken).where(RefreshToken.refresh_token_id.in_(ids)))
+    db.commit()
+    return len(ids)
+
+
+async def refresh_token_sweeper(session_factory, interval: int = SWEEP_INTERVAL_SECONDS):
+    """
+    백그라운드 정리 루프. main.py의 lifespan에서 DB 초기화가 끝난 뒤 실행됩니다.
+    DB 작업은 스레드풀에서 배치 단위로 실행하고 배치 사이에 잠깐 쉬어 부하를 나눕니다.
+    """
+    def run(fn, *args):
+        db = session_factory()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+
+    try:
+        await run_in_threadpool(run, load_revoked_tokens, revoked_tokens.max_size)
+    except Exception as e:
+        print("폐기 토큰 목록 로드 실패:", e)
+    while True:
+        # 워커들이 동시에 깨어나지 않도록 지터
+        await asyncio.sleep(interval * random.uniform(0.8, 1.2))
+        try:
+            while await run_in_threadpool(run, sweep_refresh_tokens_batch) >= SWEEP_BATCH_SIZE:
+                await asyncio.sleep(0.1)
+            revoked_tokens.prune()
+        except Exception as e:
+            print("리프레시 토큰 정리 실패:", e)
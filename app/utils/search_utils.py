@@ -0,0 +1,184 @@
+from fastapi import HTTPException
+from sqlalchemy import func, literal, literal_column, null, select, table, column
+from sqlalchemy.dialects.mysql import match as mysql_match
+from sqlalchemy.orm import Session
+from bisect import bisect_right
+from typing import List, NamedTuple, Optional, Tuple
+import datetime
+import os
+import re
+
+from models import Thread, Message
+from .cache_utils import TTLCache
+
+# ---------------------------------------------------------------------
+# 전문 검색 (사용자 자신의 메시지 본문 / 스레드 제목)
+# - MySQL: FULLTEXT(ngram) 인덱스, MATCH ... AGAINST (BOOLEAN MODE) 점수 순
+# - SQLite: FTS5(trigram) 가상 테이블 (models/search_index.py), bm25 점수 순
+# 색인은 INSERT/DELETE 시점에 DB가 증분 갱신 (재구축 없음)
+# 결과는 (점수 DESC, id DESC) 키셋 페이지네이션 (순위는 짧게 캐시), 스니펫/강조 구간은 여기서 계산
+# ---------------------------------------------------------------------
+
+SEARCH_MAX_TERMS = int(os.getenv("SEARCH_MAX_TERMS", "8"))
+SEARCH_SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", "120"))
+# MySQL ngram_token_size(기본 2)보다 짧은 검색어는 색인으로 찾을 수 없음
+SEARCH_MIN_TERM_CHARS = int(os.getenv("SEARCH_MIN_TERM_CHARS", "2"))
+# 관련도 순으로 페이지를 넘길 수 있는 최대 결과 수
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "1000"))
+# SQLite trigram은 3글자 이상만 색인 사용, 더 짧은 검색어는 LIKE로 거름
+_TRIGRAM_CHARS = 3
+
+# 불리언 모드/FTS5 연산자로 해석되는 문자는 공백으로 (검색어는 항상 일반 문자열로만 취급)
+_OPERATOR_CHARS = re.compile(r'[+\-<>()~*"@^:]')
+
+
+# (종류, user_id, 검색어) -> 첫 페이지에서 계산한 순위 목록 (다음 페이지용, 첫 페이지는 항상 새로 계산)
+search_rankings = TTLCache(
+    max_size=int(os.getenv("SEARCH_CACHE_SIZE", "1024")),
+    ttl_seconds=int(os.getenv("SEARCH_CACHE_TTL_SECONDS", "60")),
+)
+
+
+class SearchRow(NamedTuple):
+    message_id: Optional[int]
+    thread_id: int
+    thread_title: str
+    text: str
+    created_at: datetime.datetime
+    score: float
+
+
+def parse_query(q: str) -> List[str]:
+    """검색어를 공백 기준으로 나눕니다. 모든 단어를 포함하는 결과만 찾습니다. (AND)"""
+    terms: List[str] = []
+    seen = set()
+    for term in _OPERATOR_CHARS.sub(" ", q).split():
+        if len(term) >= SEARCH_MIN_TERM_CHARS and term.lower() not in seen:
+            seen.add(term.lower())
+            terms.append(term)
+    if not terms:
+        raise HTTPException(status_code=400, detail=f"검색어는 {SEARCH_MIN_TERM_CHARS}글자 이상이어야 합니다.")
+    return terms[:SEARCH_MAX_TERMS]
+
+
+def _message_target(user_id: int):
+    # (순위 계산용 SELECT, 페이지 행 컬럼, id 컬럼, 본문 컬럼, SQLite FTS5 테이블)
+    ranking = select(Message.message_id).join(Thread, Thread.thread_id == Message.thread_id).where(Thread.owned_by(user_id))
+    page = (
+        select(Message.message_id, Message.thread_id, Thread.thread_title, Message.content.label("text"), Message.created_at)
+        .join(Thread, Thread.thread_id == Message.thread_id)
+        .where(Thread.owned_by(user_id))
+    )
+    return ranking, page, Message.message_id, Message.content, "message_fts"
+
+
+def _thread_target(user_id: int):
+    ranking = select(Thread.thread_id).where(Thread.owned_by(user_id))
+    page = select(
+        null().label("message_id"), Thread.thread_id, Thread.thread_title, Thread.thread_title.label("text"), Thread.created_at
+    ).where(Thread.owned_by(user_id))
+    return ranking, page, Thread.thread_id, Thread.thread_title, "thread_fts"
+
+
+SEARCH_TARGETS = {"message": _message_target, "thread": _thread_target}
+
+
+def _match(db: Session, stmt, id_col, text_col, fts: str, terms: List[str]):
+    """(점수 컬럼을 붙이고 검색 조건을 건 SELECT, 점수 식)"""
+    if db.get_bind().dialect.name == "mysql":
+        against = " ".join(f'+"{term}"' for term in terms)
+        score = mysql_match(text_col, against=against).in_boolean_mode()
+        # WHERE의 MATCH가 FULLTEXT 인덱스를 사용, SELECT의 같은 식은 한 번만 계산됨
+        return stmt.add_columns(score.label("score")).where(text_col.match(against)), score
+
+    indexed = [term for term in terms if len(term) >= _TRIGRAM_CHARS]
+    if indexed:
+        fts_table = table(fts, column("rowid"))
+        score = -func.bm25(literal_column(fts))  # bm25는 작을수록 관련도가 높음
+        stmt = stmt.join(fts_table, fts_table.c.rowid == id_col).where(
+            literal_column(fts).match(" ".join(f'"{term}"' for term in indexed))
+        )
+    else:
+        score = literal(0.0)
+    for term in terms:
+        if len(term) < _TRIGRAM_CHARS:
+            stmt = stmt.where(text_col.contains(term, autoescape=True))
+    return stmt.add_columns(score.label("score")), score
+
+
+def _ranking(db: Session, kind: str, user_id: int, terms: List[str], reuse: bool) -> List[Tuple[float, int]]:
+    """
+    (-점수, -id) 오름차순 = 관련도 순 상위 SEARCH_MAX_RESULTS개.
+    전문 검색 비용은 페이지 크기와 무관하게 일치하는 전체 문서 수에 비례하므로
+    다음 페이지(reuse)에서는 다시 계산하지 않고 첫 페이지의 (점수, id)를 씁니다.
+    """
+    key = (kind, user_id, tuple(term.lower() for term in terms))
+    ranking = search_rankings.get(key) if reuse else None
+    if ranking is None:
+        stmt, _, id_col, text_col, fts = SEARCH_TARGETS[kind](user_id)
+        stmt, score = _match(db, stmt, id_col, text_col, fts, terms)
+        rows = db.execute(stmt.order_by(score.desc(), id_col.desc()).limit(SEARCH_MAX_RESULTS)).all()
+        ranking = [(-float(row.score), -row[0]) for row in rows]
+        search_rankings.set(key, ranking)
+    return ranking
+
+
+def ranked_search(db: Session, kind: str, user_id: int, terms: List[str], limit: int,
+                  after: Optional[Tuple[float, int]] = None):
+    """
+    관련도 순 검색 한 페이지. after = 이전 페이지 마지막 (점수, id)
+    반환: (rows(각 행에 score), 다음 페이지 경계 또는 None)
+    """
+    ranking = _ranking(db, kind, user_id, terms, reuse=after is not None)
+    start = bisect_right(ranking, (-after[0], -after[1])) if after is not None else 0
+    window = ranking[start:start + limit]
+    if not window:
+        return [], None
+
+    _, page, id_col, _, _ = SEARCH_TARGETS[kind](user_id)
+    # 캐시 이후 삭제/숨김된 항목은 소유권 조건에서 빠짐
+    found = {row.thread_id if kind == "thread" else row.message_id: row
+             for row in db.execute(page.where(id_col.in_([-neg_id for _, neg_id in window])))}
+    rows = []
+    for neg_score, neg_id in window:
+        row = found.get(-neg_id)
+        if row is not None:
+            rows.append(SearchRow(*row, score=-neg_score))
+    has_more = start + limit < len(ranking)
+    last_score, last_id = window[-1]
+    return rows, ((-last_score, -last_id) if has_more else None)
+
+
+def make_snippet(text: str, terms: List[str], width: int = SEARCH_SNIPPET_CHARS) -> Tuple[str, List[List[int]]]:
+    """
+    첫 일치 위치를 중심으로 width 글자를 자르고, 스니펫 안의 일치 구간 [시작, 끝)을 돌려줍니다.
+    (HTML 태그를 넣지 않으므로 클라이언트가 안전하게 강조 표시)
+    """
+    lowered = text.lower()
+    spans = []
+    for term in sorted(terms, key=len, reverse=True):
+        needle = term.lower()
+        start = lowered.find(needle)
+        while start != -1:
+            end = start + len(needle)
+            if all(end <= s or start >= e for s, e in spans):
+                spans.append((start, end))
+            start = lowered.find(needle, end)
+    spans.sort()
+
+    if len(text) <= width:
+        begin, end = 0, len(text)
+    else:
+        first = spans[0][0] if spans else 0
+        begin = max(0, min(first - width // 3, len(text) - width))
+        end = begin + width
+    prefix = "…" if begin > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    snippet = prefix + text[begin:end] + suffix
+    offset = len(prefix) - begin
+    highlights = [
+        [max(s, begin) + offset, min(e, end) + offset]
+        for s, e in spans
+        if s < end and e > begin
+    ]
+    return snippet, highlights
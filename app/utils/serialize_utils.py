@@ -0,0 +1,32 @@
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from typing import Any, Iterable, List, Sequence
+import os
+
+# ---------------------------------------------------------------------
+# 목록 응답 빠른 경로 (OCEAN_FAST_JSON=1)
+# - response_model은 그대로 두어 OpenAPI 스키마는 변하지 않습니다.
+# - 행마다 pydantic 검증을 거치지 않고 필요한 컬럼만 뽑아 orjson으로 바로 직렬화합니다.
+# ---------------------------------------------------------------------
+
+FAST_JSON_ENABLED = os.getenv("OCEAN_FAST_JSON", "0") == "1"
+
+def model_fields(model) -> tuple:
+    """응답 스키마(pydantic v1)의 필드 이름. 직렬화 대상 컬럼과 항상 일치시킵니다."""
+    return tuple(model.__fields__)
+
+def rows_to_dicts(rows: Iterable[Any], fields: Sequence[str]) -> List[dict]:
+    # ORM 객체와 Row 모두 속성 접근을 지원합니다. (이미 dict로 만든 행은 그대로)
+    return [row if isinstance(row, dict) else {field: getattr(row, field) for field in fields} for row in rows]
+
+def list_response(rows: Iterable[Any], fields: Sequence[str], response: Response):
+    """
+    빠른 경로가 켜져 있으면 바로 직렬화한 ORJSONResponse를, 아니면 rows를 그대로 반환합니다.
+    (Response를 직접 반환하면 FastAPI가 주입한 response의 헤더가 빠지므로 복사합니다)
+    """
+    if not FAST_JSON_ENABLED:
+        return rows
+    fast = ORJSONResponse(rows_to_dicts(rows, fields))
+    for key, value in response.headers.items():
+        fast.headers[key] = value
+    return fast
@@ -0,0 +1,100 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+import os
+import shutil
+
+# ---------------------------------------------------------------------
+# 이미지 저장소 백엔드
+# - 업로드는 먼저 로컬 임시 파일로 스트리밍한 뒤 save_file로 최종 키에 옮깁니다.
+#   (백엔드가 파일을 메모리에 통째로 올리지 않도록 항상 경로를 넘김)
+# - IMAGE_STORAGE_BACKEND = local(기본, 개발/테스트) | s3 (S3 호환: AWS, MinIO, R2 …, boto3는 requirements-optional.txt)
+# - 키는 CDN 기준 경로 (threads/{thread_id}/{sha256}.jpg) → utils/cdn_utils.py가 서명
+# 블로킹 I/O이므로 호출하는 쪽에서 스레드풀로 실행합니다.
+# ---------------------------------------------------------------------
+
+class StorageBackend(ABC):
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def save_file(self, path: str, key: str, content_type: str):
+        """로컬 파일 path를 key로 저장합니다. 저장 후 path는 남지 않을 수 있습니다."""
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"잘못된 저장 키입니다: {key}")
+        return path
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def save_file(self, path: str, key: str, content_type: str):
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # 같은 파일시스템이면 rename (복사 없음), 내용이 같은 키라 덮어써도 무방
+        shutil.move(path, target)
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class S3Storage(StorageBackend):
+    """S3 호환 오브젝트 스토리지. 큰 파일은 boto3가 파일에서 읽어 멀티파트로 업로드합니다."""
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None):
+        import boto3  # 선택 의존성
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def save_file(self, path: str, key: str, content_type: str):
+        self.client.upload_file(
+            path, self.bucket, self._key(key),
+            ExtraArgs={"ContentType": content_type, "CacheControl": "public, max-age=31536000, immutable"},
+        )
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+
+def create_storage_backend() -> StorageBackend:
+    kind = os.getenv("IMAGE_STORAGE_BACKEND", "local")
+    if kind == "s3":
+        return S3Storage(
+            os.getenv("IMAGE_S3_BUCKET", ""),
+            prefix=os.getenv("IMAGE_S3_PREFIX", ""),
+            endpoint_url=os.getenv("IMAGE_S3_ENDPOINT_URL"),
+        )
+    return LocalStorage(os.getenv("IMAGE_STORAGE_DIR", "/data/images"))
+
+
+image_storage = create_storage_backend()
@@ -0,0 +1,138 @@
+from sqlalchemy import bindparam, case, func, or_, select, update
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, Tuple
+import os
+
+from models import Thread, Message
+
+# ---------------------------------------------------------------------
+# 스레드 목록 요약 (last_message_id / last_message_preview / message_count / last_activity_at)
+# - 메시지를 저장하는 트랜잭션 안에서 함께 갱신 (단건/일괄/WebSocket write-behind 모두)
+#   → 목록 화면이 스레드마다 list_messages(limit=1)를 부르지 않아도 됨
+# - "마지막 메시지"는 더 큰 message_id일 때만 바꿈 (동시 저장 순서가 뒤바뀌어도 되돌아가지 않음)
+# - 어긋난 값은 repair_thread_summaries로 메시지 테이블에서 다시 계산 (배포 후 백필 겸용)
+#   python -m utils.thread_summary_utils   (app 디렉터리에서 실행)
+# ---------------------------------------------------------------------
+
+THREAD_PREVIEW_CHARS = 100  # threads.last_message_preview 길이
+THREAD_SUMMARY_REPAIR_BATCH_SIZE = int(os.getenv("THREAD_SUMMARY_REPAIR_BATCH_SIZE", "500"))
+
+threads = Thread.__table__
+_newer = or_(threads.c.last_message_id.is_(None), threads.c.last_message_id < bindparam("b_message_id"))
+
+# 한 스레드에 새 메시지 b_count개, 그중 가장 최근이 b_message_id
+# (MySQL은 SET을 왼쪽부터 적용하며 앞에서 바꾼 값을 읽으므로 last_message_id는 마지막에 갱신)
+_apply_new_messages = (
+    update(threads)
+    .where(threads.c.thread_id == bindparam("b_thread_id"))
+    .ordered_values(
+        (threads.c.message_count, threads.c.message_count + bindparam("b_count")),
+        (threads.c.last_message_preview, case((_newer, bindparam("b_preview")), else_=threads.c.last_message_preview)),
+        (threads.c.last_activity_at, case((_newer, func.now()), else_=threads.c.last_activity_at)),
+        (threads.c.last_message_id, case((_newer, bindparam("b_message_id")), else_=threads.c.last_message_id)),
+    )
+)
+
+
+_last_message_created_at = (
+    select(Message.created_at).where(Message.message_id == bindparam("b_message_id")).scalar_subquery()
+)
+
+
+def preview(content: str) -> str:
+    return content[:THREAD_PREVIEW_CHARS]
+
+
+def record_new_messages(db: Session, messages: Iterable[Tuple[int, int, str]]):
+    """
+    새로 INSERT한 메시지 (thread_id, message_id, content)를 스레드 요약에 반영합니다.
+    스레드당 UPDATE 한 문장 (executemany), 커밋은 호출한 쪽에서 INSERT와 함께.
+    """
+    summary: Dict[int, list] = {}
+    for thread_id, message_id, content in messages:
+        entry = summary.get(thread_id)
+        if entry is None:
+            summary[thread_id] = [1, message_id, content]
+            continue
+        entry[0] += 1
+        if message_id > entry[1]:
+            entry[1], entry[2] = message_id, content
+    if not summary:
+        return
+    # 스레드 id 순으로 갱신 (여러 스레드를 잠그는 배치끼리 교착 방지)
+    db.execute(_apply_new_messages, [
+        {"b_thread_id": thread_id, "b_count": count, "b_message_id": message_id, "b_preview": preview(content)}
+        for thread_id, (count, message_id, content) in sorted(summary.items())
+    ])
+
+
+def repair_thread_summaries(db: Session, batch_size: int = THREAD_SUMMARY_REPAIR_BATCH_SIZE, after_id: int = 0) -> int:
+    """
+    모든 스레드의 요약을 메시지 테이블 기준으로 다시 계산합니다. (thread_id 순 배치, 배치마다 커밋)
+    배치의 스레드 행을 먼저 잠가 그 사이 저장되는 메시지의 증분 갱신과 섞이지 않게 합니다.
+    반환: 갱신한 스레드 수
+    """
+    repaired = 0
+    while True:
+        ids = db.scalars(
+            select(threads.c.thread_id)
+            .where(threads.c.thread_id > after_id, threads.c.deleted_at.is_(None))
+            .order_by(threads.c.thread_id)
+            .limit(batch_size)
+            .with_for_update()
+        ).all()
+        if not ids:
+            db.commit()
+            return repaired
+
+        counts = {
+            thread_id: (count, last_id)
+            for thread_id, count, last_id in db.execute(
+                select(Message.thread_id, func.count(), func.max(Message.message_id))
+                .where(Message.thread_id.in_(ids))
+                .group_by(Message.thread_id)
+            )
+        }
+        last = {
+            row.message_id: row
+            for row in db.execute(
+                select(Message.message_id, Message.content)
+                .where(Message.message_id.in_([last_id for _, last_id in counts.values()]))
+            )
+        } if counts else {}
+
+        params = []
+        for thread_id in ids:
+            count, last_id = counts.get(thread_id, (0, None))
+            row = last.get(last_id)
+            params.append({
+                "b_thread_id": thread_id,
+                "b_count": count,
+                "b_message_id": last_id,
+                "b_preview": preview(row.content) if row is not None else None,
+            })
+        db.execute(
+            update(threads)
+            .where(threads.c.thread_id == bindparam("b_thread_id"))
+            .values(
+                message_count=bindparam("b_count"),
+                last_message_id=bindparam("b_message_id"),
+                last_message_preview=bindparam("b_preview"),
+                # 마지막 메시지 시각을 DB 안에서 그대로 복사 (메시지가 없으면 생성 시각)
+                # 파이썬 datetime으로 다시 바인딩하면 저장 형식이 달라져 활동 순 커서 비교가 어긋남
+                last_activity_at=func.coalesce(_last_message_created_at, threads.c.created_at, func.now()),
+            ),
+            params,
+        )
+        db.commit()
+        repaired += len(ids)
+        after_id = ids[-1]
+        print(f"스레드 요약 복구: {repaired}개 (thread_id <= {after_id})")
+
+
+if __name__ == "__main__":
+    from database.database import SessionLocal
+
+    with SessionLocal() as session:
+        total = repair_thread_summaries(session)
+    print(f"스레드 요약 복구 완료: {total}개")
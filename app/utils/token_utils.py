@@ -1,5 +1,6 @@
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import APIKeyHeader
 from dotenv import load_dotenv
 from models import Users, RefreshToken
@@ -7,8 +8,13 @@ from datetime import datetime, timedelta, timezone
 from schemas import UserCreate, UserRegister
 from jwt import ExpiredSignatureError, InvalidTokenError
 from .hash_utils import _token_hash
-from database import get_db
-import os,jwt
+from .cache_utils import token_cache, token_versions
+from .revocation_utils import revoked_tokens
+from .keyring_utils import keyring
+from database import get_db, get_async_db
+from sqlalchemy import select, update
+from dataclasses import dataclass
+import os,jwt,uuid
 
 load_dotenv()
 TOKEN_PEPPER = os.getenv("TOKEN_PEPPER")
@@ -16,29 +22,38 @@ TOKEN_PEPPER = os.getenv("TOKEN_PEPPER")
 
 class AuthHandler:
     def __init__(self):
-        self.secret_key = os.getenv("TOKEN_SECRET_KEY")
-        self.algorithm = os.getenv("TOKEN_ALGORITHM")
+        # 서명/검증 키는 키링에서 (HS*: TOKEN_SECRET_KEY, RS256/ES256/EdDSA: kid별 키)
+        self.keyring = keyring
         self.access_token_expire_minutes = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
         self.refresh_token_expire_days = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS"))
         self.api_key_header = APIKeyHeader(name="Authorization")
 
-    def encode_token(self, user_id: int, expires_delta: timedelta, token_type: str) -> str:
+    def encode_token(self, user_id: int, expires_delta: timedelta, token_type: str, claims: dict | None = None) -> str:
         now = datetime.utcnow()
         encode_payload ={
             'sub' : str(user_id),
             'iat' : int(now.timestamp()),
             'exp' : int((now + expires_delta).timestamp()),
-            'type': token_type
+            'type': token_type,
+            'jti' : uuid.uuid4().hex,  # 같은 초에 발급돼도 토큰(해시)이 겹치지 않도록
         }
-        return jwt.encode(encode_payload, self.secret_key, algorithm=self.algorithm)
+        if claims:
+            encode_payload.update(claims)
+        key, algorithm, headers = self.keyring.signing()
+        return jwt.encode(encode_payload, key, algorithm=algorithm, headers=headers)
 
     def decode_token(self, token: str, refresh: bool = False) -> dict:
         try:
-            decode_payload= jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            # kid에 해당하는 (캐시된) 키와 그 키의 알고리즘으로만 검증
+            verification = self.keyring.verification(jwt.get_unverified_header(token).get("kid"))
+            if verification is None:
+                raise HTTPException(status_code=401, detail="유효하지 않은 토큰입니다.")
+            key, algorithm = verification
+            decode_payload= jwt.decode(token, key, algorithms=[algorithm])
             return decode_payload
         except ExpiredSignatureError:
             if refresh:
-                decode_payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm], options={"verify_exp": False})
+                decode_payload = jwt.decode(token, key, algorithms=[algorithm], options={"verify_exp": False})
                 return decode_payload
             else:
                 raise HTTPException(status_code=401, detail="토큰이 만료되었습니다.")
@@ -46,15 +61,26 @@ class AuthHandler:
             raise HTTPException(status_code=401, detail="유효하지 않은 토큰입니다.")
             
 ### 엑세스 토큰 생성 ###
-    def create_access_token(self, user_id: int) -> str:
-        return self.encode_token(user_id, timedelta(minutes=self.access_token_expire_minutes), token_type="access")
+    def create_access_token(self, user_id: int, claims: dict | None = None) -> str:
+        # claims: access_claims(...) 결과 (get_current_principal이 DB 없이 읽는 값)
+        return self.encode_token(user_id, timedelta(minutes=self.access_token_expire_minutes), token_type="access", claims=claims)
+
+    @staticmethod
+    def access_claims(user) -> dict:
+        """Users 객체나 (token_version, chat_theme, dark_mode) 컬럼 Row에서 액세스 토큰 클레임을 만듭니다."""
+        return {
+            'ver'  : user.token_version,
+            'prefs': {'chat_theme': bool(user.chat_theme), 'dark_mode': bool(user.dark_mode)},
+        }
 
 ### 리프레시 토큰 생성 ###
     def create_refresh_token(self, user_id: int) -> str:
         return self.encode_token(user_id, timedelta(days=self.refresh_token_expire_days), token_type="refresh")
 
 ### 토큰 저장 ###
-    def save_token(self, db: Session, user_id: int, token: str, expires_at: datetime | None= None):
+    def save_token(self, db: Session, user_id: int, token: str, expires_at: datetime | None= None,
+                   family_id: str | None = None, generation: int = 0):
+        # family_id가 없으면 새 로그인 세션 (새 토큰 패밀리)
         if expires_at is None:
             expires_at = datetime.utcnow() + timedelta(days=self.refresh_token_expire_days)
         token_hash = _token_hash(token)
@@ -64,7 +90,9 @@ class AuthHandler:
             expires_at=expires_at,
             last_used_at=None,
             revoked=False,
-            replaced_by=None
+            replaced_by=None,
+            family_id=family_id or uuid.uuid4().hex,
+            generation=generation,
         )
         db.add(refresh_token)
         db.flush()
@@ -77,6 +105,13 @@ class AuthHandler:
             raise HTTPException(status_code=401, detail="리프레시 토큰이 아닙니다.")
 
         token_hash = _token_hash(token)
+        # 이 워커에서 폐기/회전된 토큰은 DB 조회 없이 거절
+        revoked = revoked_tokens.lookup(token_hash)
+        if revoked is not None:
+            family_id = revoked[1]
+            if family_id:
+                self._reject_reuse(db, token_hash=token_hash, expires_at=None, family_id=family_id)
+            raise HTTPException(status_code=401, detail="무효화된 리프레시 토큰입니다.")
         refresh_token = db.query(RefreshToken).filter(RefreshToken.token_hash == token_hash).first()
         if not refresh_token:
             raise HTTPException(status_code=401, detail="등록되지 않은 리프레시 토큰입니다.")
@@ -91,10 +126,11 @@ class AuthHandler:
         now = datetime.utcnow()
         if refresh_token.expires_at <= now:
             raise HTTPException(status_code=401, detail="리프레시 토큰이 만료되었습니다.")
+        if refresh_token.replaced_by:
+            self._reject_reuse(db, token_hash=token_hash, expires_at=refresh_token.expires_at, family_id=refresh_token.family_id)
         if refresh_token.revoked:
+            revoked_tokens.add(token_hash, refresh_token.expires_at)
             raise HTTPException(status_code=401, detail="무효화된 리프레시 토큰입니다.")
-        if refresh_token.replaced_by:
-            raise HTTPException(status_code=401, detail="이미 회전된 리프레시 토큰입니다.")
 
         return payload
 
@@ -102,23 +138,76 @@ class AuthHandler:
     def rotate_refresh_token(self, db: Session, old_token: str, user_id: int) -> tuple[str, str]:
         old_hash = _token_hash(old_token)
         refresh_token = (db.query(RefreshToken).with_for_update().filter_by(token_hash=old_hash, user_id=user_id).first())
+        if refresh_token and refresh_token.replaced_by:
+            # 검증과 회전 사이에 다른 요청이 먼저 회전시킴 → 동시 재사용도 같은 방식으로 처리
+            self._reject_reuse(db, token_hash=old_hash, expires_at=refresh_token.expires_at, family_id=refresh_token.family_id)
         if not refresh_token or refresh_token.revoked:
             raise HTTPException(status_code=401, detail="회전할 리프레시 토큰이 유효하지 않습니다.")
-        if refresh_token.replaced_by:
-            raise HTTPException(status_code=401, detail="이미 회전된 리프레시 토큰입니다.")
 
-            # 새 토큰 발급
+        # 새 토큰 발급
         new_refresh = self.create_refresh_token(user_id)
-        new_access = self.create_access_token(user_id)
+        # 회전 시점의 버전/설정으로 클레임을 다시 채움 (설정 변경은 다음 회전부터 반영)
+        claims_row = db.execute(
+            select(Users.token_version, Users.chat_theme, Users.dark_mode).where(Users.user_id == user_id)
+        ).first()
+        if claims_row is None:
+            raise HTTPException(status_code=401, detail="회전할 리프레시 토큰이 유효하지 않습니다.")
+        new_access = self.create_access_token(user_id, self.access_claims(claims_row))
 
-        # 새 토큰 저장
-        new_refresh_token = self.save_token(db, user_id, new_refresh)
+        # 새 토큰 저장 (같은 패밀리, 다음 세대)
+        if not refresh_token.family_id:
+            refresh_token.family_id = uuid.uuid4().hex  # 패밀리 도입 이전에 발급된 토큰
+        new_refresh_token = self.save_token(
+            db, user_id, new_refresh,
+            family_id=refresh_token.family_id, generation=refresh_token.generation + 1,
+        )
 
         # 기존 토큰 폐기 + 연결
         refresh_token.revoked = True
         refresh_token.replaced_by = new_refresh_token.token_hash
         refresh_token.last_used_at = datetime.utcnow()
+        revoked_tokens.add(old_hash, refresh_token.expires_at, refresh_token.family_id)
         return new_access, new_refresh
+
+### 회전된 토큰 재사용 → 탈취로 보고 패밀리 전체 폐기 ###
+    def _reject_reuse(self, db: Session, *, token_hash: str, expires_at: datetime | None, family_id: str | None):
+        # 재사용 탐지는 DB의 회전 기록(replaced_by)이나 이 워커의 폐기 목록 중 하나만 있으면 동작
+        # (행은 만료 전까지 정리되지 않음, utils/revocation_utils.py)
+        if expires_at is not None:
+            revoked_tokens.add(token_hash, expires_at, family_id)
+        if family_id:
+            self.revoke_family(db, family_id)  # UPDATE 한 번
+            db.commit()
+        raise HTTPException(status_code=401, detail="이미 회전된 리프레시 토큰입니다.")
+
+### 토큰 패밀리 폐기 (재사용 탐지) ###
+    def revoke_family(self, db: Session, family_id: str) -> int:
+        result = db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id, RefreshToken.revoked == False)
+            .values(revoked=True, last_used_at=datetime.utcnow())
+        )
+        return result.rowcount
+
+### 사용자 전체 세션 폐기 (모든 기기 로그아웃) ###
+    def revoke_all_for_user(self, db: Session, user_id: int) -> int:
+        result = db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user_id, RefreshToken.revoked == False)
+            .values(revoked=True, last_used_at=datetime.utcnow())
+        )
+        # 이미 발급된 액세스 토큰도 함께 무효화
+        self.bump_token_version(db, user_id)
+        return result.rowcount
+
+### 액세스 토큰 일괄 무효화 (로그아웃-올 / 비밀번호 변경) ###
+    def bump_token_version(self, db: Session, user_id: int):
+        # 커밋 후 invalidate_user_tokens(user_id)를 호출해 이 워커의 캐시를 비웁니다.
+        db.execute(
+            update(Users)
+            .where(Users.user_id == user_id)
+            .values(token_version=Users.token_version + 1)
+        )
     
 
 authorization = APIKeyHeader(name="Authorization", auto_error=False)
@@ -126,12 +215,107 @@ auth_handler = AuthHandler()
     
 ### 유저 조회 ###    
 def get_current_user(bearer_token: str = Depends(authorization), db: Session = Depends(get_db)) -> Users:
+    return _resolve_user(db, _bearer_token(bearer_token))
+
+### 유저 조회 (비동기 세션) ###
+async def get_current_user_async(bearer_token: str = Depends(authorization), db: AsyncSession = Depends(get_async_db)) -> Users:
+    token = _bearer_token(bearer_token)
+    # 동일한 조회 로직을 async 드라이버 위에서 실행 (스레드 점유 없음)
+    return await db.run_sync(_resolve_user, token)
+
+### 토큰 주체 조회 (Users 조회 없음) ###
+@dataclass(frozen=True)
+class Principal:
+    """
+    액세스 토큰 클레임만으로 만든 불변 주체.
+    사용자 행을 수정하지 않는 엔드포인트는 get_current_user 대신 이것을 사용합니다.
+    prefs는 토큰 발급 시점의 값입니다. (최신 값은 /users/me)
+    """
+    user_id: int
+    token_version: int
+    chat_theme: bool
+    dark_mode: bool
+
+def get_current_principal(bearer_token: str = Depends(authorization), db: Session = Depends(get_db)) -> Principal:
+    return _verify_principal(db, _principal_from_token(_bearer_token(bearer_token)))
+
+async def get_current_principal_async(bearer_token: str = Depends(authorization), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    principal = _principal_from_token(_bearer_token(bearer_token))
+    current = token_versions.get(principal.user_id)
+    if current is None:
+        current = await db.run_sync(_load_token_version, principal.user_id)
+    return _check_token_version(principal, current)
+
+def invalidate_user_tokens(user_id: int):
+    """
+    token_version 변경/사용자 삭제 후 이 워커의 캐시를 비웁니다.
+    모든 인증 경로(get_current_user, get_current_principal, WebSocket)가 요청마다 token_versions로
+    버전을 확인하므로, 다른 워커에서도 TOKEN_VERSION_CACHE_TTL_SECONDS(기본 10초) 안에 거절됩니다.
+    (토큰 캐시 TTL과는 무관, 0으로 두면 매 요청 DB에서 확인)
+    """
+    token_versions.invalidate(user_id)
+    token_cache.invalidate_user(user_id)
+
+def _principal_from_token(token: str) -> Principal:
+    payload = auth_handler.decode_token(token)
+    if payload.get("type") != "access":
+        raise HTTPException(status_code=401, detail="액세스 토큰이 아닙니다")
+    try:
+        prefs = payload.get("prefs") or {}
+        return Principal(
+            user_id=int(payload["sub"]),
+            token_version=int(payload.get("ver", 0)),
+            chat_theme=bool(prefs.get("chat_theme", False)),
+            dark_mode=bool(prefs.get("dark_mode", False)),
+        )
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise HTTPException(status_code=401, detail="토큰에 사용자 정보가 없습니다")
+
+def _verify_principal(db: Session, principal: Principal) -> Principal:
+    return _check_token_version(principal, _current_token_version(db, principal.user_id))
+
+def _current_token_version(db: Session, user_id: int) -> int:
+    current = token_versions.get(user_id)
+    if current is None:
+        current = _load_token_version(db, user_id)
+    return current
+
+def _load_token_version(db: Session, user_id: int) -> int:
+    # PK 조회. TTL 동안 캐시되어 대부분의 요청에서는 실행되지 않음
+    row = db.execute(select(Users.token_version, Users.deleted_at).where(Users.user_id == user_id)).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    if row.deleted_at is not None:
+        # 탈퇴 처리 중인 사용자는 캐시하지 않음 (행이 정리되기 전까지 항상 여기서 거절)
+        raise HTTPException(status_code=401, detail="무효화된 토큰입니다")
+    token_versions.set(user_id, row.token_version)
+    return row.token_version
+
+def _check_token_version(principal: Principal, current: int) -> Principal:
+    if principal.token_version != current:
+        raise HTTPException(status_code=401, detail="무효화된 토큰입니다")
+    return principal
+
+def _bearer_token(bearer_token: str | None) -> str:
     if not bearer_token:
         raise HTTPException(status_code=401, detail="인증 정보가 없습니다")
     if not bearer_token.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Bearer 토큰이 필요합니다")
+    return bearer_token.split(" ", 1)[1]
 
-    token = bearer_token.split(" ", 1)[1]
+def _resolve_user(db: Session, token: str) -> Users:
+    # 캐시 히트 시 JWT 디코딩과 Users 조회를 모두 생략
+    # 토큰 버전은 get_current_principal과 같은 캐시로 확인 (다른 워커의 로그아웃-올/비밀번호 변경/탈퇴 반영)
+    snapshot = token_cache.get(token)
+    if snapshot is not None and snapshot["deleted_at"] is None:
+        user_id = snapshot["user_id"]
+        try:
+            if snapshot["token_version"] != _current_token_version(db, user_id):
+                raise HTTPException(status_code=401, detail="무효화된 토큰입니다")
+        except HTTPException:
+            token_cache.invalidate_user(user_id)
+            raise
+        return _user_from_snapshot(db, snapshot)
 
     try:
         payload = auth_handler.decode_token(token) 
@@ -148,7 +332,11 @@ def get_current_user(bearer_token: str = Depends(authorization), db: Session = D
         user = db.query(Users).filter(Users.user_id == int(user_id)).first()
         if not user:
             raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+        if int(payload.get("ver", 0)) != user.token_version or user.deleted_at is not None:
+            raise HTTPException(status_code=401, detail="무효화된 토큰입니다")
 
+        token_versions.set(user.user_id, user.token_version)
+        token_cache.set(token, user.user_id, _user_snapshot(user), exp=payload.get("exp"))
         return user
 
     except ExpiredSignatureError:
@@ -157,3 +345,15 @@ def get_current_user(bearer_token: str = Depends(authorization), db: Session = D
         raise
     except Exception as e:
         raise HTTPException(status_code=403, detail=f"예상치 못한 오류: {str(e)}")
+
+### 캐시용 사용자 스냅샷 ###
+def _user_snapshot(user: Users) -> dict:
+    return {attr.key: getattr(user, attr.key) for attr in Users.__mapper__.column_attrs}
+
+def _user_from_snapshot(db: Session, snapshot: dict) -> Users:
+    # 스냅샷으로 detached 객체를 만든 뒤 SELECT 없이 세션에 붙입니다.
+    # (이후 수정/삭제 시 일반 ORM 객체와 동일하게 동작)
+    # 탈퇴한 사용자의 스냅샷은 캐시하지 않으며, 행 삭제는 버전 캐시 TTL이 지난 뒤 (utils/purge_utils.py)
+    user = Users(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
@@ -0,0 +1,146 @@
+from typing import Dict, Tuple
+import time
+
+from database.instrumentation import SQL_TRACE_ENABLED, sql_stats, start_trace, end_trace
+from database.pool import pool_status
+
+# ---------------------------------------------------------------------
+# 요청별 SQL 계측 - HTTP 쪽 (OCEAN_SQL_TRACE=1)
+# - 응답 헤더: X-SQL-Statements, Server-Timing (db / pool / app)
+# - 라우트별 누적값을 Prometheus 텍스트 형식으로 /metrics에 노출 (커넥션 풀 지표는 항상 포함)
+# 엔진 이벤트는 database/instrumentation.py, 커넥션 풀 지표는 database/pool.py
+# ---------------------------------------------------------------------
+
+SQL_STATEMENTS_HEADER = "X-SQL-Statements"
+
+
+class RouteMetrics:
+    """
+    (method, route) 단위 누적값. 갱신은 이벤트 루프 스레드에서만 일어납니다.
+    route는 경로 템플릿(/threads/{thread_id}/messages)이라 라벨 수가 늘어나지 않습니다.
+    워커 프로세스마다 별도로 집계됩니다.
+    """
+
+    def __init__(self):
+        # (method, route, status) -> [요청 수, 요청 시간, SQL 문 수, DB 시간, 풀 대기 시간]
+        self._series: Dict[Tuple[str, str, int], list] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float, trace):
+        series = self._series.get((method, route, status))
+        if series is None:
+            series = self._series[(method, route, status)] = [0, 0.0, 0, 0.0, 0.0]
+        series[0] += 1
+        series[1] += seconds
+        series[2] += trace.statements
+        series[3] += trace.db_seconds
+        series[4] += trace.pool_wait_seconds
+
+    def render(self, engines: Dict[str, object] = None, replica_sets=()) -> str:
+        metrics = (
+            ("ocean_http_requests_total", "counter", "HTTP 요청 수", 0),
+            ("ocean_http_request_seconds_total", "counter", "HTTP 요청 처리 시간 합계", 1),
+            ("ocean_sql_statements_total", "counter", "요청 중 실행된 SQL 문 수", 2),
+            ("ocean_sql_seconds_total", "counter", "요청 중 SQL 실행 시간 합계", 3),
+            ("ocean_db_pool_wait_seconds_total", "counter", "요청 중 커넥션 풀 대기 시간 합계", 4),
+        )
+        lines = []
+        for name, kind, help_text, index in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (method, route, status), series in self._series.items():
+                lines.append(f'{name}{{method="{method}",route="{_escape(route)}",status="{status}"}} {series[index]}')
+        lines.append("# HELP ocean_sql_slow_queries_total OCEAN_SLOW_QUERY_MS 이상 걸린 SQL 문 수")
+        lines.append("# TYPE ocean_sql_slow_queries_total counter")
+        lines.append(f"ocean_sql_slow_queries_total {sql_stats.slow_queries}")
+        lines.append("# HELP ocean_sql_process_statements_total 프로세스 전체 SQL 문 수 (백그라운드 작업 포함)")
+        lines.append("# TYPE ocean_sql_process_statements_total counter")
+        lines.append(f"ocean_sql_process_statements_total {sql_stats.statements}")
+        lines.extend(render_pool_metrics(engines or {}))
+        lines.append("# HELP ocean_db_replica_up 읽기 복제본 상태 (1: 라우팅 대상, 0: 제외)")
+        lines.append("# TYPE ocean_db_replica_up gauge")
+        for kind, replica_set in replica_sets:
+            for name, healthy in replica_set.healthy.items():
+                lines.append(f'ocean_db_replica_up{{engine="{kind}",replica="{_escape(name)}"}} {int(healthy)}')
+        return "\n".join(lines) + "\n"
+
+
+_POOL_METRICS = (
+    ("ocean_db_pool_size", "gauge", "풀 기본 크기", "size"),
+    ("ocean_db_pool_checked_out", "gauge", "사용 중인 커넥션 수", "checked_out"),
+    ("ocean_db_pool_idle", "gauge", "풀에서 대기 중인 유휴 커넥션 수", "idle"),
+    ("ocean_db_pool_overflow", "gauge", "기본 크기를 넘는 커넥션 수 (음수면 아직 만들지 않은 기본 커넥션)", "overflow"),
+    ("ocean_db_pool_checkouts_total", "counter", "커넥션 체크아웃 수", "checkouts"),
+    ("ocean_db_pool_checkout_seconds_total", "counter", "체크아웃 대기 시간 합계", "checkout_seconds"),
+    ("ocean_db_pool_timeouts_total", "counter", "pool_timeout 초과로 실패한 체크아웃 수", "timeouts"),
+    ("ocean_db_pool_pings_total", "counter", "유휴 커넥션 ping 수", "pings"),
+    ("ocean_db_pool_ping_failures_total", "counter", "ping 실패로 다시 연결한 수", "ping_failures"),
+    ("ocean_db_pool_shrunk_total", "counter", "유휴 축소로 닫은 커넥션 수", "shrunk"),
+)
+
+
+def render_pool_metrics(engines: Dict[str, object]) -> list:
+    statuses = {name: pool_status(engine) for name, engine in engines.items()}
+    lines = []
+    for name, kind, help_text, key in _POOL_METRICS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for engine_name, status in statuses.items():
+            lines.append(f'{name}{{engine="{engine_name}"}} {status[key]}')
+    return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+route_metrics = RouteMetrics()
+
+
+class SQLTraceMiddleware:
+    """HTTP 요청마다 SQLTrace를 만들고 응답 헤더와 라우트별 지표에 반영합니다. (순수 ASGI)"""
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: Dict[object, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        trace, token = start_trace(f'{scope["method"]} {scope["path"]}')
+        status = 500
+
+        async def send_with_trace(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                app_ms = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"x-sql-statements", str(trace.statements).encode()))
+                headers.append((b"server-timing", (
+                    f'db;dur={trace.db_seconds * 1000:.2f};desc="{trace.statements} queries", '
+                    f"pool;dur={trace.pool_wait_seconds * 1000:.2f}, app;dur={app_ms:.2f}"
+                ).encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            end_trace(token)
+            route_metrics.observe(scope["method"], self._route_path(scope), status, time.perf_counter() - started, trace)
+
+    def _route_path(self, scope) -> str:
+        # 라우팅 후 scope["endpoint"]가 채워짐 → 해당 라우트의 경로 템플릿
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            path = next(
+                (route.path for route in scope["app"].routes if getattr(route, "endpoint", None) is endpoint),
+                "unmatched",
+            )
+            self._route_paths[endpoint] = path
+        return path
@@ -0,0 +1,156 @@
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Callable, List, Optional
+import asyncio
+import os
+import time
+
+# ---------------------------------------------------------------------
+# Write-behind 큐 (WebSocket chat 이벤트 저장용)
+# - 이벤트 루프에서는 큐에 넣고 Future만 받음 → 수신 루프가 DB를 기다리지 않음
+# - 전용 태스크가 batch_ms 동안 또는 batch_size개가 모일 때까지 묶어서
+#   스레드풀에서 한 번의 트랜잭션으로 저장 (동기 세션이라 이벤트 루프를 막지 않도록)
+# - 큐가 가득 차면 넣는 쪽이 기다림 (소켓 단위 배압)
+# - 배치 트랜잭션이 실패하면 항목별로 다시 저장 → 문제 항목만 실패 (같은 배치의 다른 사용자는 영향 없음)
+# - close(): 새 항목을 받지 않고 남은 항목을 모두 저장한 뒤 종료
+# ---------------------------------------------------------------------
+
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WS_PERSIST_BATCH_SIZE", "200"))
+WRITE_BEHIND_BATCH_MS = float(os.getenv("WS_PERSIST_BATCH_MS", "20"))
+WRITE_BEHIND_QUEUE_SIZE = int(os.getenv("WS_PERSIST_QUEUE_SIZE", "10000"))
+
+_STOP = object()
+
+
+class WriteBehindClosed(RuntimeError):
+    pass
+
+
+class WriteBehindQueue:
+    """
+    write_batch(db, items) -> 항목별 결과 리스트 (같은 순서, 실패한 항목은 예외 객체)
+    세션은 session_factory()로 배치마다 새로 열고 닫습니다.
+    """
+
+    def __init__(self, write_batch: Callable[[Any, List[Any]], List[Any]], session_factory: Callable[[], Any],
+                 batch_size: int = WRITE_BEHIND_BATCH_SIZE, batch_ms: float = WRITE_BEHIND_BATCH_MS,
+                 queue_size: int = WRITE_BEHIND_QUEUE_SIZE):
+        self.write_batch = write_batch
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.batch_seconds = batch_ms / 1000
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._full: Optional[asyncio.Event] = None
+        self._closed = False
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+        self.retried_batches = 0
+        self.write_seconds = 0.0
+
+    async def submit(self, item) -> asyncio.Future:
+        """항목을 큐에 넣고, 저장 결과를 받을 Future를 반환합니다."""
+        if self._closed:
+            raise WriteBehindClosed("저장 큐가 종료되었습니다.")
+        if self._task is None:
+            self._queue = asyncio.Queue(self.queue_size)
+            self._full = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        if self._queue.qsize() >= self.batch_size:
+            self._full.set()
+        return future
+
+    async def _run(self):
+        while True:
+            entry = await self._queue.get()
+            if entry is _STOP:
+                return
+            batch = [entry]
+            # batch_ms 동안 모으되, batch_size개가 쌓이면 (submit이 _full을 켜서) 바로 저장
+            if self._queue.qsize() + 1 < self.batch_size:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.batch_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            stopping = False
+            while len(batch) < self.batch_size and not self._queue.empty():
+                entry = self._queue.get_nowait()
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch):
+        items = [item for item, _ in batch]
+        started = time.perf_counter()
+        try:
+            results = await run_in_threadpool(self._write, items)
+        except Exception as e:
+            if len(items) == 1:
+                results = [e]
+            else:
+                print("write-behind 배치 저장 실패, 항목별로 재시도:", e)
+                self.retried_batches += 1
+                results = await run_in_threadpool(self._write_each, items)
+        self.write_seconds += time.perf_counter() - started
+        self.batches += 1
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(result)
+            else:
+                self.written += 1
+                if not future.done():
+                    future.set_result(result)
+
+    def _write(self, items):
+        db = self.session_factory()
+        try:
+            return self.write_batch(db, items)
+        finally:
+            db.close()
+
+    def _write_each(self, items):
+        results = []
+        for item in items:
+            try:
+                results.extend(self._write([item]))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending(),
+            "batches": self.batches,
+            "written": self.written,
+            "failed": self.failed,
+            "retried_batches": self.retried_batches,
+            "write_seconds": self.write_seconds,
+        }
+
+    async def close(self):
+        """새 항목을 받지 않고, 남은 항목을 모두 저장한 뒤 종료합니다. (main.py의 lifespan 종료 시)"""
+        self._closed = True
+        if self._task is None:
+            return
+        # 종료 표식은 큐의 맨 뒤 → 앞선 항목이 모두 저장된 다음에 루프가 끝남
+        await self._queue.put(_STOP)
+        self._full.set()
+        await self._task
+        # 큐가 가득 차 기다리던 submit이 종료 표식 뒤에 넣은 항목
+        while not self._queue.empty():
+            entry = self._queue.get_nowait()
+            if entry is not _STOP and not entry[1].done():
+                entry[1].set_exception(WriteBehindClosed("저장 큐가 종료되었습니다."))
@@ -0,0 +1,24 @@
+# 벤치마크 스크립트 공용: app/을 import 경로에 넣고 앱 모듈 import에 필요한 환경변수 기본값을 채움
+import os
+import sys
+from typing import Optional
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "app")
+
+_DEFAULTS = {
+    "TOKEN_SECRET_KEY": "bench-secret",
+    "TOKEN_ALGORITHM": "HS256",
+    "CURSOR_SECRET_KEY": "bench-cursor-secret",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "REFRESH_TOKEN_EXPIRE_DAYS": "7",
+    "IMAGE_STORAGE_BACKEND": "local",
+}
+
+
+def setup(url: Optional[str]):
+    """url이 없으면 OCEAN_* 환경변수의 MySQL (운영과 같은 인덱스/옵티마이저로 재려면 MySQL 권장)"""
+    if url:
+        os.environ["OCEAN_DATABASE_URL"] = url
+    for key, value in _DEFAULTS.items():
+        os.environ.setdefault(key, value)
+    sys.path.insert(0, os.path.abspath(APP_DIR))
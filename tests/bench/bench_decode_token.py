@@ -0,0 +1,98 @@
+"""
+알고리즘별 decode_token 처리량 (utils/token_utils.py AuthHandler + utils/keyring_utils.py KeyRing)
+
+    python tests/bench/bench_decode_token.py
+    python tests/bench/bench_decode_token.py --tokens 20000 --threads 4 --rsa-bits 3072
+
+HS256(TOKEN_SECRET_KEY)과 RS256 / ES256(P-256) / EdDSA(Ed25519) 키를 임시 TOKEN_KEYS_DIR에 만들어
+알고리즘마다 같은 AuthHandler에 키링만 바꿔 끼우고, 미리 발급한 --tokens개의 토큰을 검증합니다.
+- 1 thread: 요청 하나의 인증 비용 (µs/토큰)
+- --threads: 스레드풀에서 동시에 검증할 때의 초당 처리량 (서명 검증이 GIL을 놓는지에 따라 달라짐)
+서명(encode_token) 비용도 함께 출력합니다. (로그인/갱신 때만 발생)
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import _env
+
+
+def _write_pem(keys_dir: str, kid: str, private_key):
+    from cryptography.hazmat.primitives import serialization
+
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    with open(os.path.join(keys_dir, f"{kid}.pem"), "wb") as f:
+        f.write(pem)
+
+
+def _keyrings(keys_dir: str, rsa_bits: int):
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+    from utils.keyring_utils import KeyRing
+
+    keys = {
+        "RS256": rsa.generate_private_key(public_exponent=65537, key_size=rsa_bits),
+        "ES256": ec.generate_private_key(ec.SECP256R1()),
+        "EdDSA": ed25519.Ed25519PrivateKey.generate(),
+    }
+    rings = {"HS256": KeyRing("HS256", secret_key=os.environ["TOKEN_SECRET_KEY"])}
+    for algorithm, private_key in keys.items():
+        # 알고리즘마다 디렉터리를 나눠 키링이 자기 키 하나만 보도록
+        directory = os.path.join(keys_dir, algorithm)
+        os.mkdir(directory)
+        kid = f"bench-{algorithm.lower()}"
+        _write_pem(directory, kid, private_key)
+        rings[algorithm] = KeyRing(algorithm, keys_dir=directory, active_kid=kid)
+    return rings
+
+
+def _rate(fn, items, threads: int) -> float:
+    """items를 모두 처리하는 데 걸린 시간 기준 초당 처리 수"""
+    started = time.perf_counter()
+    if threads == 1:
+        for item in items:
+            fn(item)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for _ in pool.map(fn, items, chunksize=max(len(items) // (threads * 8), 1)):
+                pass
+    return len(items) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite://", help="앱 모듈 import용 DB URL (DB에는 접속하지 않음)")
+    parser.add_argument("--tokens", type=int, default=5000, help="알고리즘당 검증할 토큰 수")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--rsa-bits", type=int, default=2048)
+    args = parser.parse_args()
+    _env.setup(args.url)
+
+    from utils.token_utils import AuthHandler
+
+    handler = AuthHandler()
+    expires = timedelta(minutes=30)
+    print(f"tokens={args.tokens} rounds={args.rounds} threads=1/{args.threads} rsa={args.rsa_bits}bit")
+    print(f"{'algorithm':<8} {'sign µs':>9} {'verify µs':>10} {'1 thread/s':>12} {f'{args.threads} threads/s':>12} {'size':>6}")
+
+    with tempfile.TemporaryDirectory() as keys_dir:
+        for algorithm, ring in _keyrings(keys_dir, args.rsa_bits).items():
+            handler.keyring = ring
+            started = time.perf_counter()
+            tokens = [handler.encode_token(i, expires, token_type="access", claims={"ver": 0}) for i in range(args.tokens)]
+            sign_us = (time.perf_counter() - started) / args.tokens * 1e6
+            assert handler.decode_token(tokens[0])["sub"] == "0"
+
+            single = statistics.median(_rate(handler.decode_token, tokens, 1) for _ in range(args.rounds))
+            pooled = statistics.median(_rate(handler.decode_token, tokens, args.threads) for _ in range(args.rounds))
+            print(f"{algorithm:<8} {sign_us:>9.1f} {1e6 / single:>10.1f} {single:>12,.0f} {pooled:>12,.0f} {len(tokens[0]):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+메시지 목록: 키셋(커서) vs OFFSET 페이지 조회 시간 비교
+
+    python tests/bench/gen_messages.py --url sqlite:///bench.db --messages 1000000
+    python tests/bench/bench_pagination.py --url sqlite:///bench.db --thread-id 1
+
+키셋은 route/message.py의 _list_messages를 그대로 호출하고, OFFSET은 같은 쿼리에서
+경계 조건 대신 OFFSET을 쓴 버전입니다. 깊이(앞에서 건너뛴 메시지 수)별 중앙값을 출력합니다.
+"""
+import argparse
+import statistics
+import time
+
+import _env
+
+
+def _median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="SQLAlchemy DB URL (기본: OCEAN_* 환경변수)")
+    parser.add_argument("--thread-id", type=int, required=True, help="gen_messages.py가 출력한 thread_id")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--depths", default="0,1000,10000,100000,500000,900000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    _env.setup(args.url)
+
+    from sqlalchemy import func, select
+    from database.database import SessionLocal
+    from models import Message, Thread
+    from route.message import _list_messages, _owned_thread_messages
+    from utils.cursor_utils import encode_cursor
+
+    with SessionLocal() as db:
+        user_id = db.scalar(select(Thread.user_id).where(Thread.thread_id == args.thread_id))
+        total = db.scalar(select(func.count()).select_from(Message).where(Message.thread_id == args.thread_id))
+        print(f"thread_id={args.thread_id} messages={total:,} limit={args.limit} repeat={args.repeat}")
+        print(f"{'depth':>10} {'keyset ms':>10} {'offset ms':>10} {'ratio':>8}")
+
+        for depth in (int(d) for d in args.depths.split(",")):
+            if depth + args.limit > total:
+                continue
+            # 깊이 depth 페이지의 경계 (클라이언트가 앞 페이지에서 받은 커서와 같음). 측정에서 제외
+            boundary = db.scalar(
+                select(Message.message_id).where(Message.thread_id == args.thread_id)
+                .order_by(Message.message_id.desc()).offset(depth).limit(1)
+            ) + 1
+            cursor = encode_cursor(f"m:{args.thread_id}", boundary, "before")
+
+            def keyset():
+                rows, _, _ = _list_messages(db, user_id, args.thread_id, args.limit, None, cursor)
+                assert len(rows) == args.limit
+
+            def offset():
+                page = (
+                    _owned_thread_messages(user_id, args.thread_id)
+                    .order_by(Message.message_id.desc()).offset(depth).limit(args.limit + 1).subquery()
+                )
+                rows = db.execute(select(*page.c).order_by(page.c.message_id.asc())).all()
+                assert len(rows) >= args.limit
+
+            keyset_ms = _median_ms(keyset, args.repeat)
+            offset_ms = _median_ms(offset, args.repeat)
+            print(f"{depth:>10,} {keyset_ms:>10.2f} {offset_ms:>10.2f} {offset_ms / keyset_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+SQL 계측(OCEAN_SQL_TRACE) 켜짐/꺼짐 요청 처리 시간 비교 (목표: 켜짐 오버헤드 2% 미만)
+
+    python tests/bench/gen_messages.py --url sqlite:///bench.db --messages 10000
+    python tests/bench/bench_sql_trace.py --url sqlite:///bench.db --thread-id 1
+
+계측 여부는 import 시점에 정해지므로 설정마다 별도 프로세스를 띄웁니다. (꺼짐/켜짐을 번갈아 --rounds번)
+각 프로세스는 route/message.py 라우터(+ 켜짐이면 SQLTraceMiddleware)만 올린 앱에
+GET /threads/{thread_id}/messages를 --requests번 보내고 요청당 중앙값을 출력합니다.
+(ASGI 앱을 직접 호출하므로 소켓/서버 비용은 빠져 있어 실제 서버보다 비율이 크게 나옵니다)
+요청 단위 차이는 측정 잡음보다 작을 수 있으므로, 같은 프로세스에서 SELECT 1에 붙는
+리스너 비용(문장당 µs)도 함께 출력합니다. (요청당 문장 수를 곱하면 요청당 추가 비용)
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import _env
+
+
+def _measure(args):
+    """자식 프로세스: 요청당 처리 시간(µs) 목록과 요청당 SQL 문 수(켜짐일 때)를 JSON으로 출력"""
+    import httpx
+    from fastapi import FastAPI
+    from sqlalchemy import select
+    from database.database import SessionLocal
+    from models import Thread, Users
+    from route.message import router
+    from utils.token_utils import auth_handler
+    from utils.trace_utils import SQL_TRACE_ENABLED, SQLTraceMiddleware
+
+    app = FastAPI()
+    app.include_router(router)
+    if SQL_TRACE_ENABLED:
+        app.add_middleware(SQLTraceMiddleware)
+
+    with SessionLocal() as db:
+        user = db.execute(
+            select(Users.user_id, Users.token_version, Users.chat_theme, Users.dark_mode)
+            .join(Thread, Thread.user_id == Users.user_id)
+            .where(Thread.thread_id == args.thread_id)
+        ).one()
+    headers = {"Authorization": "Bearer " + auth_handler.create_access_token(user.user_id, auth_handler.access_claims(user))}
+    path = f"/threads/{args.thread_id}/messages?limit={args.limit}"
+
+    async def run():
+        samples, statements = [], None
+        async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+            for i in range(args.warmup + args.requests):
+                started = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                elapsed = time.perf_counter() - started
+                assert response.status_code == 200, response.text
+                if i >= args.warmup:
+                    samples.append(elapsed * 1e6)
+                    statements = response.headers.get("X-SQL-Statements", statements)
+        return {"samples": samples, "statements": int(statements) if statements else None}
+
+    print(json.dumps(asyncio.run(run())))
+
+
+def _statement_overhead(url: str, count: int = 20000, rounds: int = 5):
+    """리스너 없는 엔진과 있는 엔진에서 SELECT 1 한 번에 걸린 시간(µs) 중앙값"""
+    from sqlalchemy import create_engine, text
+    from database.instrumentation import install_sql_trace, start_trace, end_trace
+
+    plain, traced = create_engine(url), create_engine(url)
+    install_sql_trace(traced)
+
+    def per_statement(engine):
+        with engine.connect() as conn:
+            started = time.perf_counter()
+            for _ in range(count):
+                conn.execute(text("SELECT 1"))
+            return (time.perf_counter() - started) / count * 1e6
+
+    trace, token = start_trace("bench")
+    try:
+        samples = {plain: [], traced: []}
+        for _ in range(rounds):
+            for engine in (plain, traced):
+                samples[engine].append(per_statement(engine))
+    finally:
+        end_trace(token)
+    return statistics.median(samples[plain]), statistics.median(samples[traced])
+
+
+def _child(args, trace: bool):
+    env = {**os.environ, "OCEAN_SQL_TRACE": "1" if trace else "0", "HASH_POOL_ENABLED": "0"}
+    command = [sys.executable, os.path.abspath(__file__), "--child", "--thread-id", str(args.thread_id),
+               "--requests", str(args.requests), "--warmup", str(args.warmup), "--limit", str(args.limit)]
+    if args.url:
+        command += ["--url", args.url]
+    output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="SQLAlchemy DB URL (기본: OCEAN_* 환경변수)")
+    parser.add_argument("--thread-id", type=int, required=True, help="gen_messages.py가 출력한 thread_id")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    _env.setup(args.url)
+
+    if args.child:
+        _measure(args)
+        return
+
+    medians = {False: [], True: []}
+    statements = None
+    for round_no in range(1, args.rounds + 1):
+        for trace in (False, True):
+            result = _child(args, trace)
+            medians[trace].append(statistics.median(result["samples"]))
+            statements = result["statements"] or statements
+        print(f"round {round_no}: off {medians[False][-1]:.0f}µs  on {medians[True][-1]:.0f}µs")
+
+    off, on = statistics.median(medians[False]), statistics.median(medians[True])
+    print(f"thread_id={args.thread_id} limit={args.limit} requests={args.requests}x{args.rounds}")
+    print(f"trace off {off:.0f}µs/req, on {on:.0f}µs/req → {on - off:+.0f}µs ({(on - off) / off * 100:+.2f}%)")
+
+    from database.database import SQLALCHEMY_DATABASE_URL
+    plain, traced = _statement_overhead(SQLALCHEMY_DATABASE_URL)
+    listener = traced - plain
+    print(f"SELECT 1: {plain:.1f}µs → {traced:.1f}µs (리스너 {listener:+.1f}µs/문장)")
+    print(f"요청당 SQL {statements}문 × 리스너 비용 = {statements * listener:+.0f}µs ({statements * listener / off * 100:+.2f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+WebSocket chat 저장: 메시지마다 커밋 vs write-behind 배치 (route/message.py의 chat_writer)
+
+    python tests/bench/bench_write_behind.py --url sqlite:///bench_chat.db --clients 1000 --messages 5
+    WS_PERSIST_BATCH_SIZE=500 WS_PERSIST_BATCH_MS=50 python tests/bench/bench_write_behind.py --url sqlite:///bench_chat.db
+
+클라이언트마다 사용자/스레드를 하나씩 만들고 모두 동시에 --messages개씩 (0~--jitter-ms 간격으로) 보냅니다.
+- per-message: 이벤트마다 _create_message를 스레드풀에서 실행 (메시지마다 트랜잭션 하나)
+- batched: chat_writer와 같은 WriteBehindQueue(_persist_chat_batch)
+  배치 크기/주기는 WS_PERSIST_BATCH_SIZE / WS_PERSIST_BATCH_MS (앱과 같은 환경변수)
+전송부터 저장 완료(ack를 보내는 시점)까지의 지연과 초당 저장 수를 출력합니다.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import _env
+
+
+async def _simulate(send, clients: int, messages: int, jitter_ms: float):
+    latencies = []
+
+    async def client(index):
+        for n in range(messages):
+            await asyncio.sleep(random.uniform(0, jitter_ms) / 1000)
+            started = time.perf_counter()
+            await send(index, n)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(index) for index in range(clients)))
+    return time.perf_counter() - started, latencies
+
+
+def _report(name, elapsed, latencies, extra=""):
+    ordered = sorted(latencies)
+    p50 = ordered[len(ordered) // 2] * 1000
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000
+    print(f"{name:<12} {len(latencies) / elapsed:>9,.0f} msg/s   p50 {p50:>8.1f}ms   p99 {p99:>8.1f}ms   {extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="SQLAlchemy DB URL (기본: OCEAN_* 환경변수)")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=5, help="클라이언트당 메시지 수")
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    args = parser.parse_args()
+    _env.setup(args.url)
+
+    from sqlalchemy import func, insert, select
+    from starlette.concurrency import run_in_threadpool
+    from database.database import SessionLocal, engine
+    from database.init_db import create_schema
+    from models import Message, Thread, Users
+    from route.message import _create_message, _persist_chat_batch
+    from schemas import MessageCreate
+    from utils.write_behind_utils import WriteBehindQueue
+
+    create_schema(engine)
+    run_id = f"{time.time():.0f}"
+    with SessionLocal() as db:
+        user_ids = [
+            db.execute(insert(Users).values(username=f"bench{i}", email=f"chat-{run_id}-{i}@bench.local", password_hash="!")).inserted_primary_key[0]
+            for i in range(args.clients)
+        ]
+        thread_ids = [
+            db.execute(insert(Thread).values(user_id=user_id, thread_title="chat bench")).inserted_primary_key[0]
+            for user_id in user_ids
+        ]
+        db.commit()
+
+    def body(mode, index, n):
+        return MessageCreate(content=f"chat {index}-{n}", client_message_id=f"{mode}-{index}-{n}")
+
+    def create_one(index, n):
+        with SessionLocal() as db:
+            _create_message(db, user_ids[index], thread_ids[index], body("single", index, n))
+
+    async def per_message():
+        async def send(index, n):
+            await run_in_threadpool(create_one, index, n)
+        return await _simulate(send, args.clients, args.messages, args.jitter_ms)
+
+    async def batched():
+        queue = WriteBehindQueue(_persist_chat_batch, SessionLocal)
+
+        async def send(index, n):
+            await (await queue.submit((user_ids[index], thread_ids[index], body("batched", index, n))))
+
+        result = await _simulate(send, args.clients, args.messages, args.jitter_ms)
+        await queue.close()
+        return result, queue
+
+    print(f"clients={args.clients} messages/client={args.messages} jitter=0-{args.jitter_ms:g}ms")
+    elapsed, latencies = asyncio.run(per_message())
+    _report("per-message", elapsed, latencies, f"({len(latencies)} commits)")
+
+    (elapsed, latencies), queue = asyncio.run(batched())
+    stats = queue.stats()
+    _report("batched", elapsed, latencies,
+            f"({stats['batches']} batches, avg {stats['written'] / max(stats['batches'], 1):.0f}/batch, "
+            f"size={queue.batch_size} ms={queue.batch_seconds * 1000:g})")
+
+    with SessionLocal() as db:
+        stored = db.scalar(select(func.count()).select_from(Message).where(Message.thread_id.in_(thread_ids)))
+    assert stored == 2 * args.clients * args.messages, stored
+    print(f"저장된 행: {stored:,} (두 방식 합계, 누락 없음), 배치당 쓰기 평균 {stats['write_seconds'] / max(stats['batches'], 1) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+키셋 vs OFFSET 벤치마크용 데이터 생성 (tests/bench/bench_pagination.py)
+
+    python tests/bench/gen_messages.py --url sqlite:///bench.db --messages 1000000
+
+한 사용자의 스레드 하나에 메시지를 몰아 넣습니다. (OFFSET이 가장 불리한 경우: 깊은 페이지)
+--url을 생략하면 OCEAN_* 환경변수의 DB를 사용합니다.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import _env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="SQLAlchemy DB URL (기본: OCEAN_* 환경변수)")
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--email", default="bench@example.com")
+    args = parser.parse_args()
+    _env.setup(args.url)
+
+    from sqlalchemy import insert, select
+    from database.database import SessionLocal, engine
+    from database.init_db import create_schema
+    from models import Message, Thread, Users
+
+    create_schema(engine)
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        user_id = db.scalar(select(Users.user_id).where(Users.email == args.email))
+        if user_id is None:
+            user_id = db.execute(
+                insert(Users).values(username="bench", email=args.email, password_hash="!")
+            ).inserted_primary_key[0]
+        thread_id = db.execute(
+            insert(Thread).values(user_id=user_id, thread_title=f"bench {args.messages}")
+        ).inserted_primary_key[0]
+
+        base = datetime(2024, 1, 1)
+        for start in range(0, args.messages, args.batch):
+            end = min(start + args.batch, args.messages)
+            db.execute(insert(Message), [
+                {
+                    "thread_id": thread_id,
+                    "sender_type": "user" if i % 2 == 0 else "assistant",
+                    "content": f"benchmark message {i}",
+                    "created_at": base + timedelta(seconds=i),
+                }
+                for i in range(start, end)
+            ])
+            db.commit()
+            print(f"\r{end:,}/{args.messages:,}", end="", flush=True)
+
+    print(f"\nuser_id={user_id} thread_id={thread_id} ({time.perf_counter() - started:.1f}초)")
+
+
+if __name__ == "__main__":
+    main()
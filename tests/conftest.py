@@ -0,0 +1,131 @@
+# tests/conftest.py
+# SQLite 파일 DB + TestClient로 main.app 전체를 띄워 라우트 단위로 검증합니다.
+#   pip install -r app/requirements-dev.txt
+#   pytest                      (sync 라우터)
+#   OCEAN_DB_ASYNC=1 pytest     (AsyncSession 라우터, aiosqlite)
+import os
+import sys
+import tempfile
+import types
+
+_DB_DIR = tempfile.mkdtemp(prefix="ocean-test-")
+_DB_PATH = os.path.join(_DB_DIR, "ocean.db")
+
+# app 모듈은 import 시점에 환경변수를 읽으므로 가장 먼저 설정
+for key, value in {
+    "TOKEN_SECRET_KEY": "test-secret-key-0123456789abcdef",
+    "TOKEN_ALGORITHM": "HS256",
+    "TOKEN_PEPPER": "test-pepper",
+    "CURSOR_SECRET_KEY": "test-cursor-key",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "REFRESH_TOKEN_EXPIRE_DAYS": "7",
+    "BCRYPT_ROUNDS": "4",
+    "HASH_POOL_ENABLED": "0",
+    "OCEAN_DATABASE_URL": f"sqlite:///{_DB_PATH}",
+    "OCEAN_ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{_DB_PATH}",
+    "OCEAN_SQL_TRACE": "1",
+    "IMAGE_STORAGE_BACKEND": "local",
+    "IMAGE_STORAGE_DIR": os.path.join(_DB_DIR, "images"),
+    "IMAGE_UPLOAD_TMP_DIR": _DB_DIR,
+    "WS_PUBSUB_BACKEND": "memory",
+}.items():
+    os.environ.setdefault(key, value)
+
+# 모델 서빙 라우터(route/model.py)는 저장소에 포함되지 않아 빈 라우터로 대신함
+try:
+    import route.model  # noqa: F401
+except ImportError:
+    from fastapi import APIRouter
+
+    _model = types.ModuleType("route.model")
+    _model.model_router = APIRouter()
+    sys.modules["route.model"] = _model
+
+import anyio
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from database.base import Base
+from database.database import engine, ASYNC_DB_ENABLED
+from database.init_db import create_schema
+
+ASYNC_MODE = ASYNC_DB_ENABLED
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _schema():
+    create_schema(engine)
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _clean_state():
+    """테스트마다 모든 테이블과 프로세스 내 캐시를 비웁니다."""
+    yield
+    from utils.cache_utils import token_cache, token_versions, recent_messages
+    from utils.revocation_utils import revoked_tokens
+    from utils.search_utils import search_rankings
+
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    token_cache.clear()
+    for cache in (token_versions, recent_messages, search_rankings, revoked_tokens):
+        cache._entries.clear()
+
+
+@pytest.fixture
+def client():
+    # lifespan(백그라운드 정리 작업)은 띄우지 않음. 필요한 테스트는 함수를 직접 호출
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def ws_client(client):
+    """uvicorn처럼 모든 요청/소켓이 하나의 이벤트 루프를 공유 (lifespan 없이)"""
+    from route.message import chat_writer
+
+    with anyio.from_thread.start_blocking_portal(**client.async_backend) as portal:
+        client.portal = portal
+        yield client
+        client.portal = None
+    # 저장 태스크는 닫힌 루프에 묶여 있으므로 다음 테스트에서 새로 시작
+    chat_writer._task = chat_writer._queue = chat_writer._full = None
+
+
+def signup(client, email="user@example.com", password="pw-1234", username="user"):
+    r = client.post("/auth/signup", json={
+        "username": username, "email": email, "password": password, "chat_theme": False, "dark_mode": False,
+    })
+    assert r.status_code == 201, r.text
+    return r.json()
+
+
+def login(client, email="user@example.com", password="pw-1234"):
+    r = client.post("/auth/login", data={"username": email, "password": password})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def bearer(tokens) -> dict:
+    return {"Authorization": "Bearer " + tokens["access_token"]}
+
+
+@pytest.fixture
+def user(client):
+    """가입 + 로그인한 사용자의 토큰"""
+    signup(client)
+    return login(client)
+
+
+@pytest.fixture
+def auth(user):
+    return bearer(user)
+
+
+@pytest.fixture
+def thread_id(client, auth):
+    r = client.post("/threads/threads", headers=auth, json={"thread_title": "첫 스레드"})
+    assert r.status_code == 200, r.text
+    return r.json()["thread_id"]
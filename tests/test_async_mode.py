@@ -0,0 +1,61 @@
+# OCEAN_DB_ASYNC=1: AsyncSession 기반 라우터로 교체 (main.py, database/database.py)
+import anyio.to_thread
+import pytest
+from fastapi.routing import APIRoute
+
+import main
+from conftest import ASYNC_MODE
+from database.database import get_async_db, get_db
+
+# 모드에 따라 교체되는 라우터 (auth의 signup/login은 두 모드 공용)
+SWITCHED_PREFIXES = ("/users", "/threads", "/auth/refresh", "/auth/logout", "/search")
+
+
+def _dependency_calls(dependant):
+    for dep in dependant.dependencies:
+        yield dep.call
+        yield from _dependency_calls(dep)
+
+
+def _switched_routes():
+    routes = [
+        route for route in main.app.routes
+        if isinstance(route, APIRoute) and route.path.startswith(SWITCHED_PREFIXES)
+    ]
+    assert routes
+    return routes
+
+
+@pytest.mark.parametrize("route", _switched_routes(), ids=lambda route: f"{sorted(route.methods)[0]} {route.path}")
+def test_routes_use_the_configured_session(route):
+    calls = set(_dependency_calls(route.dependant))
+    expected, other = (get_async_db, get_db) if ASYNC_MODE else (get_db, get_async_db)
+    assert expected in calls and other not in calls
+    if ASYNC_MODE:
+        assert route.endpoint.__name__.endswith("_async")
+
+
+@pytest.fixture
+def threadpool_calls(monkeypatch):
+    calls = []
+    run_sync = anyio.to_thread.run_sync
+
+    async def counting(func, *args, **kwargs):
+        calls.append(getattr(func, "__name__", repr(func)))
+        return await run_sync(func, *args, **kwargs)
+
+    monkeypatch.setattr(anyio.to_thread, "run_sync", counting)
+    return calls
+
+
+def test_async_mode_does_not_pin_worker_threads(client, auth, thread_id, threadpool_calls):
+    client.get("/threads/threads", headers=auth)  # 토큰 버전 캐시
+    threadpool_calls.clear()
+    assert client.post(f"/threads/{thread_id}/messages", json={"content": "hi"}, headers=auth).status_code == 200
+    assert client.get(f"/threads/{thread_id}/messages", headers=auth).status_code == 200
+    assert client.get("/threads/threads", headers=auth).status_code == 200
+    if ASYNC_MODE:
+        assert threadpool_calls == []
+    else:
+        # 동기 라우터는 요청마다 스레드풀 (핸들러 + get_db)
+        assert len(threadpool_calls) >= 3
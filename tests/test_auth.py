@@ -0,0 +1,90 @@
+# 가입/로그인과 bcrypt 해싱 서비스 (utils/hash_utils.py)
+import asyncio
+
+import pytest
+
+from conftest import login, signup
+from database.database import SessionLocal
+from models import Users
+from utils import hash_utils
+from utils.hash_utils import PasswordHasher, password_hasher
+
+
+def _stored_hash(email="user@example.com") -> str:
+    with SessionLocal() as db:
+        return db.query(Users.password_hash).filter(Users.email == email).scalar()
+
+
+def test_signup_then_login(client):
+    signup(client)
+    tokens = login(client)
+    assert tokens["token_type"] == "bearer"
+    assert tokens["access_token"] and tokens["refresh_token"]
+
+
+def test_duplicate_email_rejected(client):
+    signup(client)
+    r = client.post("/auth/signup", json={
+        "username": "u", "email": "user@example.com", "password": "x", "chat_theme": False, "dark_mode": False,
+    })
+    assert r.status_code == 400
+
+
+def test_wrong_password_is_401(client):
+    signup(client)
+    r = client.post("/auth/login", data={"username": "user@example.com", "password": "wrong"})
+    assert r.status_code == 401
+    r = client.post("/auth/login", data={"username": "nobody@example.com", "password": "wrong"})
+    assert r.status_code == 401
+
+
+def test_saturated_pool_sheds_load_with_503(client, monkeypatch):
+    signup(client)
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    rejected = password_hasher.rejected
+    r = client.post("/auth/login", data={"username": "user@example.com", "password": "pw-1234"})
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+    assert password_hasher.rejected == rejected + 1
+
+
+def test_login_rehashes_when_cost_changes(client, monkeypatch):
+    signup(client)
+    assert _stored_hash().startswith("$2b$04$")
+    monkeypatch.setattr(hash_utils, "pwd_context", hash_utils.pwd_context.copy(bcrypt__rounds=5))
+    login(client)
+    assert _stored_hash().startswith("$2b$05$")
+    # 새 해시로도 로그인되고, 같은 설정이면 다시 쓰지 않음
+    rehashed = _stored_hash()
+    login(client)
+    assert _stored_hash() == rehashed
+
+
+def test_process_pool_hash_and_verify():
+    hasher = PasswordHasher(workers=1, max_pending=4)
+
+    async def run():
+        hashed = await hasher.hash("secret")
+        ok, _ = await hasher.verify_and_update("secret", hashed)
+        bad, _ = await hasher.verify_and_update("other", hashed)
+        return ok, bad
+
+    try:
+        assert asyncio.run(run()) == (True, False)
+        assert hasher.stats()["pending"] == 0
+    finally:
+        hasher.shutdown()
+
+
+def test_pending_limit_counts_in_flight_work():
+    hasher = PasswordHasher(workers=1, max_pending=1, enabled=False)
+
+    async def run():
+        first = asyncio.ensure_future(hasher.hash("a"))
+        await asyncio.sleep(0)
+        with pytest.raises(Exception) as excinfo:
+            await hasher.hash("b")
+        await first
+        return excinfo.value.status_code
+
+    assert asyncio.run(run()) == 503
@@ -0,0 +1,54 @@
+# 목록 응답 빠른 경로 (utils/serialize_utils.py, OCEAN_FAST_JSON=1)
+import pytest
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+import main
+from utils import serialize_utils
+from utils.cursor_utils import NEXT_CURSOR_HEADER
+
+
+@pytest.fixture
+def seeded(client, auth, thread_id):
+    for i in range(3):
+        client.post(f"/threads/{thread_id}/messages", json={"content": f"안녕 {i}", "client_message_id": f"f-{i}"}, headers=auth)
+    client.post("/threads/threads", json={"thread_title": "두 번째"}, headers=auth)
+    return thread_id
+
+
+def _fetch_both(client, monkeypatch, path, **params):
+    monkeypatch.setattr(serialize_utils, "FAST_JSON_ENABLED", False)
+    slow = client.get(path, **params)
+    monkeypatch.setattr(serialize_utils, "FAST_JSON_ENABLED", True)
+    fast = client.get(path, **params)
+    assert slow.status_code == fast.status_code == 200
+    return slow, fast
+
+
+@pytest.mark.parametrize("path", ["/threads/{thread_id}/messages", "/threads/threads"])
+def test_fast_path_returns_identical_body_and_headers(client, auth, seeded, monkeypatch, path):
+    slow, fast = _fetch_both(client, monkeypatch, path.format(thread_id=seeded), params={"limit": 1}, headers=auth)
+    assert fast.json() == slow.json()
+    # 주입된 Response의 헤더(커서, 계측)가 빠지지 않음
+    assert fast.headers[NEXT_CURSOR_HEADER] == slow.headers[NEXT_CURSOR_HEADER]
+    assert fast.headers["X-SQL-Statements"] == slow.headers["X-SQL-Statements"]
+    assert fast.headers["content-type"] == "application/json"
+
+
+def test_fast_path_skips_model_validation(monkeypatch):
+    monkeypatch.setattr(serialize_utils, "FAST_JSON_ENABLED", True)
+    rows = [{"message_id": 1, "content": "x"}]
+    injected = Response()
+    injected.headers["X-Next-Cursor"] = "c"
+    response = serialize_utils.list_response(rows, ("message_id", "content"), injected)
+    assert isinstance(response, ORJSONResponse)
+    assert response.body == b'[{"message_id":1,"content":"x"}]'
+    assert response.headers["X-Next-Cursor"] == "c"
+
+
+def test_openapi_schema_keeps_response_models():
+    paths = main.app.openapi()["paths"]
+    messages = paths["/threads/{thread_id}/messages"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    threads = paths["/threads/threads"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert messages["items"]["$ref"].endswith("/MessageWithImagesOut")
+    assert threads["items"]["$ref"].endswith("/ThreadResponse")
@@ -0,0 +1,99 @@
+# client_message_id 멱등 저장 (route/message.py, uq_messages_thread_client_message_id)
+from sqlalchemy import func, insert, select
+
+from conftest import bearer, login, signup
+from database.database import SessionLocal
+from models import Message
+from utils.cache_utils import recent_messages
+
+
+def _post(client, auth, thread_id, content, client_message_id):
+    response = client.post(
+        f"/threads/{thread_id}/messages",
+        json={"content": content, "client_message_id": client_message_id}, headers=auth,
+    )
+    assert response.status_code == 200, response.text
+    return response
+
+
+def _rows(thread_id):
+    with SessionLocal() as db:
+        return db.scalar(select(func.count()).select_from(Message).where(Message.thread_id == thread_id))
+
+
+def test_retry_returns_existing_row_from_recent_cache(client, auth, thread_id):
+    first = _post(client, auth, thread_id, "hello", "c-1").json()
+    retry = _post(client, auth, thread_id, "hello (retry)", "c-1")
+    assert retry.json() == first
+    assert retry.headers["X-SQL-Statements"] == "0"  # 최근 ID 캐시에서 바로
+    assert _rows(thread_id) == 1
+
+
+def test_retry_after_cache_eviction_uses_unique_index(client, auth, thread_id):
+    first = _post(client, auth, thread_id, "hello", "c-2").json()
+    recent_messages._entries.clear()
+    assert _post(client, auth, thread_id, "hello", "c-2").json() == first
+    assert _rows(thread_id) == 1
+
+
+def test_row_written_by_another_worker_is_returned(client, auth, thread_id):
+    with SessionLocal() as db:
+        db.execute(insert(Message).values(thread_id=thread_id, sender_type="user", content="other worker", client_message_id="c-3"))
+        db.commit()
+    assert _post(client, auth, thread_id, "this worker", "c-3").json()["content"] == "other worker"
+    assert _rows(thread_id) == 1
+
+
+def test_same_client_id_in_other_thread_is_a_new_message(client, auth, thread_id):
+    other = client.post("/threads/threads", json={"thread_title": "other"}, headers=auth).json()["thread_id"]
+    a = _post(client, auth, thread_id, "a", "c-4").json()
+    b = _post(client, auth, other, "b", "c-4").json()
+    assert a["message_id"] != b["message_id"]
+
+
+def test_without_client_id_every_post_is_stored(client, auth, thread_id):
+    for _ in range(2):
+        assert client.post(f"/threads/{thread_id}/messages", json={"content": "x"}, headers=auth).status_code == 200
+    assert _rows(thread_id) == 2
+
+
+def test_bulk_counts_duplicates_within_and_across_requests(client, auth, thread_id):
+    _post(client, auth, thread_id, "earlier", "b-1")
+    items = [
+        {"thread_id": thread_id, "content": "again", "client_message_id": "b-1"},
+        {"thread_id": thread_id, "content": "new", "client_message_id": "b-2"},
+        {"thread_id": thread_id, "content": "new (dup in batch)", "client_message_id": "b-2"},
+        {"thread_id": thread_id, "content": "no id"},
+    ]
+    body = client.post("/threads/messages/bulk", json={"items": items}, headers=auth).json()
+    assert (body["created"], body["duplicates"]) == (2, 2)
+    contents = [m["content"] for m in body["messages"]]
+    assert contents == ["earlier", "new", "new", "no id"]
+    assert _rows(thread_id) == 3
+
+
+def test_retry_to_hidden_thread_is_404_not_cached_200(client, auth, thread_id):
+    _post(client, auth, thread_id, "hello", "c-5")
+    assert client.delete(f"/threads/threads/{thread_id}", headers=auth).status_code == 202
+    response = client.post(f"/threads/{thread_id}/messages", json={"content": "hello", "client_message_id": "c-5"}, headers=auth)
+    assert response.status_code == 404
+
+
+def test_account_deletion_evicts_only_that_users_entries(client, auth, thread_id):
+    _post(client, auth, thread_id, "mine", "c-6")
+    signup(client, "other@example.com", "password-2", "other")
+    other = bearer(login(client, "other@example.com", "password-2"))
+    other_thread = client.post("/threads/threads", json={"thread_title": "t"}, headers=other).json()["thread_id"]
+    _post(client, other, other_thread, "theirs", "c-6")
+    other_id = client.get("/users/me", headers=other).json()["user_id"]
+
+    assert client.delete("/users/me", headers=auth).status_code == 202
+    assert list(recent_messages._entries) == [(other_id, other_thread, "c-6")]
+
+
+def test_recent_cache_entries_expire(client, auth, thread_id, monkeypatch):
+    monkeypatch.setattr(recent_messages, "ttl_seconds", 0)
+    first = _post(client, auth, thread_id, "hello", "c-7").json()
+    retry = _post(client, auth, thread_id, "hello", "c-7")
+    assert retry.json() == first
+    assert retry.headers["X-SQL-Statements"] != "0"  # 만료 → 고유 인덱스로 조회
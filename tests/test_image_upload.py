@@ -0,0 +1,157 @@
+# 이미지 업로드: 스트리밍 수신, 해시 중복 제거, 썸네일 (route/image.py, utils/image_utils.py, utils/storage_utils.py)
+import hashlib
+import io
+import os
+import shutil
+
+import pytest
+from PIL import Image as PILImage
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from conftest import bearer, login, signup
+from database.database import SessionLocal
+from models import Image, Message, Thread
+from route import image as image_route
+from utils.storage_utils import LocalStorage, StorageBackend
+
+
+@pytest.fixture(autouse=True)
+def _empty_storage():
+    # 테이블을 비우면 thread_id가 재사용되므로 저장된 객체도 함께 비움
+    shutil.rmtree(os.environ["IMAGE_STORAGE_DIR"], ignore_errors=True)
+
+
+def _png(color=(200, 30, 30), size=(800, 600)):
+    buffer = io.BytesIO()
+    PILImage.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _message(client, auth, thread_id, content="사진"):
+    return client.post(f"/threads/{thread_id}/messages", json={"content": content}, headers=auth).json()["message_id"]
+
+
+def _upload(client, auth, thread_id, message_id, body, content_type="image/png"):
+    return client.put(
+        f"/threads/{thread_id}/messages/{message_id}/images",
+        content=iter([body[i:i + 4096] for i in range(0, len(body), 4096)]),  # chunked
+        headers={**auth, "Content-Type": content_type},
+    )
+
+
+def _stored(key):
+    return os.path.join(os.environ["IMAGE_STORAGE_DIR"], key)
+
+
+def test_upload_stores_original_and_thumbnail(client, auth, thread_id):
+    body = _png()
+    response = _upload(client, auth, thread_id, _message(client, auth, thread_id), body)
+    assert response.status_code == 201, response.text
+    image = response.json()
+    digest = hashlib.sha256(body).hexdigest()
+    assert (image["sha256"], image["size"], image["deduplicated"]) == (digest, len(body), False)
+    assert image["url"] == f"threads/{thread_id}/{digest}.png"
+    with open(_stored(image["url"]), "rb") as f:
+        assert f.read() == body
+    with PILImage.open(_stored(image["thumbnail_url"])) as thumb:
+        assert max(thumb.size) <= 320 and thumb.format == "JPEG"
+
+
+def test_same_image_is_stored_once_per_thread(client, auth, thread_id):
+    body = _png((10, 120, 10))
+    first = _upload(client, auth, thread_id, _message(client, auth, thread_id), body).json()
+    again = _upload(client, auth, thread_id, _message(client, auth, thread_id, "또"), body)
+    assert again.status_code == 201
+    assert again.json()["deduplicated"] is True
+    assert (again.json()["url"], again.json()["thumbnail_url"]) == (first["url"], first["thumbnail_url"])
+    assert again.json()["image_id"] != first["image_id"]
+
+
+def test_reupload_to_same_message_returns_existing_row(client, auth, thread_id):
+    message_id = _message(client, auth, thread_id)
+    body = _png((0, 0, 255))
+    first = _upload(client, auth, thread_id, message_id, body).json()
+    retry = _upload(client, auth, thread_id, message_id, body)
+    assert retry.status_code == 200
+    assert retry.json()["image_id"] == first["image_id"]
+    images = client.get(f"/threads/{thread_id}/messages", headers=auth).json()[0]["images"]
+    assert [image["image_id"] for image in images] == [first["image_id"]]
+
+
+def test_rejects_non_images_and_foreign_messages(client, auth, thread_id):
+    message_id = _message(client, auth, thread_id)
+    tmp_before = set(os.listdir(os.environ["IMAGE_UPLOAD_TMP_DIR"]))
+    assert _upload(client, auth, thread_id, message_id, b"plain text, not an image").status_code == 415
+    assert _upload(client, auth, thread_id, message_id, b"").status_code == 400
+
+    signup(client, "other@example.com", "password-2", "other")
+    other = bearer(login(client, "other@example.com", "password-2"))
+    assert _upload(client, other, thread_id, message_id, _png()).status_code == 404
+    assert set(os.listdir(os.environ["IMAGE_UPLOAD_TMP_DIR"])) == tmp_before  # 임시 파일 정리
+
+
+def _while_receiving(monkeypatch, action):
+    """본문 수신이 끝난 직후(저장/첨부 전)에 action을 실행 (긴 업로드 도중의 삭제 재현)"""
+    receive = image_route.receive_image
+
+    async def receive_then_act(request):
+        received = await receive(request)
+        with SessionLocal() as db:
+            action(db)
+            db.commit()
+        return received
+
+    monkeypatch.setattr(image_route, "receive_image", receive_then_act)
+
+
+@pytest.mark.parametrize("action", ["hide_thread", "purge_message"])
+def test_upload_finishing_after_deletion_is_rejected_and_cleaned_up(client, auth, thread_id, monkeypatch, action):
+    message_id = _message(client, auth, thread_id)
+    if action == "hide_thread":
+        _while_receiving(monkeypatch, lambda db: db.execute(update(Thread).values(deleted_at=func.now())))
+    else:
+        _while_receiving(monkeypatch, lambda db: db.execute(delete(Message).where(Message.message_id == message_id)))
+
+    body = _png((1, 2, 3))
+    assert _upload(client, auth, thread_id, message_id, body).status_code == 404
+    with SessionLocal() as db:
+        assert db.query(Image).count() == 0
+    digest = hashlib.sha256(body).hexdigest()
+    assert not os.path.exists(_stored(f"threads/{thread_id}/{digest}.png"))
+    assert not os.path.exists(_stored(f"threads/{thread_id}/{digest}_thumb.jpg"))
+
+
+def test_failed_attach_keeps_objects_other_messages_use(client, auth, thread_id, monkeypatch):
+    body = _png((9, 9, 9))
+    first = _upload(client, auth, thread_id, _message(client, auth, thread_id), body).json()
+    second = _message(client, auth, thread_id, "둘째")
+    _while_receiving(monkeypatch, lambda db: db.execute(delete(Message).where(Message.message_id == second)))
+    assert _upload(client, auth, thread_id, second, body).status_code == 404
+    assert os.path.exists(_stored(first["url"])) and os.path.exists(_stored(first["thumbnail_url"]))
+
+
+def test_duplicate_attach_is_caught_by_the_unique_index(client, auth, thread_id):
+    message_id = _message(client, auth, thread_id)
+    owner = client.get("/users/me", headers=auth).json()["user_id"]
+    with SessionLocal() as db:
+        first, created = image_route._attach_image(db, owner, thread_id, message_id, "threads/x.png", None)
+        again, created_again = image_route._attach_image(db, owner, thread_id, message_id, "threads/x.png", None)
+        assert (created, created_again) == (True, False)
+        assert again.image_id == first.image_id
+        # 확인 없이 바로 넣는 동시 업로드도 DB가 막음
+        with pytest.raises(IntegrityError):
+            db.execute(insert(Image).values(message_id=message_id, image_url="threads/x.png"))
+        db.rollback()
+        assert db.query(Image).count() == 1
+
+
+def test_storage_backend_requires_every_operation():
+    class Incomplete(StorageBackend):
+        def exists(self, key):
+            return False
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    with pytest.raises(ValueError):
+        LocalStorage("/tmp/images").exists("../escape.png")
@@ -0,0 +1,97 @@
+# 키셋 페이지네이션 + 서명 커서 (utils/cursor_utils.py, route/message.py, route/thread.py)
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert
+
+from conftest import bearer, login, signup
+from database.database import SessionLocal
+from models import Message
+from utils.cursor_utils import NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER
+
+
+def _seed_messages(thread_id, count, created_at=datetime(2024, 1, 1, 12, 0, 0)):
+    # 같은 created_at으로 직접 넣음 (정렬은 message_id만 따라야 함)
+    with SessionLocal() as db:
+        db.execute(insert(Message), [
+            {"thread_id": thread_id, "sender_type": "user", "content": f"m{i}", "created_at": created_at}
+            for i in range(count)
+        ])
+        db.commit()
+
+
+def _messages(client, auth, thread_id, **params):
+    return client.get(f"/threads/{thread_id}/messages", params=params, headers=auth)
+
+
+def _tamper(cursor):
+    body, signature = cursor.split(".", 1)
+    flipped = ("A" if body[-1] != "A" else "B")
+    return [
+        body[:-1] + flipped + "." + signature,       # 본문 변경
+        body + "." + signature[:-1] + ("A" if signature[-1] != "A" else "B"),  # 서명 변경
+        body,                                         # 서명 없음
+        "not-a-cursor",
+    ]
+
+
+def test_pages_walk_every_message_once_at_equal_timestamps(client, auth, thread_id):
+    _seed_messages(thread_id, 23)
+    seen = []
+    response = _messages(client, auth, thread_id, limit=5)
+    newest_cursor = response.headers[PREV_CURSOR_HEADER]
+    while True:
+        ids = [m["message_id"] for m in response.json()]
+        assert ids == sorted(ids)  # 페이지 안은 오래된 순
+        seen = ids + seen
+        if NEXT_CURSOR_HEADER not in response.headers:
+            break
+        response = _messages(client, auth, thread_id, limit=5, cursor=response.headers[NEXT_CURSOR_HEADER])
+    assert len(seen) == 23 and seen == sorted(set(seen))
+
+    # 최신 쪽 커서: 새 메시지만, 빈 페이지여도 커서 유지
+    assert _messages(client, auth, thread_id, cursor=newest_cursor).json() == []
+    _seed_messages(thread_id, 2)
+    newer = _messages(client, auth, thread_id, cursor=newest_cursor).json()
+    assert [m["content"] for m in newer] == ["m0", "m1"]
+    assert min(m["message_id"] for m in newer) > max(seen)
+
+
+def test_tampered_cursor_is_rejected(client, auth, thread_id):
+    _seed_messages(thread_id, 3)
+    cursor = _messages(client, auth, thread_id, limit=1).headers[NEXT_CURSOR_HEADER]
+    assert _messages(client, auth, thread_id, limit=1, cursor=cursor).status_code == 200
+    for bad in _tamper(cursor):
+        response = _messages(client, auth, thread_id, limit=1, cursor=bad)
+        assert response.status_code == 400, bad
+
+
+def test_cursor_is_bound_to_its_list(client, auth, thread_id):
+    _seed_messages(thread_id, 3)
+    other_thread = client.post("/threads/threads", json={"thread_title": "other"}, headers=auth).json()["thread_id"]
+    _seed_messages(other_thread, 3)
+    cursor = _messages(client, auth, thread_id, limit=1).headers[NEXT_CURSOR_HEADER]
+
+    # 다른 스레드 / 스레드 목록에 재사용 불가
+    assert _messages(client, auth, other_thread, limit=1, cursor=cursor).status_code == 400
+    assert client.get("/threads/threads", params={"cursor": cursor}, headers=auth).status_code == 400
+
+
+def test_thread_list_cursor_is_bound_to_user(client, auth):
+    for i in range(3):
+        client.post("/threads/threads", json={"thread_title": f"t{i}"}, headers=auth)
+    first = client.get("/threads/threads", params={"limit": 1}, headers=auth)
+    cursor = first.headers[NEXT_CURSOR_HEADER]
+    second = client.get("/threads/threads", params={"limit": 1, "cursor": cursor}, headers=auth).json()
+    assert second[0]["thread_id"] < first.json()[0]["thread_id"]
+
+    signup(client, "other@example.com", "password-2", "other")
+    other = bearer(login(client, "other@example.com", "password-2"))
+    assert client.get("/threads/threads", params={"cursor": cursor}, headers=other).status_code == 400
+
+
+@pytest.mark.parametrize("before_id", [None, 10**9])
+def test_legacy_before_id_still_works(client, auth, thread_id, before_id):
+    _seed_messages(thread_id, 3)
+    params = {"limit": 2} if before_id is None else {"limit": 2, "before_id": before_id}
+    assert [m["content"] for m in _messages(client, auth, thread_id, **params).json()] == ["m1", "m2"]
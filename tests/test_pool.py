@@ -0,0 +1,83 @@
+# 커넥션 풀 유휴 축소 (database/pool.py): 체크아웃과 동시에 실행해도 풀 상태가 어긋나지 않음
+import threading
+import time
+
+from sqlalchemy import create_engine, event, text
+
+from database.pool import MonitoredQueuePool, install_pool_liveness
+
+
+def _engine(tmp_path, pool_size=4, max_overflow=4):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=MonitoredQueuePool,
+        pool_size=pool_size, max_overflow=max_overflow, pool_timeout=5, pool_use_lifo=True,
+    )
+    install_pool_liveness(engine, ping_idle_seconds=-1)
+    opened, closed = [], []
+    event.listen(engine, "connect", lambda dbapi_connection, record: opened.append(record))
+    event.listen(engine, "close", lambda dbapi_connection, record: closed.append(record))
+    return engine, opened, closed
+
+
+def _warm(engine, count):
+    connections = [engine.connect() for _ in range(count)]
+    for conn in connections:
+        conn.close()
+
+
+def _checkouts_during(engine, workers, shrink):
+    stop = threading.Event()
+    errors = []
+
+    def work():
+        try:
+            while not stop.is_set():
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    try:
+        deadline = time.monotonic() + 0.5
+        while time.monotonic() < deadline:
+            shrink()
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+    assert errors == []
+
+
+def test_shrink_idle_does_not_hide_idle_connections_from_checkouts(tmp_path):
+    engine, opened, _ = _engine(tmp_path)
+    _warm(engine, 4)
+    assert len(opened) == 4
+
+    # 닫을 커넥션이 없는 축소가 잠깐이라도 큐를 비우면 체크아웃이 새 연결을 만듦
+    _checkouts_during(engine, 4, lambda: engine.pool.shrink_idle(idle_seconds=3600, min_idle=0))
+
+    assert len(opened) == 4
+    assert engine.pool.checkedin() == 4 and engine.pool.checkedout() == 0
+    engine.dispose()
+
+
+def test_shrink_idle_concurrent_with_checkouts_keeps_counts(tmp_path):
+    engine, opened, closed = _engine(tmp_path, pool_size=8)
+    _warm(engine, 8)
+    shrunk = []
+
+    def shrink():
+        shrunk.append(engine.pool.shrink_idle(idle_seconds=1e-9, min_idle=2))
+
+    _checkouts_during(engine, 3, shrink)
+
+    pool = engine.pool
+    assert pool.checkedout() == 0
+    # 풀이 세는 커넥션 수 = 실제로 열려 있는 커넥션 수 (닫힌 것만큼 overflow가 줄어듦)
+    assert pool.checkedin() == pool.size() + pool.overflow() == len(opened) - len(closed)
+    assert pool.checkedin() >= 2
+    assert pool.stats.shrunk == sum(shrunk) > 0
+    engine.dispose()
@@ -0,0 +1,56 @@
+# JWT 클레임 기반 주체와 토큰 버전 무효화 (get_current_principal, /auth/logout-all)
+import pytest
+from sqlalchemy import update
+from starlette.websockets import WebSocketDisconnect
+
+from conftest import bearer, login
+from database.database import SessionLocal
+from models import Users
+from utils.cache_utils import token_cache, token_versions
+
+
+def test_principal_routes_skip_users_lookup(client, auth):
+    client.get("/threads/threads", headers=auth)
+    r = client.get("/threads/threads", headers=auth)
+    assert r.status_code == 200
+    # 버전은 캐시에서, 남은 한 문장은 스레드 목록 조회
+    assert r.headers["X-SQL-Statements"] == "1"
+
+
+def test_logout_all_rejects_previously_cached_tokens(client, user):
+    other_device = bearer(login(client))
+    # 두 인증 경로 모두 캐시에 올려 둠
+    for headers in (bearer(user), other_device):
+        assert client.get("/users/me", headers=headers).status_code == 200
+        assert client.get("/threads/threads", headers=headers).status_code == 200
+    assert token_cache.stats()["size"] == 2
+
+    assert client.post("/auth/logout-all", headers=bearer(user)).status_code == 200
+    for headers in (bearer(user), other_device):
+        assert client.get("/users/me", headers=headers).status_code == 401
+        assert client.get("/threads/threads", headers=headers).status_code == 401
+    # 새로 로그인하면 다시 사용 가능
+    assert client.get("/users/me", headers=bearer(login(client))).status_code == 200
+
+
+@pytest.mark.parametrize("path", ["/users/me", "/threads/threads"])
+def test_version_bump_in_other_worker_rejected_after_version_ttl(client, auth, path):
+    assert client.get(path, headers=auth).status_code == 200
+    with SessionLocal() as db:
+        db.execute(update(Users).values(token_version=Users.token_version + 1))
+        db.commit()
+    # 이 워커의 버전 캐시가 남아 있는 동안은 이전 값 (TOKEN_VERSION_CACHE_TTL_SECONDS)
+    assert client.get(path, headers=auth).status_code == 200
+    token_versions._entries.clear()
+    assert client.get(path, headers=auth).status_code == 401
+
+
+def test_websocket_rejects_token_after_logout_all(client, user, thread_id):
+    token = user["access_token"]
+    with client.websocket_connect(f"/threads/ws/{thread_id}?token={token}"):
+        pass
+    client.post("/auth/logout-all", headers=bearer(user))
+    with pytest.raises(WebSocketDisconnect) as excinfo:
+        with client.websocket_connect(f"/threads/ws/{thread_id}?token={token}") as ws:
+            ws.receive_text()
+    assert excinfo.value.code == 1008
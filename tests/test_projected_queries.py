@@ -0,0 +1,48 @@
+# 목록/조회의 컬럼 프로젝션 (엔티티와 identity map을 만들지 않음)
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Row
+
+from conftest import bearer, login, signup
+from database.database import SessionLocal
+from route.message import _get_message, _list_messages
+from route.thread import _get_thread, _list_threads, _list_threads_by_activity
+from utils.message_utils import assert_thread_ownership
+
+
+@pytest.fixture
+def owner(client, auth, thread_id):
+    for i in range(3):
+        client.post(f"/threads/{thread_id}/messages", json={"content": f"m{i}"}, headers=auth)
+    return client.get("/users/me", headers=auth).json()["user_id"]
+
+
+def _no_entities(db, result):
+    rows = result if isinstance(result, list) else [result]
+    assert rows and all(isinstance(row, Row) for row in rows)
+    assert len(db.identity_map) == 0
+
+
+def test_read_paths_return_rows_without_entities(owner, thread_id):
+    with SessionLocal() as db:
+        _no_entities(db, assert_thread_ownership(db, thread_id, owner))
+        rows, _, _ = _list_messages(db, owner, thread_id, 50, None)
+        _no_entities(db, rows)
+        _no_entities(db, _get_message(db, owner, thread_id, rows[0].message_id))
+        _no_entities(db, _list_threads(db, owner, 20, None)[0])
+        _no_entities(db, _list_threads_by_activity(db, owner, 20)[0])
+        _no_entities(db, _get_thread(db, thread_id, owner))
+
+
+def test_projection_still_enforces_ownership(client, owner, thread_id):
+    signup(client, "other@example.com", "password-2", "other")
+    other = client.get("/users/me", headers=bearer(login(client, "other@example.com", "password-2"))).json()["user_id"]
+    with SessionLocal() as db:
+        for call in (
+            lambda: assert_thread_ownership(db, thread_id, other),
+            lambda: _list_messages(db, other, thread_id, 50, None),
+            lambda: _get_thread(db, thread_id, other),
+        ):
+            with pytest.raises(HTTPException) as exc:
+                call()
+            assert exc.value.status_code == 404
@@ -0,0 +1,243 @@
+# 워커 간 pub/sub 백엔드 (utils/pubsub_utils.py): 로컬 브로커 전달, 느린 워커 차단, Redis 재연결
+import asyncio
+import json
+import time
+
+from utils import pubsub_utils
+from utils.message_utils import WSConnectionManager
+from utils.pubsub_utils import InMemoryBackend, LocalBrokerBackend, RedisBackend, _BrokerConnection
+
+
+async def _until(predicate, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "시간 초과"
+        await asyncio.sleep(0.001)
+
+
+def _collector():
+    received = []
+
+    async def deliver(room, data, kind):
+        received.append((room, data, kind))
+
+    return received, deliver
+
+
+def test_local_broker_relays_between_workers(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "ws.sock")
+        a, b = LocalBrokerBackend(path, reconnect_delay=0.01), LocalBrokerBackend(path, reconnect_delay=0.01)
+        got_a, deliver_a = _collector()
+        got_b, deliver_b = _collector()
+        await a.start(deliver_a)
+        await b.start(deliver_b)
+        try:
+            a.subscribe(1)
+            b.subscribe(1)
+            await _until(lambda: len(_BrokerConnection.subscribers.get(1, ())) == 2)
+            await a.publish(1, "hello", "chat")
+            await _until(lambda: got_b)
+            assert got_b == [(1, "hello", "chat")]
+            assert got_a == []  # 자기 프레임은 되돌려 받지 않음
+        finally:
+            await a.close()
+            await b.close()
+
+    asyncio.run(scenario())
+
+
+def test_broker_drops_slow_worker_and_keeps_serving_others(tmp_path, monkeypatch):
+    monkeypatch.setattr(pubsub_utils, "BROKER_QUEUE_SIZE", 64)
+
+    async def scenario():
+        path = str(tmp_path / "ws.sock")
+        publisher, fast = LocalBrokerBackend(path, reconnect_delay=0.01), LocalBrokerBackend(path, reconnect_delay=0.01)
+        _, deliver_pub = _collector()
+        got_fast, deliver_fast = _collector()
+        await publisher.start(deliver_pub)
+        await fast.start(deliver_fast)
+        fast.subscribe(7)
+        await _until(lambda: publisher._writer is not None and _BrokerConnection.subscribers.get(7))
+
+        # 구독만 하고 읽지 않는 워커
+        slow_reader, slow_writer = await asyncio.open_unix_connection(path)
+        slow_writer.write(json.dumps({"op": "sub", "room": 7}).encode() + b"\n")
+        await slow_writer.drain()
+        await _until(lambda: len(_BrokerConnection.subscribers.get(7, ())) == 2)
+        dropped_before = _BrokerConnection.dropped_peers
+
+        payload = "x" * 16384  # StreamReader 한 줄 제한(64KiB) 이하
+        count = 256
+        try:
+            for sent in range(1, count + 1):
+                await publisher.publish(7, payload)
+                await _until(lambda: len(got_fast) == sent)  # 빠른 워커는 제때 받음
+            assert _BrokerConnection.dropped_peers == dropped_before + 1
+            assert len(_BrokerConnection.subscribers[7]) == 1
+            # 끊긴 쪽은 EOF를 받음 (커널 버퍼에 남은 것까지 읽고 나면)
+            while await slow_reader.read(1 << 20):
+                pass
+        finally:
+            slow_writer.close()
+            await publisher.close()
+            await fast.close()
+
+    asyncio.run(scenario())
+
+
+class _FakePubSub:
+    def __init__(self, script):
+        self.script = script
+        self.channels = []
+        self.fail_subscribe = False
+
+    @property
+    def subscribed(self):
+        return bool(self.channels)
+
+    async def subscribe(self, *channels):
+        if self.fail_subscribe:
+            raise ConnectionError("subscribe 실패")
+        self.channels.extend(channels)
+
+    async def unsubscribe(self, *channels):
+        pass
+
+    async def get_message(self, ignore_subscribe_messages=True, timeout=1.0):
+        await asyncio.sleep(0)
+        if not self.script:
+            return None
+        step = self.script.pop(0)
+        if isinstance(step, Exception):
+            raise step
+        return step
+
+    async def close(self):
+        pass
+
+
+class _FakeRedis:
+    """RedisBackend가 쓰는 redis.asyncio 클라이언트 표면만 흉내 (연결 장애 재현용)"""
+
+    def __init__(self, scripts):
+        self.scripts = scripts
+        self.pubsubs = []
+
+    def pubsub(self):
+        pubsub = _FakePubSub(self.scripts.pop(0) if self.scripts else [])
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+    async def close(self):
+        pass
+
+
+def _message(room, data, origin="other"):
+    return {"type": "message", "channel": f"ws:room:{room}".encode(), "data": json.dumps({"o": origin, "d": data, "k": None})}
+
+
+def _redis_backend(fake):
+    backend = RedisBackend("redis://unused", reconnect_delay=0.01, max_reconnect_delay=0.05)
+    backend._connect = lambda: fake
+    return backend
+
+
+def test_redis_listener_reconnects_and_resubscribes():
+    async def scenario():
+        fake = _FakeRedis([
+            [ConnectionError("연결 끊김")],
+            [{"type": "message", "channel": b"ws:room:3", "data": "{깨진"}, _message(3, "after")],
+        ])
+        backend = _redis_backend(fake)
+        received, deliver = _collector()
+        await backend.start(deliver)
+        backend.subscribe(3)
+        try:
+            await _until(lambda: received)
+            assert received == [(3, "after", None)]
+            assert backend.reconnects == 1
+            assert backend.bad_messages == 1
+            assert fake.pubsubs[-1].channels == ["ws:room:3"]
+            assert not backend._task.done()
+        finally:
+            await backend.close()
+
+    asyncio.run(scenario())
+
+
+def test_redis_failed_subscribe_is_tracked_and_recovered():
+    async def scenario():
+        fake = _FakeRedis([[], [_message(5, "later")]])
+        backend = _redis_backend(fake)
+        received, deliver = _collector()
+        await backend.start(deliver)
+        await _until(lambda: fake.pubsubs)
+        fake.pubsubs[0].fail_subscribe = True
+        backend.subscribe(5)
+        assert len(backend._commands) == 1
+        try:
+            await _until(lambda: received)
+            assert backend.command_failures == 1
+            assert not backend._commands
+            assert fake.pubsubs[-1].channels == ["ws:room:5"]
+        finally:
+            await backend.close()
+
+    asyncio.run(scenario())
+
+
+class _DownBackend(InMemoryBackend):
+    """발행이 항상 실패하는 백엔드 (Redis/브로커 장애)"""
+
+    async def publish(self, room, message, kind=None):
+        raise ConnectionError("Redis 연결 끊김")
+
+
+class _Socket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        self.sent.append(json.loads(message))
+
+    async def close(self, code=1000):
+        pass
+
+
+def test_publish_failure_keeps_local_delivery():
+    async def scenario():
+        manager = WSConnectionManager(_DownBackend())
+        socket = _Socket()
+        await manager.connect(1, socket)
+        try:
+            await manager.broadcast(1, {"type": "chat", "n": 1})
+            await manager.broadcast(1, {"type": "chat", "n": 2})
+            await _until(lambda: len(socket.sent) == 2)
+            assert [event["n"] for event in socket.sent] == [1, 2]
+            assert manager.stats()["publish_failures"] == 2
+        finally:
+            await manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_publish_failure_does_not_close_the_socket(ws_client, user, thread_id, monkeypatch):
+    from route import message
+
+    monkeypatch.setattr(message.manager.backend, "publish", _DownBackend().publish)
+    failures = message.manager.publish_failures
+    with ws_client.websocket_connect(f"/threads/ws/{thread_id}?token={user['access_token']}") as ws:
+        assert ws.receive_json()["event"] == "joined"
+        ws.send_json({"type": "chat", "content": "장애 중", "client_message_id": "c-1"})
+        events = [ws.receive_json(), ws.receive_json()]
+        assert {event["type"] for event in events} == {"chat", "ack"}
+    # joined, chat, 그리고 소켓이 닫힌 뒤의 "left"까지 예외 없이 로컬 전달만 하고 끝남
+    deadline = time.monotonic() + 5
+    while message.manager.publish_failures < failures + 3:
+        assert time.monotonic() < deadline, "시간 초과"
+        time.sleep(0.01)
@@ -0,0 +1,108 @@
+# 리프레시 토큰 회전/폐기/정리 (utils/token_utils.py, utils/revocation_utils.py)
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from conftest import bearer, login
+from database.database import SessionLocal
+from models import RefreshToken
+from utils.hash_utils import _token_hash
+from utils.revocation_utils import revoked_tokens, sweep_refresh_tokens_batch
+from utils.token_utils import auth_handler
+
+
+def _refresh(client, token):
+    return client.post("/auth/refresh", params={"refresh_token": token})
+
+
+def _row(token) -> RefreshToken:
+    with SessionLocal() as db:
+        return db.scalars(select(RefreshToken).where(RefreshToken.token_hash == _token_hash(token))).one()
+
+
+def _other_worker():
+    # 다른 워커에는 이 워커의 메모리 폐기 목록이 없음
+    revoked_tokens._entries.clear()
+
+
+def test_sweep_deletes_only_expired_rows(client, user):
+    with SessionLocal() as db:
+        db.execute(update(RefreshToken).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.commit()
+        assert sweep_refresh_tokens_batch(db) == 1
+        assert db.scalar(select(RefreshToken.refresh_token_id)) is None
+
+
+def test_sweep_keeps_rotated_rows_until_expiry(client, user):
+    rotated = _refresh(client, user["refresh_token"]).json()
+    # 회전/폐기 후 며칠이 지나도 토큰이 만료되기 전이면 행을 지우지 않음
+    with SessionLocal() as db:
+        db.execute(update(RefreshToken).values(last_used_at=datetime.utcnow() - timedelta(days=6)))
+        db.commit()
+        assert sweep_refresh_tokens_batch(db) == 0
+    assert _row(user["refresh_token"]).replaced_by == _token_hash(rotated["refresh_token"])
+
+
+def test_replay_after_sweep_revokes_family(client, user):
+    rotated = _refresh(client, user["refresh_token"]).json()
+    with SessionLocal() as db:
+        db.execute(update(RefreshToken).values(last_used_at=datetime.utcnow() - timedelta(days=2)))
+        db.commit()
+        sweep_refresh_tokens_batch(db)
+    _other_worker()
+
+    r = _refresh(client, user["refresh_token"])
+    assert r.status_code == 401
+    assert r.json()["detail"] == "이미 회전된 리프레시 토큰입니다."
+    # 재사용이 탐지되면 정상 사용자의 최신 토큰도 함께 폐기
+    assert _row(rotated["refresh_token"]).revoked
+    assert _refresh(client, rotated["refresh_token"]).status_code == 401
+
+
+def test_rotation_stays_in_one_family(client, user):
+    second = _refresh(client, user["refresh_token"]).json()
+    third = _refresh(client, second["refresh_token"]).json()
+    rows = [_row(t["refresh_token"]) for t in (user, second, third)]
+    assert len({row.family_id for row in rows}) == 1
+    assert [row.generation for row in rows] == [0, 1, 2]
+
+
+def test_replay_rotated_token_revokes_whole_family(client, user):
+    second = _refresh(client, user["refresh_token"]).json()
+    third = _refresh(client, second["refresh_token"]).json()
+
+    r = _refresh(client, user["refresh_token"])
+    assert r.status_code == 401
+    assert r.json()["detail"] == "이미 회전된 리프레시 토큰입니다."
+    assert all(_row(t["refresh_token"]).revoked for t in (user, second, third))
+    assert _refresh(client, third["refresh_token"]).status_code == 401
+
+
+def test_replay_leaves_other_sessions_alone(client, user):
+    other = login(client)
+    _refresh(client, user["refresh_token"])
+    assert _refresh(client, user["refresh_token"]).status_code == 401
+    assert _refresh(client, other["refresh_token"]).status_code == 200
+
+
+def test_rotation_race_is_treated_as_reuse(client, user):
+    rotated = _refresh(client, user["refresh_token"]).json()
+    _other_worker()
+    # 검증을 통과한 두 요청 중 늦은 쪽이 회전하려는 경우
+    with SessionLocal() as db:
+        try:
+            auth_handler.rotate_refresh_token(db, user["refresh_token"], _row(user["refresh_token"]).user_id)
+        except Exception as e:
+            assert e.status_code == 401
+        else:
+            raise AssertionError("회전된 토큰으로 다시 회전됨")
+    assert _row(rotated["refresh_token"]).revoked
+
+
+def test_logout_all_revokes_every_family(client, user):
+    sessions = [user, login(client), login(client)]
+    r = client.post("/auth/logout-all", headers=bearer(sessions[-1]))
+    assert r.status_code == 200
+    for tokens in sessions:
+        assert _row(tokens["refresh_token"]).revoked
+        assert _refresh(client, tokens["refresh_token"]).status_code == 401
@@ -0,0 +1,75 @@
+# 전문 검색 (route/search.py, utils/search_utils.py, SQLite는 models/search_index.py의 FTS5)
+from conftest import bearer, login, signup
+from utils.cursor_utils import NEXT_CURSOR_HEADER
+
+
+def _post(client, auth, thread_id, *contents):
+    for content in contents:
+        assert client.post(f"/threads/{thread_id}/messages", json={"content": content}, headers=auth).status_code == 200
+
+
+def _search(client, auth, q, **params):
+    return client.get("/search", params={"q": q, **params}, headers=auth)
+
+
+def test_finds_only_own_messages_containing_every_term(client, auth, thread_id):
+    _post(client, auth, thread_id, "내일 회의록 정리하기", "회의록 공유", "점심 메뉴 정리")
+    signup(client, "other@example.com", "password-2", "other")
+    other = bearer(login(client, "other@example.com", "password-2"))
+    other_thread = client.post("/threads/threads", json={"thread_title": "남의 스레드"}, headers=other).json()["thread_id"]
+    _post(client, other, other_thread, "회의록 정리 (다른 사용자)")
+
+    hits = _search(client, auth, "회의록 정리").json()
+    assert [hit["snippet"] for hit in hits] == ["내일 회의록 정리하기"]
+    assert hits[0]["type"] == "message" and hits[0]["thread_id"] == thread_id
+    # 짧은 검색어(2글자)도 찾음, 1글자는 거절
+    assert {hit["snippet"] for hit in _search(client, auth, "점심").json()} == {"점심 메뉴 정리"}
+    assert _search(client, auth, "회").status_code == 400
+
+
+def test_snippet_highlights_each_term(client, auth, thread_id):
+    text = "앞부분 " * 40 + "배포 체크리스트 작성 완료" + " 뒷부분" * 40
+    _post(client, auth, thread_id, text)
+    hit = _search(client, auth, "체크리스트 배포").json()[0]
+    snippet = hit["snippet"]
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert sorted(snippet[start:end] for start, end in hit["highlights"]) == ["배포", "체크리스트"]
+
+
+def test_new_messages_are_searchable_immediately_and_hidden_threads_are_not(client, auth, thread_id):
+    assert _search(client, auth, "새로운단어").json() == []
+    _post(client, auth, thread_id, "새로운단어 등장")
+    assert len(_search(client, auth, "새로운단어").json()) == 1
+    assert client.delete(f"/threads/threads/{thread_id}", headers=auth).status_code == 202
+    assert _search(client, auth, "새로운단어").json() == []
+
+
+def test_thread_title_search(client, auth):
+    for title in ("여행 계획", "업무 계획", "일기"):
+        client.post("/threads/threads", json={"thread_title": title}, headers=auth)
+    hits = _search(client, auth, "계획", type="thread").json()
+    assert sorted(hit["thread_title"] for hit in hits) == ["업무 계획", "여행 계획"]
+    assert all(hit["message_id"] is None for hit in hits)
+
+
+def test_paging_walks_every_result_once_and_cursor_is_bound_to_query(client, auth, thread_id):
+    _post(client, auth, thread_id, *[f"반복되는 문장 {i}" + " 문장" * i for i in range(7)])
+    seen, scores = [], []
+    response = _search(client, auth, "문장", limit=3)
+    first_cursor = response.headers[NEXT_CURSOR_HEADER]
+    while True:
+        page = response.json()
+        seen += [hit["message_id"] for hit in page]
+        scores += [hit["score"] for hit in page]
+        if NEXT_CURSOR_HEADER not in response.headers:
+            break
+        response = _search(client, auth, "문장", limit=3, cursor=response.headers[NEXT_CURSOR_HEADER])
+    assert len(seen) == len(set(seen)) == 7
+    assert scores == sorted(scores, reverse=True)
+    assert _search(client, auth, "반복되는", limit=3, cursor=first_cursor).status_code == 400
+
+
+def test_query_operators_are_plain_text(client, auth, thread_id):
+    _post(client, auth, thread_id, "C++ 컴파일 오류")
+    assert _search(client, auth, '"컴파일" -오류 OR (x)').status_code == 200
+    assert len(_search(client, auth, "컴파일 오류").json()) == 1
@@ -0,0 +1,88 @@
+# CDN 서명 URL (utils/cdn_utils.py): 디렉터리 단위 정책 서명과 캐시
+import base64
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from sqlalchemy import insert, select
+
+from database.database import SessionLocal
+from models import Image, Message
+from utils import cdn_utils
+from utils.cdn_utils import CloudFrontSigner
+
+
+def _b64decode(value):
+    return base64.b64decode(value.replace("-", "+").replace("_", "=").replace("~", "/"))
+
+
+@pytest.fixture
+def private_key(tmp_path):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    path = tmp_path / "cf.pem"
+    path.write_bytes(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    return key, str(path)
+
+
+@pytest.fixture
+def signer(private_key):
+    return CloudFrontSigner("cdn.example.com", "KTEST", private_key[1], ttl_seconds=3600, bucket_seconds=600, refresh_seconds=300)
+
+
+def _query(url):
+    return {key: values[0] for key, values in parse_qs(urlsplit(url).query).items()}
+
+
+def test_one_signature_per_thread_directory(signer, private_key):
+    urls = [signer.url_for(f"threads/7/{n}.jpg") for n in range(50)]
+    assert signer.signed == 1
+    query = _query(urls[0])
+    assert all(_query(url) == query for url in urls)
+    assert urls[0].startswith("https://cdn.example.com/threads/7/0.jpg?")
+
+    policy = _b64decode(query["Policy"])
+    statement = json.loads(policy)["Statement"][0]
+    assert statement["Resource"] == "https://cdn.example.com/threads/7/*"
+    assert statement["Condition"]["DateLessThan"]["AWS:EpochTime"] % 600 == 0
+    private_key[0].public_key().verify(_b64decode(query["Signature"]), policy, padding.PKCS1v15(), hashes.SHA1())
+
+    signer.url_for("threads/8/0.jpg")
+    assert signer.signed == 2
+
+
+def test_signature_is_renewed_shortly_before_expiry(signer, monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(cdn_utils.time, "time", lambda: now[0])
+    first = _query(signer.url_for("threads/1/a.jpg"))
+    expires = json.loads(_b64decode(first["Policy"]))["Statement"][0]["Condition"]["DateLessThan"]["AWS:EpochTime"]
+
+    now[0] = expires - 301
+    assert _query(signer.url_for("threads/1/b.jpg")) == first
+    now[0] = expires - 299
+    assert _query(signer.url_for("threads/1/b.jpg")) != first
+    assert signer.signed == 2
+
+
+def test_unsigned_when_not_configured(tmp_path):
+    plain = CloudFrontSigner("", "", str(tmp_path / "missing.pem"))
+    assert plain.url_for("threads/1/a.jpg") == "threads/1/a.jpg"
+    assert plain.url_for("https://elsewhere.example.com/a.jpg") == "https://elsewhere.example.com/a.jpg"
+
+
+def test_message_page_returns_signed_image_urls(client, auth, thread_id, signer, monkeypatch):
+    monkeypatch.setattr(cdn_utils, "url_signer", signer)
+    client.post(f"/threads/{thread_id}/messages", json={"content": "with images"}, headers=auth)
+    with SessionLocal() as db:
+        message_id = db.scalar(select(Message.message_id).where(Message.thread_id == thread_id))
+        db.execute(insert(Image), [
+            {"message_id": message_id, "image_url": f"threads/{thread_id}/{n}.jpg", "thumbnail_url": f"threads/{thread_id}/{n}_thumb.jpg"}
+            for n in range(5)
+        ])
+        db.commit()
+
+    images = client.get(f"/threads/{thread_id}/messages", headers=auth).json()[0]["images"]
+    assert [image["image_id"] for image in images] == sorted(image["image_id"] for image in images)
+    assert all("Signature=" in image["url"] and "Signature=" in image["thumbnail_url"] for image in images)
+    assert signer.signed == 1
@@ -0,0 +1,109 @@
+# 느린 WebSocket 클라이언트 처리 (utils/message_utils.py: OutboundConnection 정책)
+import asyncio
+import json
+
+from utils.message_utils import WSConnectionManager
+from utils.pubsub_utils import InMemoryBackend
+
+ROOM = 1
+
+
+class _Client:
+    """send_text가 gate가 열릴 때까지 멈추는 클라이언트 (stalled=False면 바로 받음)"""
+
+    def __init__(self, stalled: bool):
+        self.sent = []
+        self.closed_with = None
+        self.gate = asyncio.Event()
+        if not stalled:
+            self.gate.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        await self.gate.wait()
+        self.sent.append(json.loads(message))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def _manager(policy, queue_size=3):
+    manager = WSConnectionManager(InMemoryBackend())
+    manager.policy = policy
+    manager.queue_size = queue_size
+    return manager
+
+
+async def _stalled_socket(manager):
+    client = _Client(stalled=True)
+    await manager.connect(ROOM, client)
+    await manager.broadcast(ROOM, {"type": "chat", "n": 0})
+    await asyncio.sleep(0)  # writer가 첫 프레임을 잡고 멈춤
+    return client
+
+
+def _queued(manager, client):
+    return [json.loads(message)["n"] for _, message in manager.outbound[client].queue]
+
+
+def test_drop_oldest_keeps_newest_frames():
+    async def scenario():
+        manager = await _manager("drop_oldest")
+        client = await _stalled_socket(manager)
+        for n in range(1, 7):
+            await manager.broadcast(ROOM, {"type": "chat", "n": n})
+        assert _queued(manager, client) == [4, 5, 6]
+        assert manager.stats()["dropped_frames"] == 3
+
+        client.gate.set()
+        await asyncio.sleep(0.01)
+        assert [frame["n"] for frame in client.sent] == [0, 4, 5, 6]
+        await manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_coalesce_drops_typing_before_chat():
+    async def scenario():
+        manager = await _manager("coalesce")
+        client = await _stalled_socket(manager)
+        await manager.broadcast(ROOM, {"type": "typing", "n": 1})
+        await manager.broadcast(ROOM, {"type": "chat", "n": 2})
+        await manager.broadcast(ROOM, {"type": "typing", "n": 3})
+        await manager.broadcast(ROOM, {"type": "chat", "n": 4})  # typing 1 버림
+        await manager.broadcast(ROOM, {"type": "chat", "n": 5})  # typing 3 버림
+        assert _queued(manager, client) == [2, 4, 5]
+        await manager.broadcast(ROOM, {"type": "chat", "n": 6})  # typing 없음 → 가장 오래된 것
+        assert _queued(manager, client) == [4, 5, 6]
+        await manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_closes_only_the_slow_socket_with_1013():
+    async def scenario():
+        manager = await _manager("disconnect")
+        slow = await _stalled_socket(manager)
+        fast = _Client(stalled=False)
+        await manager.connect(ROOM, fast)
+        for n in range(1, 5):
+            await manager.broadcast(ROOM, {"type": "chat", "n": n})
+            await asyncio.sleep(0)
+
+        assert slow not in manager.outbound
+        assert manager.slow_disconnects == 1
+        assert len(manager._closing) == 1  # 종료 태스크를 잡아 둠
+        await asyncio.sleep(0.01)
+        assert slow.closed_with == 1013
+        assert not manager._closing
+
+        await manager.broadcast(ROOM, {"type": "chat", "n": 5})
+        await asyncio.sleep(0.01)
+        assert [frame["n"] for frame in fast.sent] == [1, 2, 3, 4, 5]
+        assert manager.rooms[ROOM] == {fast}
+        await manager.close()
+        assert fast.closed_with == 1001
+
+    asyncio.run(scenario())
@@ -0,0 +1,64 @@
+# 라우트별 SQL 문 수 (OCEAN_SQL_TRACE=1의 X-SQL-Statements 헤더). N+1이 생기면 여기서 깨짐
+import pytest
+from sqlalchemy import insert, select
+
+from database.database import SessionLocal
+from models import Image, Message
+
+STATEMENTS = "X-SQL-Statements"
+
+
+def _statements(response):
+    assert response.status_code < 300, response.text
+    return int(response.headers[STATEMENTS])
+
+
+def _seed(thread_id, messages, images_per_message):
+    if not messages:
+        return
+    with SessionLocal() as db:
+        db.execute(insert(Message), [
+            {"thread_id": thread_id, "sender_type": "user", "content": f"m{i}"} for i in range(messages)
+        ])
+        ids = db.scalars(select(Message.message_id).where(Message.thread_id == thread_id)).all()
+        if images_per_message:
+            db.execute(insert(Image), [
+                {"message_id": message_id, "image_url": f"threads/{thread_id}/{message_id}-{n}.jpg",
+                 "thumbnail_url": f"threads/{thread_id}/{message_id}-{n}_thumb.jpg"}
+                for message_id in ids for n in range(images_per_message)
+            ])
+        db.commit()
+
+
+@pytest.fixture
+def warm_auth(client, auth):
+    # 첫 요청의 토큰 버전 조회(캐시 미스)가 측정에 섞이지 않도록
+    assert client.get("/threads/threads", headers=auth).status_code == 200
+    return auth
+
+
+@pytest.mark.parametrize("messages,images", [(0, 0), (3, 0), (3, 1), (40, 3)])
+def test_list_messages_is_constant_regardless_of_images(client, warm_auth, thread_id, messages, images):
+    _seed(thread_id, messages, images)
+    response = client.get(f"/threads/{thread_id}/messages", params={"limit": 50}, headers=warm_auth)
+    assert sum(len(m["images"]) for m in response.json()) == messages * images
+    # 메시지 페이지 1 + (메시지가 있으면) 이미지 IN 1
+    assert _statements(response) == (2 if messages else 1)
+
+
+def test_thread_routes(client, warm_auth, thread_id):
+    _seed(thread_id, 5, 0)
+    assert _statements(client.get(f"/threads/threads/{thread_id}", headers=warm_auth)) == 1
+    assert _statements(client.get("/threads/threads", headers=warm_auth)) == 1
+    assert _statements(client.get("/threads/threads", params={"sort": "activity"}, headers=warm_auth)) == 1
+    assert _statements(client.get(f"/threads/{thread_id}/messages/1", headers=warm_auth)) == 1
+
+
+def test_create_message_does_not_grow_with_thread_size(client, warm_auth, thread_id):
+    def create(n):
+        return _statements(client.post(f"/threads/{thread_id}/messages", json={"content": f"new {n}"}, headers=warm_auth))
+
+    # INSERT ... SELECT(소유권 포함) + 스레드 요약 UPDATE + 저장된 행 조회
+    assert create(0) == 3
+    _seed(thread_id, 50, 2)
+    assert create(1) == 3
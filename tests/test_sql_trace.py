@@ -0,0 +1,76 @@
+# 요청별 SQL 계측 (database/instrumentation.py, utils/trace_utils.py)
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import re
+
+from sqlalchemy import text
+
+from database import instrumentation
+from database.database import SessionLocal
+from database.instrumentation import current_trace, start_trace, end_trace, sql_stats
+
+
+def _series(metrics_text, name, route, method="GET", status=200):
+    match = re.search(
+        rf'^{name}{{method="{method}",route="{re.escape(route)}",status="{status}"}} (\S+)$', metrics_text, re.M
+    )
+    return float(match.group(1)) if match else None
+
+
+def test_server_timing_header(client, auth, thread_id):
+    response = client.get(f"/threads/{thread_id}/messages", headers=auth)
+    timing = response.headers["Server-Timing"]
+    assert re.fullmatch(r'db;dur=[\d.]+;desc="\d+ queries", pool;dur=[\d.]+, app;dur=[\d.]+', timing)
+    assert f'desc="{response.headers["X-SQL-Statements"]} queries"' in timing
+
+
+def test_metrics_aggregate_by_route_template(client, auth, thread_id):
+    route = "/threads/{thread_id}/messages"
+    before = _series(client.get("/metrics").text, "ocean_http_requests_total", route) or 0
+    statements_before = _series(client.get("/metrics").text, "ocean_sql_statements_total", route) or 0
+    other = client.post("/threads/threads", json={"thread_title": "b"}, headers=auth).json()["thread_id"]
+    statements = sum(
+        int(client.get(f"/threads/{tid}/messages", headers=auth).headers["X-SQL-Statements"]) for tid in (thread_id, other)
+    )
+
+    metrics = client.get("/metrics").text
+    # 스레드 ID별이 아니라 경로 템플릿 하나로 집계
+    assert _series(metrics, "ocean_http_requests_total", route) == before + 2
+    assert _series(metrics, "ocean_sql_statements_total", route) == statements_before + statements
+    assert f'/threads/{thread_id}/messages"' not in metrics
+    assert 'ocean_db_pool_checked_out{engine="sync"}' in metrics
+
+
+def test_slow_query_log(monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_MS", 0)
+    trace, token = start_trace("GET /slow")
+    try:
+        with caplog.at_level(logging.WARNING, logger="ocean.sql.slow"), SessionLocal() as db:
+            db.execute(text("SELECT 1 WHERE 1 = :one"), {"one": 1})
+    finally:
+        end_trace(token)
+    assert trace.statements == 1 and trace.db_seconds > 0
+    record = caplog.records[-1]
+    assert "[GET /slow] SELECT 1 WHERE 1 = ?" in record.getMessage()  # 파라미터 값은 남기지 않음
+    assert current_trace() is None
+
+
+def test_no_slow_log_below_threshold(caplog):
+    with caplog.at_level(logging.WARNING, logger="ocean.sql.slow"), SessionLocal() as db:
+        db.execute(text("SELECT 1"))
+    assert not caplog.records
+
+
+def test_process_counters_are_exact_under_threads():
+    # 스레드풀 스레드들이 동시에 누적해도 빠지는 값이 없음
+    per_thread, threads = 300, 8
+
+    def run(_):
+        with SessionLocal() as db:
+            for _ in range(per_thread):
+                db.execute(text("SELECT 1"))
+
+    before = sql_stats.statements
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(run, range(threads)))
+    assert sql_stats.statements - before == per_thread * threads
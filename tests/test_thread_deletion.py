@@ -0,0 +1,82 @@
+# 스레드 삭제: 숨김 → 배치 정리 (utils/purge_utils.py)
+from sqlalchemy import false, func, select
+
+from conftest import bearer, login, signup
+from database.database import SessionLocal
+from models import Message, Thread
+from utils.purge_utils import purge_thread_batch
+
+
+def _post(client, auth, thread_id, count):
+    for i in range(count):
+        response = client.post(f"/threads/{thread_id}/messages", json={"content": f"m{i}"}, headers=auth)
+        assert response.status_code == 200
+
+
+def _purge(thread_id, batch_size):
+    with SessionLocal() as db:
+        return purge_thread_batch(db, thread_id, batch_size)
+
+
+def _counts(thread_id):
+    with SessionLocal() as db:
+        threads = db.scalar(select(func.count()).select_from(Thread).where(Thread.thread_id == thread_id))
+        messages = db.scalar(select(func.count()).select_from(Message).where(Message.thread_id == thread_id))
+        return threads, messages
+
+
+def test_delete_hides_thread_then_purges_in_batches(client, auth, thread_id):
+    _post(client, auth, thread_id, 5)
+    assert client.delete(f"/threads/threads/{thread_id}", headers=auth).status_code == 202
+    assert client.get(f"/threads/threads/{thread_id}", headers=auth).status_code == 404
+    status = client.get(f"/threads/threads/{thread_id}/deletion", headers=auth).json()
+    assert status["status"] == "purging" and status["remaining_messages"] == 5
+
+    assert _purge(thread_id, 2) is False
+    assert _counts(thread_id) == (1, 3)
+    while not _purge(thread_id, 2):
+        pass
+    assert _counts(thread_id) == (0, 0)
+    # 정리가 끝나면 행이 없으므로 404 (다른 사용자의 스레드와 구분되지 않음)
+    assert client.get(f"/threads/threads/{thread_id}/deletion", headers=auth).status_code == 404
+
+
+def test_deletion_status_is_404_for_unknown_and_foreign_threads(client, auth, thread_id):
+    assert client.get(f"/threads/threads/{thread_id + 1000}/deletion", headers=auth).status_code == 404
+    # 삭제 요청이 없던 스레드
+    assert client.get(f"/threads/threads/{thread_id}/deletion", headers=auth).status_code == 404
+
+    assert client.delete(f"/threads/threads/{thread_id}", headers=auth).status_code == 202
+    signup(client, "other@example.com", "password-2", "other")
+    other = bearer(login(client, "other@example.com", "password-2"))
+    assert client.get(f"/threads/threads/{thread_id}/deletion", headers=other).status_code == 404
+    assert client.get(f"/threads/threads/{thread_id}/deletion", headers=auth).json()["status"] == "purging"
+
+
+class _OtherWorkerHoldsAll:
+    """SKIP LOCKED 조회가 빈 결과를 돌려주는 상황 (남은 메시지를 모두 다른 워커가 잠근 상태)"""
+
+    def __init__(self, db):
+        self._db = db
+
+    def scalars(self, statement, *args, **kwargs):
+        lock = statement._for_update_arg
+        if lock is not None and lock.skip_locked:
+            statement = statement.where(false())
+        return self._db.scalars(statement, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+
+def test_thread_kept_while_remaining_messages_are_locked_elsewhere(client, auth, thread_id):
+    _post(client, auth, thread_id, 3)
+    assert client.delete(f"/threads/threads/{thread_id}", headers=auth).status_code == 202
+
+    with SessionLocal() as db:
+        assert purge_thread_batch(_OtherWorkerHoldsAll(db), thread_id) is False
+    assert _counts(thread_id) == (1, 3)
+
+    assert _purge(thread_id, 10) is False
+    assert _purge(thread_id, 10) is True
+    assert _counts(thread_id) == (0, 0)
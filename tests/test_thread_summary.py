@@ -0,0 +1,126 @@
+# 스레드 목록 요약 (메시지 저장과 함께 갱신) + 최근 활동 순 키셋 페이지네이션
+from sqlalchemy import func, select, text, update
+
+from database.database import SessionLocal
+from models import Thread
+from utils.thread_summary_utils import repair_thread_summaries
+
+
+def _thread(client, auth, thread_id):
+    r = client.get(f"/threads/threads/{thread_id}", headers=auth)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _new_threads(client, auth, count):
+    return [client.post("/threads/threads", json={"thread_title": f"t{i}"}, headers=auth).json()["thread_id"] for i in range(count)]
+
+
+def _set_activity(clause, thread_ids=None):
+    # DB 시계로 기록 (한 문장 안에서는 같은 값 → 동점)
+    stmt = update(Thread).values(last_activity_at=clause)
+    if thread_ids is not None:
+        stmt = stmt.where(Thread.thread_id.in_(thread_ids))
+    with SessionLocal() as db:
+        db.execute(stmt)
+        db.commit()
+
+
+def _pages(client, auth, limit):
+    ids, cursor = [], None
+    for _ in range(50):  # 커서가 제자리를 돌면 무한 반복 대신 실패
+        params = {"sort": "activity", "limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/threads/threads", params=params, headers=auth)
+        assert r.status_code == 200, r.text
+        ids += [t["thread_id"] for t in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids
+    raise AssertionError(f"커서가 끝나지 않음: {ids[:20]}")
+
+
+def test_summary_updated_on_create(client, auth, thread_id):
+    created = _thread(client, auth, thread_id)
+    assert (created["message_count"], created["last_message_id"], created["last_message_preview"]) == (0, None, None)
+    assert created["last_activity_at"]
+
+    ids = [
+        client.post(f"/threads/{thread_id}/messages", json={"content": f"m{i}" + "x" * 200}, headers=auth).json()["message_id"]
+        for i in range(3)
+    ]
+    summary = _thread(client, auth, thread_id)
+    assert summary["message_count"] == 3
+    assert summary["last_message_id"] == ids[-1]
+    assert summary["last_message_preview"] == ("m2" + "x" * 200)[:100]
+
+
+def test_summary_updated_on_bulk(client, auth):
+    first, second = _new_threads(client, auth, 2)
+    r = client.post("/threads/messages/bulk", json={"items": [
+        {"thread_id": first, "content": "a1", "client_message_id": "c1"},
+        {"thread_id": second, "content": "b1", "client_message_id": "c2"},
+        {"thread_id": first, "content": "a2", "client_message_id": "c3"},
+    ]}, headers=auth)
+    assert r.status_code == 200, r.text
+    messages = r.json()["messages"]
+
+    assert (_thread(client, auth, first)["message_count"], _thread(client, auth, first)["last_message_preview"]) == (2, "a2")
+    assert _thread(client, auth, first)["last_message_id"] == messages[2]["message_id"]
+    assert (_thread(client, auth, second)["message_count"], _thread(client, auth, second)["last_message_preview"]) == (1, "b1")
+
+    # 중복 재전송은 요약을 바꾸지 않음
+    client.post("/threads/messages/bulk", json={"items": [
+        {"thread_id": first, "content": "a1", "client_message_id": "c1"},
+    ]}, headers=auth)
+    assert _thread(client, auth, first)["message_count"] == 2
+
+
+def test_activity_sort_puts_recent_thread_first(client, auth):
+    ids = _new_threads(client, auth, 3)
+    _set_activity(text("datetime('now', '-1 hour')"))
+    client.post(f"/threads/{ids[0]}/messages", json={"content": "hello"}, headers=auth)
+
+    assert _pages(client, auth, 20) == [ids[0], ids[2], ids[1]]
+
+
+def test_activity_paging_with_ties_has_no_dups_or_skips(client, auth):
+    ids = _new_threads(client, auth, 7)
+    _set_activity(func.now())
+    # 동점 안에서는 thread_id 내림차순
+    for limit in (1, 2, 3, 7):
+        assert _pages(client, auth, limit) == sorted(ids, reverse=True)
+
+
+def test_activity_paging_across_older_and_tied_groups(client, auth):
+    ids = _new_threads(client, auth, 6)
+    _set_activity(text("datetime('now', '-2 hour')"), ids[:3])
+    _set_activity(text("datetime('now', '-1 hour')"), ids[3:])
+    assert _pages(client, auth, 2) == sorted(ids[3:], reverse=True) + sorted(ids[:3], reverse=True)
+
+
+def test_activity_cursor_rejects_tampering(client, auth):
+    _new_threads(client, auth, 3)
+    _set_activity(func.now())
+    cursor = client.get("/threads/threads", params={"sort": "activity", "limit": 1}, headers=auth).headers["X-Next-Cursor"]
+    r = client.get("/threads/threads", params={"sort": "activity", "cursor": cursor[:-2] + "xx"}, headers=auth)
+    assert r.status_code == 400
+
+
+def test_repair_restores_summary_and_keeps_paging(client, auth):
+    ids = _new_threads(client, auth, 4)
+    for thread_id in ids[:2]:
+        for i in range(2):
+            client.post(f"/threads/{thread_id}/messages", json={"content": f"{thread_id}-{i}"}, headers=auth)
+    with SessionLocal() as db:
+        expected = {row.thread_id: row for row in db.execute(select(Thread.thread_id, Thread.message_count, Thread.last_message_id, Thread.last_message_preview))}
+        db.execute(update(Thread).values(message_count=99, last_message_id=None, last_message_preview=None))
+        db.commit()
+
+        assert repair_thread_summaries(db, batch_size=3) == 4
+        repaired = {row.thread_id: row for row in db.execute(select(Thread.thread_id, Thread.message_count, Thread.last_message_id, Thread.last_message_preview))}
+    assert repaired == expected
+
+    # 복구 후에도 저장 형식이 같아 커서 비교가 맞음 (빠짐/중복 없음)
+    assert sorted(_pages(client, auth, 1)) == sorted(ids)
@@ -0,0 +1,60 @@
+# 검증된 액세스 토큰 캐시 (utils/token_utils.py: get_current_user / _resolve_user)
+from sqlalchemy import select, update
+
+from database.database import SessionLocal
+from models import Users
+from utils.cache_utils import token_cache, token_versions
+from utils.purge_utils import purge_deleted_users
+
+
+def _other_worker_changes(**values):
+    # 다른 워커에서 커밋된 변경: 이 워커의 토큰 캐시는 그대로, 버전 캐시는 TTL 만료
+    with SessionLocal() as db:
+        db.execute(update(Users).values(**values))
+        db.commit()
+    token_versions._entries.clear()
+
+
+def test_cache_hit_skips_user_query(client, auth):
+    first = client.get("/users/me", headers=auth)
+    hits = token_cache.hits
+    second = client.get("/users/me", headers=auth)
+    assert first.json() == second.json()
+    assert token_cache.hits == hits + 1
+    assert int(second.headers["X-SQL-Statements"]) == 0
+
+
+def test_preference_update_refreshes_snapshot(client, auth):
+    client.get("/users/me", headers=auth)
+    assert client.patch("/users/me", headers=auth, json={"dark_mode": True}).status_code == 200
+    # 다음 요청은 스냅샷이 아닌 DB의 최신 행 (이어서 다시 수정해도 값이 유지됨)
+    assert client.get("/users/me", headers=auth).headers["X-SQL-Statements"] != "0"
+    assert client.patch("/users/me", headers=auth, json={"chat_theme": True}).status_code == 200
+    with SessionLocal() as db:
+        assert db.execute(select(Users.dark_mode, Users.chat_theme)).one() == (True, True)
+
+
+def test_cached_token_rejected_after_version_bump_elsewhere(client, auth):
+    assert client.get("/users/me", headers=auth).status_code == 200
+    _other_worker_changes(token_version=Users.token_version + 1)
+    r = client.get("/users/me", headers=auth)
+    assert r.status_code == 401
+    assert r.json()["detail"] == "무효화된 토큰입니다"
+
+
+def test_cached_token_of_deleted_user_is_401_not_500(client, auth):
+    assert client.get("/users/me", headers=auth).status_code == 200
+    # 탈퇴 요청이 다른 워커에서 처리됨 (버전 증가 없이도 deleted_at만으로 거절)
+    _other_worker_changes(deleted_at=Users.created_at)
+    assert client.get("/users/me", headers=auth).status_code == 401
+    assert client.patch("/users/me", headers=auth, json={"dark_mode": True}).status_code == 401
+    assert client.get("/threads/threads", headers=auth).status_code == 401
+
+
+def test_deleted_user_row_kept_until_version_cache_expires(client, auth, monkeypatch):
+    assert client.delete("/users/me", headers=auth).status_code == 202
+    with SessionLocal() as db:
+        assert purge_deleted_users(db) == 0
+        monkeypatch.setattr(token_versions, "ttl_seconds", -1)
+        assert purge_deleted_users(db) == 1
+        assert db.scalar(select(Users.user_id)) is None
@@ -0,0 +1,101 @@
+# WebSocket 채팅: 인증, chat 이벤트 저장(write-behind)과 ack (route/message.py)
+from contextlib import ExitStack
+import asyncio
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from conftest import ASYNC_MODE, bearer, login, signup
+from database.database import SessionLocal, engine, async_engine
+from route import message
+from schemas import MessageCreate
+from utils.write_behind_utils import WriteBehindQueue
+
+
+def _ws(client, user, thread_id):
+    return client.websocket_connect(f"/threads/ws/{thread_id}?token={user['access_token']}")
+
+
+@pytest.fixture
+def pool():
+    return (async_engine.sync_engine if ASYNC_MODE else engine).pool
+
+
+def test_open_socket_does_not_hold_a_pooled_connection(ws_client, user, thread_id, pool):
+    with _ws(ws_client, user, thread_id) as first, _ws(ws_client, user, thread_id) as second:
+        assert first.receive_json()["event"] == "joined"
+        assert second.receive_json()["event"] == "joined"
+        assert pool.checkedout() == 0
+
+
+def test_more_sockets_than_pool_connections(ws_client, user, thread_id, pool):
+    count = pool.size() + pool._max_overflow + 1
+    with ExitStack() as stack:
+        sockets = [stack.enter_context(_ws(ws_client, user, thread_id)) for _ in range(count)]
+        assert all(ws.receive_json()["event"] == "joined" for ws in sockets)
+
+
+def test_chat_is_persisted_and_acked(ws_client, user, auth, thread_id, pool):
+    with _ws(ws_client, user, thread_id) as ws:
+        ws.receive_json()  # joined
+        ws.send_json({"type": "chat", "sender_type": "user", "content": "안녕", "client_message_id": "c-1"})
+        events = [ws.receive_json(), ws.receive_json()]
+        ack = next(event for event in events if event["type"] == "ack")
+        assert ack["client_message_id"] == "c-1"
+        assert pool.checkedout() == 0
+
+    messages = ws_client.get(f"/threads/{thread_id}/messages", headers=auth).json()
+    assert [(m["message_id"], m["content"]) for m in messages] == [(ack["message_id"], "안녕")]
+
+
+def test_rejects_foreign_thread(ws_client, user, thread_id):
+    with pytest.raises(WebSocketDisconnect) as excinfo:
+        with _ws(ws_client, user, thread_id + 1) as ws:
+            ws.receive_text()
+    assert excinfo.value.code == 1008
+
+
+def test_rejects_chat_longer_than_the_column_before_queueing(ws_client, user, auth, thread_id):
+    with _ws(ws_client, user, thread_id) as ws:
+        ws.receive_json()  # joined
+        ws.send_json({"type": "chat", "content": "x" * (message.CHAT_CONTENT_MAX_LENGTH + 1), "client_message_id": "long"})
+        assert ws.receive_json() == {"type": "error", "message": "content_too_long", "client_message_id": "long"}
+    assert message.chat_writer.pending() == 0
+    assert ws_client.get(f"/threads/{thread_id}/messages", headers=auth).json() == []
+
+
+def test_one_bad_item_does_not_fail_its_batch(client, auth, thread_id, monkeypatch):
+    signup(client, "other@example.com", "password-2", "other")
+    other_auth = bearer(login(client, "other@example.com", "password-2"))
+    other_thread = client.post("/threads/threads", json={"thread_title": "t"}, headers=other_auth).json()["thread_id"]
+    owner = client.get("/users/me", headers=auth).json()["user_id"]
+    other = client.get("/users/me", headers=other_auth).json()["user_id"]
+
+    # 한 항목 때문에 배치 트랜잭션 전체가 실패하는 상황 (예: MySQL strict 모드의 DataError)
+    store = message._store_messages
+
+    def failing_store(db, rows):
+        if any(row["content"] == "boom" for row in rows):
+            raise RuntimeError("Data too long for column 'content'")
+        return store(db, rows)
+
+    monkeypatch.setattr(message, "_store_messages", failing_store)
+
+    async def scenario():
+        queue = WriteBehindQueue(message._persist_chat_batch, SessionLocal, batch_size=3, batch_ms=1000)
+        futures = [
+            await queue.submit((user_id, tid, MessageCreate(content=content, client_message_id=content)))
+            for user_id, tid, content in [(owner, thread_id, "a"), (other, other_thread, "boom"), (other, other_thread, "b")]
+        ]
+        await asyncio.gather(*futures, return_exceptions=True)
+        await queue.close()
+        return futures, queue.stats()
+
+    futures, stats = asyncio.run(scenario())
+    assert futures[0].result()["content"] == "a"
+    assert isinstance(futures[1].exception(), RuntimeError)
+    assert futures[2].result()["content"] == "b"
+    assert (stats["batches"], stats["retried_batches"], stats["written"], stats["failed"]) == (1, 1, 2, 1)
+
+    assert [m["content"] for m in client.get(f"/threads/{thread_id}/messages", headers=auth).json()] == ["a"]
+    assert [m["content"] for m in client.get(f"/threads/{other_thread}/messages", headers=other_auth).json()] == ["b"]